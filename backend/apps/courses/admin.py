@@ -1,14 +1,15 @@
 from django.contrib import admin
-from .models import Course, StudentCourse
+from .cache import invalidate_selections
+from .models import Course, ImportJob, StudentCourse, StudentSchedule
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
     """课程管理"""
-    list_display = ('name', 'course_code', 'teacher', 'classroom', 
+    list_display = ('name', 'course_code', 'section_code', 'teacher', 'classroom', 
                    'capacity', 'selected_count', 'time_slot')
     list_filter = ('teacher',)
-    search_fields = ('name', 'course_code', 'teacher')
-    ordering = ('course_code',)
+    search_fields = ('name', 'course_code', 'section_code', 'teacher')
+    ordering = ('course_code', 'section_code')
 
 @admin.register(StudentCourse)
 class StudentCourseAdmin(admin.ModelAdmin):
@@ -17,3 +18,31 @@ class StudentCourseAdmin(admin.ModelAdmin):
     list_filter = ('status',)
     search_fields = ('student__username', 'course__name', 'course__course_code')
     ordering = ('-created_at',)
+    actions = ('approve', 'reject')
+
+    @admin.action(description='通过所选的选课记录')
+    def approve(self, request, queryset):
+        updated = StudentCourse.objects.set_status(queryset, 'approved')
+        self.message_user(request, f'已通过 {updated} 条选课记录')
+
+    @admin.action(description='拒绝所选的选课记录')
+    def reject(self, request, queryset):
+        updated = StudentCourse.objects.set_status(queryset, 'rejected')
+        self.message_user(request, f'已拒绝 {updated} 条选课记录')
+
+    def delete_queryset(self, request, queryset):
+        # 批量删除不经过 StudentCourse.delete，需要单独重建相关学生的课表位图、清除选课记录缓存
+        students = set(queryset.filter(status='approved').values_list('student_id', flat=True))
+        affected = set(queryset.values_list('student_id', flat=True))
+        super().delete_queryset(request, queryset)
+        StudentSchedule.objects.rebuild(students)
+        invalidate_selections(affected)
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    """导入任务管理"""
+    list_display = ('filename', 'status', 'row_count', 'created_count',
+                   'updated_count', 'skipped_count', 'created_by', 'created_at')
+    list_filter = ('status', 'file_type')
+    search_fields = ('filename',)
+    ordering = ('-created_at',)
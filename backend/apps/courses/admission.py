@@ -0,0 +1,221 @@
+import contextvars
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from apps.monitoring.probe import run_in_context
+
+from .models import Course
+
+logger = logging.getLogger(__name__)
+
+# 课程已满时的响应内容，排队处理时据此判断课程已无名额
+COURSE_FULL = {"detail": "课程已满"}
+
+
+class QueueFull(Exception):
+    """课程排队人数已达上限"""
+
+
+class Ticket:
+    """
+    排队凭证：result 为处理结果 (状态码, 响应内容)，处理完成前为 None
+    context 为提交请求时的上下文，排队线程在其中处理，性能埋点记入原请求
+    """
+
+    def __init__(self, course_id, student, seq):
+        self.id = uuid.uuid4().hex
+        self.course_id = course_id
+        self.student = student
+        self.seq = seq
+        self.result = None
+        self.done = threading.Event()
+        self.finished_at = None
+        self.context = contextvars.copy_context()
+
+
+class CourseQueue:
+    """
+    单门课程的先进先出队列
+    remaining 为本进程所知的剩余名额（处理请求时从数据库刷新），None 表示未知
+    """
+
+    def __init__(self, course_id):
+        self.course_id = course_id
+        self.waiting = deque()
+        self.served = 0  # 已出队的凭证序号
+        self.seq = itertools.count(1)
+        self.remaining = None
+        self.checked_at = 0.0
+        self.draining = False
+
+
+class AdmissionController:
+    """
+    选课排队（进程内）
+    同一门课程的选课请求按到达顺序逐个处理，不再同时争抢课程行上的锁；
+    不同课程由 COURSE_ADMISSION_WORKERS 个线程并行处理。
+    已知课程已满时，新到的请求和队列中剩余的请求直接拒绝，不访问数据库；
+    其他进程的退课最迟在 COURSE_ADMISSION_FULL_TTL 秒后重新放行。
+    名额以数据库中的条件更新为准，多进程部署时各进程独立排队，不会超卖
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queues = {}
+        self.tickets = {}
+        self.finished = deque()
+        self.executor = None
+        self.pruned_at = time.monotonic()
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "COURSE_ADMISSION_WORKERS", 4),
+                thread_name_prefix="course-admission",
+            )
+        return self.executor
+
+    def is_full(self, course_id) -> bool:
+        """本进程最近确认课程已满（不访问数据库）"""
+        queue = self.queues.get(course_id)
+        return queue is not None and self._known_full(queue)
+
+    def _known_full(self, queue) -> bool:
+        ttl = getattr(settings, "COURSE_ADMISSION_FULL_TTL", 1.0)
+        return (
+            queue.remaining is not None
+            and queue.remaining <= 0
+            and time.monotonic() - queue.checked_at < ttl
+        )
+
+    def submit(self, course_id, student, attempt) -> Ticket:
+        """
+        排队选课，attempt(course, student) 返回 (状态码, 响应内容)
+        课程不存在时抛出 Course.DoesNotExist，队列已满时抛出 QueueFull
+        """
+        # 只为存在的课程建立队列，不能用任意 id 撑大 self.queues
+        if (
+            course_id not in self.queues
+            and not Course.objects.filter(pk=course_id).exists()
+        ):
+            raise Course.DoesNotExist()
+        limit = getattr(settings, "COURSE_ADMISSION_MAX_QUEUE", 1000)
+        with self.lock:
+            self._purge()
+            queue = self.queues.get(course_id)
+            if queue is None:
+                queue = self.queues[course_id] = CourseQueue(course_id)
+            if len(queue.waiting) >= limit:
+                raise QueueFull()
+            ticket = Ticket(course_id, student, next(queue.seq))
+            queue.waiting.append(ticket)
+            self.tickets[ticket.id] = ticket
+            if not queue.draining:
+                queue.draining = True
+                self.get_executor().submit(self._drain, queue, attempt)
+        return ticket
+
+    def get_ticket(self, ticket_id, student_id):
+        """查询本人的排队凭证，不存在或已过期时返回 None"""
+        ticket = self.tickets.get(ticket_id)
+        if ticket is None or ticket.student.pk != student_id:
+            return None
+        return ticket
+
+    def position(self, ticket) -> int:
+        """排在前面的请求数，0 表示正在处理或已处理完成"""
+        if ticket.done.is_set():
+            return 0
+        queue = self.queues[ticket.course_id]
+        return max(ticket.seq - queue.served - 1, 0)
+
+    def seat_released(self, course_id):
+        """本进程内退课后，课程重新有名额"""
+        queue = self.queues.get(course_id)
+        if queue is not None and queue.remaining is not None:
+            with self.lock:
+                queue.remaining += 1
+
+    def _purge(self):
+        """
+        清理处理完成超过 COURSE_ADMISSION_TICKET_TTL 秒的凭证，
+        以及没有排队请求、已满状态已过期的课程队列（每 COURSE_ADMISSION_FULL_TTL 秒一次）
+        """
+        ttl = getattr(settings, "COURSE_ADMISSION_TICKET_TTL", 60)
+        now = time.monotonic()
+        while self.finished and now - self.finished[0].finished_at >= ttl:
+            self.tickets.pop(self.finished.popleft().id, None)
+
+        full_ttl = getattr(settings, "COURSE_ADMISSION_FULL_TTL", 1.0)
+        if now - self.pruned_at < full_ttl:
+            return
+        self.pruned_at = now
+        idle = [
+            course_id
+            for course_id, queue in self.queues.items()
+            if not queue.draining
+            and not queue.waiting
+            and now - queue.checked_at >= full_ttl
+        ]
+        for course_id in idle:
+            del self.queues[course_id]
+
+    def _finish(self, ticket, result):
+        with self.lock:
+            ticket.result = result
+            ticket.finished_at = time.monotonic()
+            self.finished.append(ticket)
+        ticket.done.set()
+
+    def _drain(self, queue, attempt):
+        """线程入口：逐个处理队列中的请求，队列为空时退出"""
+        close_old_connections()
+        try:
+            while True:
+                with self.lock:
+                    if not queue.waiting:
+                        queue.draining = False
+                        return
+                    ticket = queue.waiting.popleft()
+                    queue.served = ticket.seq
+                try:
+                    result = run_in_context(
+                        ticket.context, self._process, queue, ticket, attempt
+                    )
+                except Exception:
+                    logger.exception("课程 %s 排队选课异常", queue.course_id)
+                    result = (500, {"detail": "选课失败，请稍后重试"})
+                self._finish(ticket, result)
+        finally:
+            connection.close()
+
+    def _process(self, queue, ticket, attempt):
+        if self._known_full(queue):
+            return 400, COURSE_FULL
+        course = Course.objects.filter(pk=queue.course_id).first()
+        if course is None:
+            return 404, {"detail": "课程不存在"}
+        with self.lock:
+            queue.remaining = course.capacity - course.selected_count
+            queue.checked_at = time.monotonic()
+        if queue.remaining <= 0:
+            return 400, COURSE_FULL
+
+        status_code, data = attempt(course, ticket.student)
+        with self.lock:
+            if status_code == 200:
+                queue.remaining -= 1
+            elif data == COURSE_FULL:
+                queue.remaining = 0
+        return status_code, data
+
+
+admission = AdmissionController()
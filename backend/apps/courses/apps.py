@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.courses'
     verbose_name = '课程管理'
+
+    def ready(self):
+        from .db import apply_sqlite_pragmas
+
+        # 选课事务集中写入，SQLite 需要 WAL 等设置才能承受并发
+        connection_created.connect(apply_sqlite_pragmas)
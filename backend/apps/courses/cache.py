@@ -0,0 +1,167 @@
+import hashlib
+import pickle
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+# 课程目录版本号的缓存键；导入、增删改课程、名额变化时递增，旧版本的缓存条目随之失效
+VERSION_KEY = "course:catalog:version"
+# 学生选课记录列表按学生缓存：选课、退课、审核时删除该学生的条目；
+# 课程名称、教师、上课时间等信息修改时递增代数，全部学生的条目随之失效（名额变化不影响）
+SELECTIONS_GENERATION_KEY = "course:selections:generation"
+
+_ledgers = {}
+
+
+def get_cache():
+    """课程目录使用的缓存（settings.COURSE_CACHE_ALIAS，默认 course_catalog）"""
+    return caches[getattr(settings, "COURSE_CACHE_ALIAS", "course_catalog")]
+
+
+def _initial_version() -> int:
+    # 以毫秒时间戳作为初始版本，版本键被淘汰或进程重启后不会与旧条目重号
+    return int(time.time() * 1000)
+
+
+def _current_version(key) -> int:
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), timeout=None)
+
+
+def catalog_version() -> int:
+    """当前课程目录版本"""
+    return _current_version(VERSION_KEY)
+
+
+def bump_catalog_version():
+    """递增课程目录版本"""
+    _bump_version(VERSION_KEY)
+
+
+def invalidate_catalog():
+    """在当前事务提交后使课程目录缓存失效（不在事务中时立即执行）"""
+    transaction.on_commit(bump_catalog_version)
+
+
+def selections_key(student_id) -> str:
+    """学生选课记录列表的缓存键"""
+    generation = _current_version(SELECTIONS_GENERATION_KEY)
+    return f"course:selections:{generation}:{student_id}"
+
+
+def invalidate_selections(student_ids):
+    """在当前事务提交后删除这些学生的选课记录列表缓存"""
+    student_ids = set(student_ids)
+    if student_ids:
+        transaction.on_commit(
+            lambda: get_cache().delete_many(
+                [selections_key(student_id) for student_id in student_ids]
+            )
+        )
+
+
+def invalidate_all_selections():
+    """课程信息修改后，在当前事务提交后使全部学生的选课记录列表缓存失效"""
+    transaction.on_commit(lambda: _bump_version(SELECTIONS_GENERATION_KEY))
+
+
+def response_key(version, *parts) -> str:
+    """由目录版本和请求信息生成缓存键"""
+    digest = hashlib.sha1("\n".join(str(part) for part in parts).encode()).hexdigest()
+    return f"course:response:{version}:{digest}"
+
+
+class _SizeLedger:
+    """记录每个缓存条目的字节数及总量（同名缓存实例共享）"""
+
+    def __init__(self):
+        self.sizes = {}
+        self.total = 0
+
+    def add(self, key, size):
+        self.discard(key)
+        self.sizes[key] = size
+        self.total += size
+
+    def discard(self, key):
+        self.total -= self.sizes.pop(key, 0)
+
+    def clear(self):
+        self.sizes.clear()
+        self.total = 0
+
+
+class SizeLimitedLocMemCache(LocMemCache):
+    """
+    按占用字节数淘汰的进程内 LRU 缓存
+    在 LocMemCache 按条目数（MAX_ENTRIES）淘汰的基础上，
+    OPTIONS["MAX_SIZE"] 限制所有条目序列化后的总字节数，超出时淘汰最久未使用的条目
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        options = params.get("OPTIONS", {})
+        self._max_size = int(options.get("MAX_SIZE", 64 * 1024 * 1024))
+        self._ledger = _ledgers.setdefault(name, _SizeLedger())
+
+    @property
+    def current_size(self) -> int:
+        return self._ledger.total
+
+    def _set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        if len(value) > self._max_size:
+            # 单个条目超过上限时不缓存
+            self._delete(key)
+            return
+        super()._set(key, value, timeout)
+        self._ledger.add(key, len(value))
+        # OrderedDict 末尾是最久未使用的条目
+        while self._ledger.total > self._max_size and len(self._cache) > 1:
+            evicted, _ = self._cache.popitem()
+            self._expire_info.pop(evicted, None)
+            self._ledger.discard(evicted)
+
+    def incr(self, key, delta=1, version=None):
+        value = super().incr(key, delta, version)
+        with self._lock:
+            self._ledger.add(
+                self.make_key(key, version=version),
+                len(pickle.dumps(value, self.pickle_protocol)),
+            )
+        return value
+
+    def _cull(self):
+        if self._cull_frequency == 0:
+            self._ledger.clear()
+            super()._cull()
+            return
+        count = len(self._cache) // self._cull_frequency
+        for _ in range(count):
+            key, _ = self._cache.popitem()
+            del self._expire_info[key]
+            self._ledger.discard(key)
+
+    def _delete(self, key):
+        self._ledger.discard(key)
+        return super()._delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._ledger.clear()
+        super().clear()
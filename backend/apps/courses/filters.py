@@ -0,0 +1,148 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .models import CourseMeeting
+from .schedule import (
+    DAY_MAP,
+    MAX_WEEKS,
+    PERIODS_PER_DAY,
+    WEEKS_ALL,
+    WEEKS_EVEN,
+    WEEKS_ODD,
+)
+
+# 课程全文索引表（仅 SQLite，见迁移 0007_course_search）
+FTS_TABLE = "courses_course_fts"
+# trigram 分词器要求检索词至少 3 个字符，更短的词退回 LIKE 查询
+FTS_MIN_LENGTH = 3
+
+_fts_available = None
+
+
+def fts_available() -> bool:
+    """当前数据库是否存在课程全文索引表（结果缓存）"""
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = (
+            connection.vendor == "sqlite"
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_available
+
+
+def fts_phrase(term: str) -> str:
+    """把检索词转义为 FTS5 短语"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+class CourseFilterBackend(BaseFilterBackend):
+    """
+    课程列表筛选
+    - search：按课程名称、教师、课程号检索（SQLite 下使用 FTS5 全文索引）
+    - weekday：星期（1-7 或 一~日）；period：节次；week：教学周（考虑单双周）
+    - has_seats：只看有余量的课程
+    - college：开课学院；credit：学分
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if getattr(view, "action", None) != "list":
+            return queryset
+        params = request.query_params
+
+        search = params.get("search", "").strip()
+        if search:
+            queryset = self.filter_search(queryset, search)
+
+        weekday = params.get("weekday")
+        period = params.get("period")
+        week = params.get("week")
+        if weekday or period or week:
+            meetings = CourseMeeting.objects.all()
+            if weekday:
+                meetings = meetings.filter(weekday=self.parse_weekday(weekday))
+            if period:
+                period = self.parse_int("period", period, 1, PERIODS_PER_DAY)
+                meetings = meetings.filter(start_period__lte=period, end_period__gte=period)
+            if week:
+                meetings = self.filter_week(
+                    meetings, self.parse_int("week", week, 1, MAX_WEEKS)
+                )
+            queryset = queryset.filter(pk__in=meetings.values("course_id"))
+
+        if params.get("has_seats", "").lower() in ("1", "true", "yes"):
+            queryset = queryset.filter(selected_count__lt=F("capacity"))
+
+        college = params.get("college", "").strip()
+        if college:
+            queryset = queryset.filter(college=college)
+
+        credit = params.get("credit", "").strip()
+        if credit:
+            try:
+                value = Decimal(credit)
+            except InvalidOperation:
+                raise serializers.ValidationError({"credit": "学分必须是数字"})
+            # NaN、Infinity 也能解析为 Decimal，但无法与字段比较
+            if not value.is_finite():
+                raise serializers.ValidationError({"credit": "学分必须是数字"})
+            queryset = queryset.filter(credit=value)
+
+        return queryset
+
+    def filter_search(self, queryset, search):
+        """空格分隔的多个词之间为“且”关系"""
+        long_terms, short_terms = [], []
+        for term in search.split():
+            (long_terms if len(term) >= FTS_MIN_LENGTH else short_terms).append(term)
+
+        if long_terms and fts_available():
+            expression = " AND ".join(fts_phrase(term) for term in long_terms)
+            queryset = queryset.filter(
+                pk__in=RawSQL(
+                    f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                    [expression],
+                )
+            )
+        else:
+            short_terms += long_terms
+
+        for term in short_terms:
+            queryset = queryset.filter(
+                Q(name__icontains=term)
+                | Q(teacher__icontains=term)
+                | Q(course_code__icontains=term)
+            )
+        return queryset
+
+    @staticmethod
+    def filter_week(meetings, week):
+        """第 week 周上课的时段"""
+        parity = WEEKS_ODD if week % 2 else WEEKS_EVEN
+        return meetings.filter(
+            start_week__lte=week,
+            end_week__gte=week,
+            week_parity__in=[WEEKS_ALL, parity],
+        )
+
+    @staticmethod
+    def parse_int(name, value, minimum, maximum):
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            number = None
+        if number is None or not minimum <= number <= maximum:
+            raise serializers.ValidationError(
+                {name: f"必须是 {minimum}-{maximum} 之间的整数"}
+            )
+        return number
+
+    def parse_weekday(self, value):
+        value = value.strip().lstrip("周").replace("星期", "")
+        if value in DAY_MAP:
+            return DAY_MAP[value]
+        return self.parse_int("weekday", value, 1, 7)
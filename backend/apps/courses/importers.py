@@ -0,0 +1,230 @@
+from contextlib import nullcontext
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_all_selections, invalidate_catalog
+from .models import Course, CourseMeeting, SeatChange, StudentCourse, StudentSchedule
+
+# 已存在课程允许被导入覆盖的字段；已选人数由选课流程维护，不会被覆盖
+UPDATE_FIELDS = (
+    "name",
+    "course_code",
+    "teacher",
+    "classroom",
+    "capacity",
+    "time_slot",
+    "college",
+    "credit",
+    "description",
+)
+# 导入时写入的课程字段（解析器输出的其他键，如 start_week/end_week，会被忽略）
+TEXT_FIELDS = (
+    "name",
+    "course_code",
+    "section_code",
+    "teacher",
+    "classroom",
+    "time_slot",
+    "college",
+    "description",
+)
+INT_FIELDS = ("capacity", "selected_count")
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CHUNK_SIZE = 5000
+
+
+class ImportResult:
+    """导入结果统计"""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.errors: List[str] = []
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "errors": self.errors,
+        }
+
+
+class CourseImporter:
+    """
+    批量课程导入器
+    一次查询预取已有课程，按批 bulk_create 新课程、bulk_update 有变化的课程，
+    查询次数与批次数成正比，而不是与行数成正比。
+    支持逐块导入：解析器每产出一块数据就写入一块，不在内存中保留整个文件
+    """
+
+    # 错误信息最多保留的条数，避免响应过大
+    max_errors = 100
+
+    def __init__(self, batch_size: int = None):
+        self.batch_size = batch_size or getattr(
+            settings, "COURSE_IMPORT_BATCH_SIZE", DEFAULT_BATCH_SIZE
+        )
+        self.max_lengths = {
+            name: Course._meta.get_field(name).max_length for name in TEXT_FIELDS
+        }
+
+    def clean_row(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """校验并规范化一行数据，非法时抛出 ValueError"""
+        data = {}
+        for name in TEXT_FIELDS:
+            value = row.get(name)
+            # None 与 pandas 的 NaN 都视为空
+            value = "" if value is None or value != value else str(value).strip()
+            max_length = self.max_lengths[name]
+            if max_length and len(value) > max_length:
+                raise ValueError(f"{name} 超过最大长度 {max_length}")
+            data[name] = value
+        for name in INT_FIELDS:
+            try:
+                value = int(float(row.get(name) or 0))
+            except (TypeError, ValueError, OverflowError):
+                raise ValueError(f"{name} 不是整数")
+            if value < 0:
+                raise ValueError(f"{name} 不能为负数")
+            data[name] = value
+        credit = row.get("credit")
+        if credit is None or credit != credit or str(credit).strip() == "":
+            data["credit"] = None
+        else:
+            try:
+                data["credit"] = Decimal(str(credit).strip()).quantize(Decimal("0.1"))
+            except InvalidOperation:
+                raise ValueError("credit 不是数字")
+            if not 0 <= data["credit"] < 1000:
+                raise ValueError("credit 超出范围")
+        if not data["course_code"]:
+            raise ValueError("缺少课程号")
+        # 没有教学班信息的文件，每个课程号视为一个教学班
+        data["section_code"] = data["section_code"] or data["course_code"]
+        if not data["name"]:
+            raise ValueError("缺少课程名称")
+        return data
+
+    def validate(self, rows: Iterable[Dict[str, Any]], result: ImportResult, seen: set):
+        """
+        批量校验，返回按教学班去重后的数据
+        同一教学班以首次出现为准，seen 记录此前各块已处理过的教学班
+        """
+        valid: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            result.rows += 1
+            try:
+                data = self.clean_row(row)
+            except ValueError as e:
+                result.skipped += 1
+                if len(result.errors) < self.max_errors:
+                    result.errors.append(f"第{result.rows}行: {e}")
+                continue
+            code = data["section_code"]
+            if code in seen or code in valid:
+                result.skipped += 1
+                continue
+            valid[code] = data
+        seen.update(valid)
+        return valid
+
+    def prefetch(self) -> Dict[str, Tuple]:
+        """一次查询预取已有课程：教学班 -> (id, 可更新字段的值...)"""
+        return {
+            row[0]: row[1:]
+            for row in Course.objects.order_by()
+            .values_list("section_code", "id", *UPDATE_FIELDS)
+            .iterator(chunk_size=self.batch_size)
+        }
+
+    def import_chunk(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        existing: Dict[str, Tuple],
+        result: ImportResult,
+        seen: set,
+    ):
+        """导入一块数据"""
+        valid = self.validate(rows, result, seen)
+
+        to_create, to_update, rescheduled = [], [], []
+        now = timezone.now()
+        for code, data in valid.items():
+            current = existing.get(code)
+            if current is None:
+                to_create.append(Course(**data))
+                continue
+            pk, values = current[0], current[1:]
+            changes = {
+                name: data[name]
+                for name, value in zip(UPDATE_FIELDS, values)
+                if value != data[name]
+            }
+            if changes:
+                # bulk_update 只写入指定的列，未修改的字段取导入值即可
+                course = Course(pk=pk, **{name: data[name] for name in UPDATE_FIELDS})
+                # bulk_update 不会触发 auto_now，需要手动更新时间
+                course.updated_at = now
+                to_update.append(course)
+                if "time_slot" in changes or "classroom" in changes:
+                    rescheduled.append(course)
+            else:
+                result.skipped += 1
+
+        Course.objects.bulk_create(to_create, batch_size=self.batch_size)
+        Course.objects.bulk_update(
+            to_update, [*UPDATE_FIELDS, "updated_at"], batch_size=self.batch_size
+        )
+        # 新建课程和上课时间、教室有变化的课程需要同步上课时段
+        CourseMeeting.objects.sync(to_create + rescheduled)
+        if rescheduled:
+            # 已通过这些课程的学生，课表位图按新的上课时间重建
+            students = StudentCourse.objects.filter(
+                course__in=[course.pk for course in rescheduled], status="approved"
+            ).values_list("student_id", flat=True)
+            StudentSchedule.objects.rebuild(set(students))
+        if to_update:
+            # 课程名称、教师、上课时间等可能已修改，选课记录列表缓存全部失效
+            invalidate_all_selections()
+        if to_create or to_update:
+            invalidate_catalog()
+            # 新建或更新（可能修改了容量）的课程推送给余量订阅
+            SeatChange.objects.record(course.pk for course in to_create + to_update)
+        result.created += len(to_create)
+        result.updated += len(to_update)
+
+    def run_chunks(
+        self,
+        chunks: Iterable[Iterable[Dict[str, Any]]],
+        atomic: bool = True,
+        progress: Callable[[ImportResult], None] = None,
+    ) -> ImportResult:
+        """
+        逐块导入
+        atomic 为 True 时整个导入在同一事务中完成，任一块失败时全部回滚；
+        为 False 时每块单独提交，失败时此前的块已经写入
+        progress 在每块写入后调用
+        """
+        result = ImportResult()
+        seen = set()
+        with transaction.atomic() if atomic else nullcontext():
+            existing = self.prefetch()
+            for chunk in chunks:
+                with nullcontext() if atomic else transaction.atomic():
+                    self.import_chunk(chunk, existing, result, seen)
+                if progress:
+                    progress(result)
+        return result
+
+    def run(self, rows: Iterable[Dict[str, Any]]) -> ImportResult:
+        """一次性导入全部数据"""
+        return self.run_chunks([rows])
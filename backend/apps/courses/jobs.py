@@ -0,0 +1,133 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from .importers import DEFAULT_CHUNK_SIZE, CourseImporter
+from .models import ImportJob
+from .utils import get_parser
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# 执行中任务的进度：导入在一个事务中完成，提交前任务行上的计数对其他连接不可见，进度另存于缓存
+# （COURSE_IMPORT_RUNNER 为 "command" 时，Web 进程需要与其共享缓存才能看到执行中的进度）
+PROGRESS_KEY = "course:import:{}:progress"
+PROGRESS_TIMEOUT = 24 * 3600
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """进程内的导入线程池（首次使用时创建）"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "COURSE_IMPORT_WORKERS", 1),
+                thread_name_prefix="course-import",
+            )
+    return _executor
+
+
+def enqueue(job: ImportJob):
+    """
+    提交导入任务
+    COURSE_IMPORT_RUNNER 为 "thread" 时在进程内线程池执行；
+    为 "command" 时保持等待状态，由 manage.py run_import_jobs 处理
+    """
+    if getattr(settings, "COURSE_IMPORT_RUNNER", "thread") == "thread":
+        get_executor().submit(_run_in_thread, job.pk)
+
+
+def _run_in_thread(job_id):
+    """线程入口：任务结束后关闭本线程的数据库连接"""
+    try:
+        run_job(job_id)
+    except Exception:
+        logger.exception("导入任务 %s 执行异常", job_id)
+    finally:
+        connection.close()
+
+
+def claim(job_id) -> bool:
+    """以条件更新抢占任务，同一任务只会被一个执行者处理"""
+    return (
+        ImportJob.objects.filter(pk=job_id, status="pending").update(
+            status="running", started_at=timezone.now()
+        )
+        == 1
+    )
+
+
+def counts(result) -> dict:
+    """导入结果中对应任务计数字段的部分"""
+    return {
+        "row_count": result.rows,
+        "created_count": result.created,
+        "updated_count": result.updated,
+        "skipped_count": result.skipped,
+    }
+
+
+def get_progress(job_id):
+    """执行中任务已处理的计数（字段同 counts），没有记录时返回 None"""
+    return cache.get(PROGRESS_KEY.format(job_id))
+
+
+def run_job(job_id) -> bool:
+    """
+    执行导入任务：流式解析文件并逐块写入，整个导入在一个事务中完成，
+    任一块解析或写入失败时全部回滚，任务标记为失败；每块写入后在缓存中更新进度
+    返回值: 是否抢占并执行了该任务
+    """
+    close_old_connections()
+    if not claim(job_id):
+        return False
+    job = ImportJob.objects.get(pk=job_id)
+    key = PROGRESS_KEY.format(job_id)
+
+    def progress(result):
+        cache.set(key, counts(result), PROGRESS_TIMEOUT)
+
+    try:
+        parser = get_parser(job.file_type)
+        if not parser:
+            raise ValueError("无法处理该文件类型")
+        chunk_size = getattr(settings, "COURSE_IMPORT_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+        result = CourseImporter().run_chunks(
+            parser.iter_chunks(job.file.path, chunksize=chunk_size),
+            atomic=True,
+            progress=progress,
+        )
+    except Exception as e:
+        logger.exception("导入任务 %s 失败", job_id)
+        ImportJob.objects.filter(pk=job_id).update(
+            status="failed",
+            detail=f"导入失败，未写入任何课程: {e}",
+            finished_at=timezone.now(),
+        )
+        cache.delete(key)
+        return True
+
+    ImportJob.objects.filter(pk=job_id).update(
+        status="succeeded",
+        errors=result.errors,
+        finished_at=timezone.now(),
+        **counts(result),
+    )
+    cache.delete(key)
+    return True
+
+
+def pending_jobs():
+    """按提交顺序返回等待中的任务 id"""
+    return (
+        ImportJob.objects.filter(status="pending")
+        .order_by("created_at", "id")
+        .values_list("id", flat=True)
+    )
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.courses.models import SeatChange
+
+
+class Command(BaseCommand):
+    help = "清理余量订阅的旧名额变化记录（定时执行，例如每分钟一次）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=getattr(settings, "COURSE_SEAT_FEED_RETENTION", 10000),
+            help="保留的最近版本数（默认 COURSE_SEAT_FEED_RETENTION）",
+        )
+
+    def handle(self, *args, **options):
+        deleted = SeatChange.objects.prune(options["keep"])
+        self.stdout.write(self.style.SUCCESS(f"已清理 {deleted} 条名额变化记录"))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.courses.models import StudentSchedule
+
+
+class Command(BaseCommand):
+    help = "按已通过的选课记录重建学生课表位图（用于修复不一致的数据）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--student", type=int, nargs="+", help="只重建指定学生（用户 id）"
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        masks = StudentSchedule.objects.rebuild(options["student"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"已重建 {len(masks)} 名学生的课表位图，"
+                f"用时 {time.perf_counter() - start:.2f} 秒"
+            )
+        )
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.courses.jobs import pending_jobs, run_job
+from apps.courses.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = "处理等待中的课程导入任务（配合 COURSE_IMPORT_RUNNER = \"command\" 使用）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="处理完当前等待中的任务后退出"
+        )
+        parser.add_argument(
+            "--interval", type=float, default=2.0, help="没有任务时的轮询间隔（秒）"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS("导入任务处理程序已启动"))
+        while True:
+            job_ids = list(pending_jobs())
+            for job_id in job_ids:
+                if not run_job(job_id):
+                    continue
+                job = ImportJob.objects.get(pk=job_id)
+                style = self.style.SUCCESS if job.status == "succeeded" else self.style.ERROR
+                self.stdout.write(
+                    style(
+                        f"{job.filename}: {job.get_status_display()}，"
+                        f"处理 {job.row_count} 行，新建 {job.created_count}，"
+                        f"更新 {job.updated_count}，跳过 {job.skipped_count}"
+                        f"（{job.throughput} 行/秒）"
+                    )
+                )
+            if options["once"]:
+                break
+            if not job_ids:
+                time.sleep(options["interval"])
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_delete_comment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='imports/%Y%m%d/', verbose_name='导入文件')),
+                ('filename', models.CharField(max_length=255, verbose_name='原始文件名')),
+                ('file_type', models.CharField(max_length=10, verbose_name='文件类型')),
+                ('status', models.CharField(choices=[('pending', '等待中'), ('running', '导入中'), ('succeeded', '已完成'), ('failed', '失败')], default='pending', max_length=20, verbose_name='任务状态')),
+                ('row_count', models.IntegerField(default=0, verbose_name='已处理行数')),
+                ('created_count', models.IntegerField(default=0, verbose_name='新建课程数')),
+                ('updated_count', models.IntegerField(default=0, verbose_name='更新课程数')),
+                ('skipped_count', models.IntegerField(default=0, verbose_name='跳过行数')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='错误信息')),
+                ('detail', models.TextField(blank=True, verbose_name='失败原因')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='结束时间')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='创建人')),
+            ],
+            options={
+                'verbose_name': '导入任务',
+                'verbose_name_plural': '导入任务',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
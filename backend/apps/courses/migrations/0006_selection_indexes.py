@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0005_importjob"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["-created_at"], name="course_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["teacher"], name="course_teacher_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["name"], name="course_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["classroom"], name="course_classroom_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="studentcourse",
+            index=models.Index(
+                fields=["student", "status", "course"], name="sc_student_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="studentcourse",
+            index=models.Index(
+                fields=["student", "-created_at"], name="sc_student_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,156 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:34
+
+import re
+import sqlite3
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+DESCRIPTION_PATTERN = re.compile(r"^.* - (.*) - ([\d.]+)学分$")
+SLOT_PATTERN = re.compile(
+    r"(?:周|星期)([一二三四五六日天])\s*第?\s*(\d+)\s*-\s*(\d+)\s*节"
+)
+DAY_MAP = {"一": 1, "二": 2, "三": 3, "四": 4, "五": 5, "六": 6, "日": 7, "天": 7}
+
+FTS_SQL = [
+    "CREATE VIRTUAL TABLE courses_course_fts USING fts5("
+    "name, teacher, course_code, content='courses_course', content_rowid='id',"
+    " tokenize='trigram')",
+    "CREATE TRIGGER courses_course_fts_ai AFTER INSERT ON courses_course BEGIN"
+    " INSERT INTO courses_course_fts(rowid, name, teacher, course_code)"
+    " VALUES (new.id, new.name, new.teacher, new.course_code); END",
+    "CREATE TRIGGER courses_course_fts_ad AFTER DELETE ON courses_course BEGIN"
+    " INSERT INTO courses_course_fts(courses_course_fts, rowid, name, teacher, course_code)"
+    " VALUES ('delete', old.id, old.name, old.teacher, old.course_code); END",
+    "CREATE TRIGGER courses_course_fts_au AFTER UPDATE OF name, teacher, course_code"
+    " ON courses_course BEGIN"
+    " INSERT INTO courses_course_fts(courses_course_fts, rowid, name, teacher, course_code)"
+    " VALUES ('delete', old.id, old.name, old.teacher, old.course_code);"
+    " INSERT INTO courses_course_fts(rowid, name, teacher, course_code)"
+    " VALUES (new.id, new.name, new.teacher, new.course_code); END",
+    "INSERT INTO courses_course_fts(courses_course_fts) VALUES ('rebuild')",
+]
+FTS_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS courses_course_fts_ai",
+    "DROP TRIGGER IF EXISTS courses_course_fts_ad",
+    "DROP TRIGGER IF EXISTS courses_course_fts_au",
+    "DROP TABLE IF EXISTS courses_course_fts",
+]
+
+
+def backfill(apps, schema_editor):
+    """从课程描述中回填开课学院、学分，并解析已有课程的上课时段"""
+    Course = apps.get_model("courses", "Course")
+    CourseMeeting = apps.get_model("courses", "CourseMeeting")
+    meetings = []
+    for course in Course.objects.only("description", "time_slot").iterator():
+        match = DESCRIPTION_PATTERN.match(course.description)
+        if match:
+            course.college = match.group(1).strip()[:50]
+            course.credit = Decimal(match.group(2)).quantize(Decimal("0.1"))
+            course.save(update_fields=["college", "credit"])
+        seen = set()
+        for slot in SLOT_PATTERN.finditer(course.time_slot):
+            meeting = (DAY_MAP[slot.group(1)], int(slot.group(2)), int(slot.group(3)))
+            if meeting[1] <= meeting[2] and meeting not in seen:
+                seen.add(meeting)
+                meetings.append(
+                    CourseMeeting(
+                        course_id=course.pk,
+                        weekday=meeting[0],
+                        start_period=meeting[1],
+                        end_period=meeting[2],
+                    )
+                )
+    CourseMeeting.objects.bulk_create(meetings, batch_size=500)
+
+
+def create_fts(apps, schema_editor):
+    """SQLite 3.34+ 创建 trigram 全文索引及同步触发器，其他数据库不创建"""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    if sqlite3.sqlite_version_info < (3, 34):
+        return
+    for sql in FTS_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in FTS_DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0006_selection_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="college",
+            field=models.CharField(
+                blank=True, db_index=True, max_length=50, verbose_name="开课学院"
+            ),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="credit",
+            field=models.DecimalField(
+                blank=True,
+                db_index=True,
+                decimal_places=1,
+                max_digits=4,
+                null=True,
+                verbose_name="学分",
+            ),
+        ),
+        migrations.CreateModel(
+            name="CourseMeeting",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("weekday", models.PositiveSmallIntegerField(verbose_name="星期")),
+                (
+                    "start_period",
+                    models.PositiveSmallIntegerField(verbose_name="起始节次"),
+                ),
+                (
+                    "end_period",
+                    models.PositiveSmallIntegerField(verbose_name="结束节次"),
+                ),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="meetings",
+                        to="courses.course",
+                        verbose_name="课程",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "上课时段",
+                "verbose_name_plural": "上课时段",
+                "indexes": [
+                    models.Index(
+                        fields=["weekday", "start_period", "end_period", "course"],
+                        name="meeting_day_period_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.RunPython(create_fts, drop_fts),
+    ]
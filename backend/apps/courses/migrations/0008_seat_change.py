@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0007_course_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SeatChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("course_id", models.IntegerField(verbose_name="课程ID")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="变化时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "名额变化",
+                "verbose_name_plural": "名额变化",
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0008_seat_change"),
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StudentSchedule",
+            fields=[
+                (
+                    "student",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="schedule",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="学生",
+                    ),
+                ),
+                ("occupancy", models.BinaryField(default=b"", verbose_name="占用位图")),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="更新时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "学生课表",
+                "verbose_name_plural": "学生课表",
+            },
+        ),
+    ]
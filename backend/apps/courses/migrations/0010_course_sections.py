@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:20
+
+import importlib
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Substr
+
+# 重建课程表会删除其上的全文索引触发器，修改前删除、修改后重新创建（见 0007_course_search）
+course_search = importlib.import_module("apps.courses.migrations.0007_course_search")
+
+
+def backfill(apps, schema_editor):
+    """已有课程没有教学班信息，教学班取课程代码"""
+    Course = apps.get_model("courses", "Course")
+    Course.objects.update(section_code=F("course_code"))
+
+
+def backfill_meetings(apps, schema_editor):
+    """已有课程只保存了一个教室，各上课时段都取该教室"""
+    Course = apps.get_model("courses", "Course")
+    CourseMeeting = apps.get_model("courses", "CourseMeeting")
+    classroom = Course.objects.filter(pk=OuterRef("course_id")).values("classroom")
+    CourseMeeting.objects.update(classroom=Substr(Subquery(classroom), 1, 50))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0009_student_schedule"),
+    ]
+
+    operations = [
+        migrations.RunPython(course_search.drop_fts, course_search.create_fts),
+        migrations.AddField(
+            model_name="course",
+            name="section_code",
+            field=models.CharField(default="", max_length=50, verbose_name="教学班"),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="course",
+            name="section_code",
+            field=models.CharField(max_length=50, unique=True, verbose_name="教学班"),
+        ),
+        migrations.AlterField(
+            model_name="course",
+            name="course_code",
+            field=models.CharField(
+                db_index=True, max_length=20, verbose_name="课程代码"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="course",
+            name="classroom",
+            field=models.CharField(max_length=100, verbose_name="教室"),
+        ),
+        migrations.AddField(
+            model_name="coursemeeting",
+            name="classroom",
+            field=models.CharField(blank=True, max_length=50, verbose_name="教室"),
+        ),
+        migrations.RunPython(backfill_meetings, migrations.RunPython.noop),
+        migrations.RunPython(course_search.create_fts, course_search.drop_fts),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:05
+
+import re
+
+from django.db import migrations, models
+
+# 迁移时的上课时间格式（与 schedule.SLOT_PATTERN 一致，复制到此处以免随代码变化）
+SLOT_PATTERN = re.compile(
+    r"(?:周|星期)([一二三四五六日天])\s*第?\s*(\d+)\s*-\s*(\d+)\s*节"
+    r"(?:\s*\{\s*(\d+)\s*-\s*(\d+)\s*周\s*(?:\((单|双)\))?\s*\})?"
+)
+DAY_MAP = {"一": 1, "二": 2, "三": 3, "四": 4, "五": 5, "六": 6, "日": 7, "天": 7}
+PARITY_MAP = {"": 0, "单": 1, "双": 2}
+MEETING_FIELDS = (
+    "weekday",
+    "start_period",
+    "end_period",
+    "start_week",
+    "end_week",
+    "week_parity",
+)
+
+
+def backfill(apps, schema_editor):
+    """
+    按上课时间重建标注了上课周的课程的上课时段
+    未标注上课周的课程取字段默认值（第 1-16 周、每周），无需改写；教室沿用同一时段原有的教室
+    """
+    Course = apps.get_model("courses", "Course")
+    CourseMeeting = apps.get_model("courses", "CourseMeeting")
+    courses = Course.objects.filter(time_slot__contains="{").values_list(
+        "pk", "time_slot", "classroom"
+    )
+    for pk, time_slot, classroom in courses.iterator(chunk_size=500):
+        rooms = {
+            (weekday, start, end): room
+            for weekday, start, end, room in CourseMeeting.objects.filter(
+                course_id=pk
+            ).values_list("weekday", "start_period", "end_period", "classroom")
+        }
+        meetings = {}
+        for match in SLOT_PATTERN.finditer(time_slot):
+            slot = (DAY_MAP[match.group(1)], int(match.group(2)), int(match.group(3)))
+            weeks = (
+                int(match.group(4)) if match.group(4) else 1,
+                int(match.group(5)) if match.group(5) else 16,
+                PARITY_MAP[match.group(6) or ""],
+            )
+            if slot[1] <= slot[2]:
+                meetings[slot + weeks] = rooms.get(slot, classroom[:50])
+        CourseMeeting.objects.filter(course_id=pk).delete()
+        CourseMeeting.objects.bulk_create(
+            CourseMeeting(
+                course_id=pk, classroom=room, **dict(zip(MEETING_FIELDS, key))
+            )
+            for key, room in meetings.items()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0010_course_sections"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="coursemeeting",
+            name="start_week",
+            field=models.PositiveSmallIntegerField(default=1, verbose_name="起始周"),
+        ),
+        migrations.AddField(
+            model_name="coursemeeting",
+            name="end_week",
+            field=models.PositiveSmallIntegerField(default=16, verbose_name="结束周"),
+        ),
+        migrations.AddField(
+            model_name="coursemeeting",
+            name="week_parity",
+            field=models.PositiveSmallIntegerField(
+                choices=[(0, "每周"), (1, "单周"), (2, "双周")],
+                default=0,
+                verbose_name="单双周",
+            ),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
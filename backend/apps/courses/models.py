@@ -1,28 +1,427 @@
-from django.db import models
+import re
+
+from django.db import connections, models, transaction
+from django.conf import settings
+from django.db.models import F, Max, Min
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from .cache import invalidate_all_selections, invalidate_catalog, invalidate_selections
+from .schedule import (
+    DEFAULT_WEEKS, WEEKS_ALL, WEEKS_EVEN, WEEKS_ODD, compile_time_slot, decode_mask,
+    encode_mask, parse_meetings,
+)
 
 User = get_user_model()
 
+# 配套教学班的后缀：如 "(2024-2025-2)-83563-01A" 与 "-01" 同一教师、同一班级，是必须一起上的配套学时
+COMPANION_SUFFIX = re.compile(r'(?<=\d)[A-Z]+$')
+
+def section_group(section_code) -> str:
+    """教学班组：基础教学班及其配套教学班（"-01"、"-01A"）同组，学生选同一课程号的一组教学班"""
+    return COMPANION_SUFFIX.sub('', section_code.strip())
+
+class CourseQuerySet(models.QuerySet):
+    """课程查询集"""
+
+    def reserve_seat(self, pk) -> bool:
+        """
+        占用一个名额
+        容量检查与人数自增合并为一条条件 UPDATE，并发下不会超卖
+        返回值: 是否占用成功（课程已满时返回 False）
+        """
+        with transaction.atomic():
+            updated = self.filter(pk=pk, selected_count__lt=F('capacity')).update(
+                selected_count=F('selected_count') + 1
+            )
+            if updated:
+                invalidate_catalog()
+                SeatChange.objects.record([pk])
+        return updated == 1
+
+    def release_seat(self, pk) -> bool:
+        """释放一个名额，已选人数不会减到负数"""
+        with transaction.atomic():
+            updated = self.filter(pk=pk, selected_count__gt=0).update(
+                selected_count=F('selected_count') - 1
+            )
+            if updated:
+                invalidate_catalog()
+                SeatChange.objects.record([pk])
+        return updated == 1
+
+    def lock_seats(self, pks):
+        """
+        按主键顺序锁定课程行并返回 {id: (已选人数, 容量)}（须在事务中调用）
+        批量选退课固定以相同顺序加锁，并发请求之间不会死锁
+        """
+        rows = (
+            self.select_for_update()
+            .filter(pk__in=pks)
+            .order_by('pk')
+            .values_list('pk', 'selected_count', 'capacity')
+        )
+        return {pk: (selected, capacity) for pk, selected, capacity in rows}
+
+    def reserve_seats(self, pks) -> int:
+        """批量占用名额（每门课一个），返回成功占用的课程数"""
+        pks = list(pks)
+        if not pks:
+            return 0
+        with transaction.atomic():
+            updated = self.filter(pk__in=pks, selected_count__lt=F('capacity')).update(
+                selected_count=F('selected_count') + 1
+            )
+            if updated:
+                invalidate_catalog()
+                SeatChange.objects.record(pks)
+        return updated
+
+    def release_seats(self, pks) -> int:
+        """批量释放名额（每门课一个），返回释放的课程数"""
+        pks = list(pks)
+        if not pks:
+            return 0
+        with transaction.atomic():
+            updated = self.filter(pk__in=pks, selected_count__gt=0).update(
+                selected_count=F('selected_count') - 1
+            )
+            if updated:
+                invalidate_catalog()
+                SeatChange.objects.record(pks)
+        return updated
+
 class Course(models.Model):
-    """课程模型"""
+    """
+    课程模型（每行是一个教学班）
+    同一课程号可以有多个教学班，各自有独立的教师、上课时间、教室和名额，学生按教学班选课
+    """
     name = models.CharField(max_length=100, verbose_name='课程名称')
-    course_code = models.CharField(max_length=20, unique=True, verbose_name='课程代码')
+    course_code = models.CharField(max_length=20, db_index=True, verbose_name='课程代码')
+    # 教学班名称，如 "(2024-2025-2)-80508-01"；没有教学班信息时与课程代码相同
+    section_code = models.CharField(max_length=50, unique=True, verbose_name='教学班')
     teacher = models.CharField(max_length=50, verbose_name='授课教师')
-    classroom = models.CharField(max_length=50, verbose_name='教室')
+    # 多个上课时间对应的教室以分号分隔，与上课时间一一对应；各时间教室相同时只保留一个
+    classroom = models.CharField(max_length=100, verbose_name='教室')
     capacity = models.IntegerField(default=0, verbose_name='课程容量')
     selected_count = models.IntegerField(default=0, verbose_name='已选人数')
     time_slot = models.CharField(max_length=100, verbose_name='上课时间')
+    college = models.CharField(max_length=50, blank=True, db_index=True, verbose_name='开课学院')
+    credit = models.DecimalField(
+        max_digits=4, decimal_places=1, null=True, blank=True, db_index=True, verbose_name='学分'
+    )
     description = models.TextField(blank=True, verbose_name='课程描述')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
 
+    objects = CourseQuerySet.as_manager()
+
+    # 学生选课记录列表中展示的课程字段
+    LISTED_FIELDS = ('name', 'teacher', 'time_slot', 'classroom')
+
     class Meta:
         verbose_name = '课程'
         verbose_name_plural = verbose_name
         ordering = ['-created_at']
+        indexes = [
+            # 课程列表默认排序
+            models.Index(fields=['-created_at'], name='course_created_idx'),
+            # 后台按教师筛选、按名称/教室搜索
+            models.Index(fields=['teacher'], name='course_teacher_idx'),
+            models.Index(fields=['name'], name='course_name_idx'),
+            models.Index(fields=['classroom'], name='course_classroom_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.section_code})'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录读出时的上课时间，保存时据此判断是否需要重建学生课表位图
+        instance._loaded_time_slot = instance.__dict__.get('time_slot')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if not self.section_code:
+            self.section_code = self.course_code
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.LISTED_FIELDS):
+            # 选课记录的增量获取以课程修改时间判断课程信息是否变化
+            update_fields = kwargs['update_fields'] = {*update_fields, 'updated_at'}
+        rescheduled = (
+            not self._state.adding
+            and (update_fields is None or 'time_slot' in update_fields)
+            and getattr(self, '_loaded_time_slot', None) != self.time_slot
+        )
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # 上课时间变化时同步上课时段表
+            if update_fields is None or 'time_slot' in update_fields:
+                CourseMeeting.objects.sync([self])
+            # 已通过该课程的学生，课表位图按新的上课时间重建
+            if rescheduled:
+                StudentSchedule.objects.rebuild(self.approved_student_ids())
+            SeatChange.objects.record([self.pk])
+        self._loaded_time_slot = self.time_slot
+        # 选课记录列表中带有课程名称、教师、上课时间和教室
+        if update_fields is None or set(update_fields) & set(self.LISTED_FIELDS):
+            invalidate_all_selections()
+        invalidate_catalog()
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        with transaction.atomic():
+            students = self.approved_student_ids()
+            # 选课记录随课程级联删除，不经过 StudentCourse.delete，需要单独重建课表位图
+            result = super().delete(*args, **kwargs)
+            StudentSchedule.objects.rebuild(students)
+            SeatChange.objects.record([pk])
+        invalidate_all_selections()
+        invalidate_catalog()
+        return result
+
+    def approved_student_ids(self) -> set:
+        """已通过该课程的学生 id"""
+        return set(
+            StudentCourse.objects.filter(course_id=self.pk, status='approved')
+            .values_list('student_id', flat=True)
+        )
+
+    @property
+    def schedule_mask(self) -> int:
+        """课表位图（按上课时间字符串缓存，每种写法只解析一次）"""
+        return compile_time_slot(self.time_slot)
+
+    @property
+    def section_group(self) -> str:
+        return section_group(self.section_code)
+
+class CourseMeetingManager(models.Manager):
+    """上课时段管理器"""
+
+    def sync(self, courses):
+        """按课程的上课时间、教室重建上课时段（批量删除后批量写入）"""
+        courses = [course for course in courses if course.pk]
+        if not courses:
+            return
+        ids = [course.pk for course in courses]
+        for start in range(0, len(ids), 500):
+            self.filter(course__in=ids[start:start + 500]).delete()
+        self.bulk_create(
+            [
+                self.model(course_id=course.pk, classroom=classroom, **meeting._asdict())
+                for course in courses
+                for meeting, classroom in self.meetings(course)
+            ],
+            batch_size=500,
+        )
+
+    @staticmethod
+    def meetings(course):
+        """
+        (上课时段, 教室)：分号分隔的上课时间与教室按位置对应，
+        同一时段在多个教室上课时教室以分号连接
+        """
+        segments = course.time_slot.split(';')
+        rooms = course.classroom.split(';')
+        if len(rooms) != len(segments):
+            rooms = [course.classroom] * len(segments)
+        meetings = {}
+        for segment, room in zip(segments, rooms):
+            for meeting in parse_meetings(segment):
+                meeting_rooms = meetings.setdefault(meeting, [])
+                if room.strip() not in meeting_rooms:
+                    meeting_rooms.append(room.strip())
+        return [
+            (meeting, ';'.join(meeting_rooms)[:50])
+            for meeting, meeting_rooms in meetings.items()
+        ]
+
+class CourseMeeting(models.Model):
+    """
+    课程上课时段（导入时由上课时间解析得到）
+    按星期、节次、教学周筛选课程和生成课表时直接查询此表，不再解析上课时间字符串
+    """
+    PARITY_CHOICES = (
+        (WEEKS_ALL, '每周'),
+        (WEEKS_ODD, '单周'),
+        (WEEKS_EVEN, '双周'),
+    )
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name='meetings', verbose_name='课程'
+    )
+    weekday = models.PositiveSmallIntegerField(verbose_name='星期')
+    start_period = models.PositiveSmallIntegerField(verbose_name='起始节次')
+    end_period = models.PositiveSmallIntegerField(verbose_name='结束节次')
+    start_week = models.PositiveSmallIntegerField(default=DEFAULT_WEEKS[0], verbose_name='起始周')
+    end_week = models.PositiveSmallIntegerField(default=DEFAULT_WEEKS[1], verbose_name='结束周')
+    week_parity = models.PositiveSmallIntegerField(
+        choices=PARITY_CHOICES, default=WEEKS_ALL, verbose_name='单双周'
+    )
+    classroom = models.CharField(max_length=50, blank=True, verbose_name='教室')
+
+    objects = CourseMeetingManager()
+
+    class Meta:
+        verbose_name = '上课时段'
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(
+                fields=['weekday', 'start_period', 'end_period', 'course'],
+                name='meeting_day_period_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f'{self.course_id} 周{self.weekday} {self.start_period}-{self.end_period}节'
+            f' {self.start_week}-{self.end_week}周'
+        )
+
+class SeatChangeManager(models.Manager):
+    """名额变化记录管理器"""
+
+    # PostgreSQL 事务级咨询锁的键，见 record
+    LOCK_KEY = 0x5EA7C4A9
+
+    def record(self, course_ids):
+        """
+        在当前事务中记录名额或容量发生变化的课程，与名额的更新一同提交或回滚
+        版本号（自增主键）须按提交顺序递增，否则客户端可能越过稍后才提交的较小版本：
+        SQLite 的写事务本身串行执行；PostgreSQL 上写入前取得事务级咨询锁，提交时释放，
+        改变名额的事务从这里到提交依次执行，各自取得的版本号与提交顺序一致
+        """
+        course_ids = [pk for pk in course_ids if pk is not None]
+        if not course_ids:
+            return
+        with transaction.atomic(using=self.db):
+            connection = connections[self.db]
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_xact_lock(%s)', [self.LOCK_KEY])
+            self.bulk_create([self.model(course_id=pk) for pk in course_ids], batch_size=500)
+
+    def prune(self, retention=None) -> int:
+        """
+        只保留最近 retention（默认 COURSE_SEAT_FEED_RETENTION）个版本的记录，返回删除的条数
+        由 python manage.py prune_seat_changes 定时执行
+        """
+        if retention is None:
+            retention = getattr(settings, 'COURSE_SEAT_FEED_RETENTION', 10000)
+        latest = self.aggregate(latest=Max('pk'))['latest']
+        if not latest or latest <= retention:
+            return 0
+        deleted, _ = self.filter(pk__lte=latest - retention).delete()
+        return deleted
+
+    def bounds(self):
+        """返回 (最早保留的版本, 最新版本)，没有记录时为 (None, None)"""
+        result = self.aggregate(oldest=Min('pk'), latest=Max('pk'))
+        return result['oldest'], result['latest']
+
+class SeatChange(models.Model):
+    """
+    名额变化记录（供余量订阅接口增量同步）
+    自增主键即版本号；课程删除后记录仍保留，因此 course_id 不设外键
+    """
+    course_id = models.IntegerField(verbose_name='课程ID')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='变化时间')
+
+    objects = SeatChangeManager()
+
+    class Meta:
+        verbose_name = '名额变化'
+        verbose_name_plural = verbose_name
 
     def __str__(self):
-        return f'{self.name} ({self.course_code})'
+        return f'{self.pk}: {self.course_id}'
+
+class StudentCourseManager(models.Manager):
+    """选课记录管理器"""
+
+    def enroll(self, student, course, status='pending'):
+        """
+        选课：在同一事务中占用名额并创建选课记录
+        课程已满时返回 None；重复选课时抛出 IntegrityError，名额随事务回滚
+        """
+        with transaction.atomic():
+            if not Course.objects.reserve_seat(course.pk):
+                return None
+            return self.create(student=student, course=course, status=status)
+
+    def withdraw(self, student, course) -> bool:
+        """
+        退课：删除选课记录并释放名额
+        返回值: 是否存在该选课记录（并发重复退课只会释放一次名额）
+        """
+        with transaction.atomic():
+            # 在行锁下读取状态，与并发的审核串行执行，按删除时的实际状态更新课表位图
+            # （SQLite 的事务以 IMMEDIATE 模式开始，开始时即持有写锁）
+            selection = (
+                self.select_for_update()
+                .filter(student=student, course=course)
+                .values_list('pk', 'status')
+                .first()
+            )
+            if selection is None:
+                return False
+            deleted, _ = self.filter(pk=selection[0]).delete()
+            if not deleted:
+                return False
+            Course.objects.release_seat(course.pk)
+            if selection[1] == 'approved':
+                StudentSchedule.objects.rebuild([student.pk])
+            invalidate_selections([student.pk])
+        return True
+
+    def change_batch(self, student, add, drop, status='pending'):
+        """
+        批量选课、退课：在同一事务中完成，任一课程失败时全部回滚
+        add、drop 为课程 id 列表；先按主键顺序锁定涉及的全部课程，再退课、占用名额、创建选课记录
+        返回值: {"full": 已满的课程 id, "missing": 未选过的退课课程 id}，均为空表示成功；
+        重复选课时抛出 IntegrityError
+        """
+        add, drop = list(add), list(drop)
+        failed = {'full': [], 'missing': []}
+        with transaction.atomic():
+            seats = Course.objects.lock_seats(sorted({*add, *drop}))
+            failed['full'] = [
+                pk for pk in add if pk in seats and seats[pk][0] >= seats[pk][1]
+            ]
+            existing = dict(
+                self.filter(student=student, course__in=drop).values_list('course_id', 'status')
+            )
+            failed['missing'] = [pk for pk in drop if pk not in existing]
+            if failed['full'] or failed['missing']:
+                transaction.set_rollback(True)
+                return failed
+
+            if drop:
+                self.filter(student=student, course__in=drop).delete()
+                Course.objects.release_seats(drop)
+            # 未加行锁的数据库（如 SQLite）上以条件 UPDATE 的结果为准
+            if Course.objects.reserve_seats(add) != len(add):
+                transaction.set_rollback(True)
+                failed['full'] = add
+                return failed
+            self.bulk_create(
+                [self.model(student=student, course_id=pk, status=status) for pk in add]
+            )
+            # bulk_create 和批量删除不经过 save/delete，需要单独更新课表位图
+            if (status == 'approved' and add) or 'approved' in existing.values():
+                StudentSchedule.objects.rebuild([student.pk])
+            invalidate_selections([student.pk])
+        return failed
+
+    def set_status(self, selections, status) -> int:
+        """批量修改选课状态（审核通过、拒绝），并更新相关学生的课表位图"""
+        with transaction.atomic():
+            selections = selections.exclude(status=status)
+            students = set(selections.values_list('student_id', flat=True))
+            updated = selections.update(status=status, updated_at=timezone.now())
+            StudentSchedule.objects.rebuild(students)
+            invalidate_selections(students)
+        return updated
 
 class StudentCourse(models.Model):
     """学生选课关系模型"""
@@ -41,11 +440,172 @@ class StudentCourse(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='选课时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
 
+    objects = StudentCourseManager()
+
     class Meta:
         verbose_name = '选课记录'
         verbose_name_plural = verbose_name
         unique_together = ('student', 'course')
         ordering = ['-created_at']
+        indexes = [
+            # 选课冲突检测：按学生和状态筛选，带上课程 id 以免回表
+            models.Index(fields=['student', 'status', 'course'], name='sc_student_status_idx'),
+            # 学生选课记录列表：按学生筛选并按选课时间倒序
+            models.Index(fields=['student', '-created_at'], name='sc_student_created_idx'),
+        ]
 
     def __str__(self):
         return f'{self.student.username} - {self.course.name}'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录读出时的状态，保存时据此判断是否需要更新课表位图
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_selections([self.student_id])
+        previous = getattr(self, '_loaded_status', None)
+        if previous != self.status and 'approved' in (previous, self.status):
+            if self.status == 'approved':
+                StudentSchedule.objects.occupy(self.student_id, self.course.schedule_mask)
+            else:
+                StudentSchedule.objects.rebuild([self.student_id])
+        self._loaded_status = self.status
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_selections([self.student_id])
+        if self.status == 'approved':
+            StudentSchedule.objects.rebuild([self.student_id])
+        return result
+
+class StudentScheduleManager(models.Manager):
+    """学生课表位图管理器"""
+
+    def mask_for(self, student) -> int:
+        """学生已通过课程的合并位图（按主键读取一行；尚未生成时现场重建）"""
+        occupancy = self.filter(pk=student.pk).values_list('occupancy', flat=True).first()
+        if occupancy is None:
+            return self.rebuild([student.pk]).get(student.pk, 0)
+        return decode_mask(occupancy)
+
+    def occupy(self, student_id, mask):
+        """把新通过课程的位图并入学生课表（行锁下读改写，并发审核不会丢失更新）"""
+        with transaction.atomic():
+            schedule = self.select_for_update().filter(pk=student_id).first()
+            if schedule is None:
+                self.rebuild([student_id])
+                return
+            schedule.occupancy = encode_mask(schedule.mask | mask)
+            schedule.save(update_fields=['occupancy', 'updated_at'])
+
+    def rebuild(self, student_ids=None) -> dict:
+        """
+        按已通过的选课重建课表位图
+        student_ids 为 None 时重建全部学生（先清空再写入）；
+        退课、撤销通过时按学生重建，避免与其他课程重叠的位被误清除
+        返回值: {学生 id: 位图}
+        """
+        selections = StudentCourse.objects.filter(status='approved').order_by()
+        if student_ids is None:
+            masks = {}
+        else:
+            masks = dict.fromkeys(student_ids, 0)
+            if not masks:
+                return masks
+            selections = selections.filter(student_id__in=list(masks))
+        rows = selections.values_list('student_id', 'course__time_slot')
+        for student_id, time_slot in rows.iterator(chunk_size=2000):
+            masks[student_id] = masks.get(student_id, 0) | compile_time_slot(time_slot)
+
+        with transaction.atomic():
+            if student_ids is None:
+                self.all().delete()
+            self.bulk_create(
+                [
+                    self.model(student_id=student_id, occupancy=encode_mask(mask))
+                    for student_id, mask in masks.items()
+                ],
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['student'],
+                update_fields=['occupancy', 'updated_at'],
+            )
+        return masks
+
+class StudentSchedule(models.Model):
+    """
+    学生课表位图（已通过的选课占用的周次×星期×节次，见 schedule.compile_time_slot）
+    选课冲突检测只需读取这一行与候选课程按位与；审核通过时并入，退课、拒绝时重建
+    """
+    student = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='schedule',
+        verbose_name='学生'
+    )
+    occupancy = models.BinaryField(default=b'', verbose_name='占用位图')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    objects = StudentScheduleManager()
+
+    class Meta:
+        verbose_name = '学生课表'
+        verbose_name_plural = verbose_name
+
+    def __str__(self):
+        return f'{self.student_id}: {self.mask.bit_count()} 节'
+
+    @property
+    def mask(self) -> int:
+        return decode_mask(self.occupancy)
+
+class ImportJob(models.Model):
+    """课程导入任务"""
+    STATUS_CHOICES = (
+        ('pending', '等待中'),
+        ('running', '导入中'),
+        ('succeeded', '已完成'),
+        ('failed', '失败'),
+    )
+    file = models.FileField(upload_to='imports/%Y%m%d/', verbose_name='导入文件')
+    filename = models.CharField(max_length=255, verbose_name='原始文件名')
+    file_type = models.CharField(max_length=10, verbose_name='文件类型')
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='任务状态'
+    )
+    created_by = models.ForeignKey(
+        User, null=True, blank=True, on_delete=models.SET_NULL, verbose_name='创建人'
+    )
+    row_count = models.IntegerField(default=0, verbose_name='已处理行数')
+    created_count = models.IntegerField(default=0, verbose_name='新建课程数')
+    updated_count = models.IntegerField(default=0, verbose_name='更新课程数')
+    skipped_count = models.IntegerField(default=0, verbose_name='跳过行数')
+    errors = models.JSONField(default=list, blank=True, verbose_name='错误信息')
+    detail = models.TextField(blank=True, verbose_name='失败原因')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='开始时间')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='结束时间')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+
+    class Meta:
+        verbose_name = '导入任务'
+        verbose_name_plural = verbose_name
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.filename} ({self.get_status_display()})'
+
+    @property
+    def elapsed(self):
+        """已耗时（秒）"""
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or timezone.now()
+        return (end - self.started_at).total_seconds()
+
+    @property
+    def throughput(self):
+        """导入速度（行/秒）"""
+        elapsed = self.elapsed
+        return round(self.row_count / elapsed, 1) if elapsed else 0.0
@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CourseCursorPagination(CursorPagination):
+    """
+    课程列表游标分页
+    以主键倒序作为游标，翻页只需一次索引范围查询，耗时不随课程总数增长
+    """
+
+    ordering = "-id"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
@@ -0,0 +1,222 @@
+import heapq
+import itertools
+import time
+from functools import lru_cache
+
+from django.conf import settings
+
+from .schedule import (
+    DAY_BITS,
+    DAYS_PER_WEEK,
+    MAX_WEEKS,
+    PERIODS_PER_DAY,
+    WEEK_BITS,
+    WEEKS_ALL,
+    Meeting,
+    meeting_mask,
+)
+
+# 上午的节次（第 1-4 节，8:00-11:40）
+MORNING_PERIODS = (1, 4)
+DAY_MASK = (1 << PERIODS_PER_DAY) - 1
+WEEK_MASK = (1 << WEEK_BITS) - 1
+# 每隔多少个搜索节点检查一次时间预算
+CHECK_EVERY = 256
+
+
+def slots_mask(days, start_period: int, end_period: int) -> int:
+    """指定星期、节次在全部教学周的位图"""
+    return sum(
+        meeting_mask(Meeting(day, start_period, end_period, 1, MAX_WEEKS, WEEKS_ALL))
+        for day in days
+    )
+
+
+def weekly_footprint(mask: int) -> int:
+    """把各周的位段按位或到一周内：任一周在该星期、节次上课即为 1（对折 5 次覆盖 32 周）"""
+    for weeks in (16, 8, 4, 2, 1):
+        mask |= mask >> (weeks * WEEK_BITS)
+    return mask & WEEK_MASK
+
+
+def day_stats(mask: int):
+    """返回 (上课天数, 各天空闲节数之和, 单日最多空闲节数)，空闲节数为当天首末两节课之间没课的节数"""
+    return footprint_stats(weekly_footprint(mask))
+
+
+@lru_cache(maxsize=65536)
+def footprint_stats(footprint: int):
+    days = total = worst = 0
+    for day in range(DAYS_PER_WEEK):
+        periods = (footprint >> (day * DAY_BITS)) & DAY_MASK
+        if not periods:
+            continue
+        first = (periods & -periods).bit_length()
+        gaps = periods.bit_length() - first + 1 - periods.bit_count()
+        days += 1
+        total += gaps
+        worst = max(worst, gaps)
+    return days, total, worst
+
+
+class SectionGroup:
+    """
+    一组须一起选的教学班（基础教学班及其配套教学班，见 models.section_group）
+    位图为各教学班位图之和；组内教学班彼此冲突时 overlapping 为 True，该组不可选
+    """
+
+    def __init__(self, sections):
+        self.sections = sections
+        self.schedule_mask = 0
+        self.overlapping = False
+        for section in sections:
+            self.overlapping |= bool(self.schedule_mask & section.schedule_mask)
+            self.schedule_mask |= section.schedule_mask
+
+
+class Option:
+    """一门课程的一个可选时间：上课时间相同的教学班（组）合并为一个选项"""
+
+    def __init__(self, mask, sections):
+        self.mask = mask
+        self.sections = sections
+
+
+class TimetablePlanner:
+    """
+    排课方案搜索
+    每门课程的可选项（教学班或须一起选的教学班组）按课表位图分组（上课时间相同的只搜索一次），先按偏好过滤，
+    再按可选项从少到多的顺序回溯：
+    - 与已占用时间冲突的选项直接跳过；
+    - 前向检查：选定后若某门剩余课程已无不冲突的选项，立即回退；
+    - 记忆化：(搜索深度, 已占用位图) 下无解的状态记录下来，换一条路径到达时不再展开。
+    按 (空闲节数, 上课天数) 保留最好的 limit 个方案；超过时间预算时返回已找到的方案
+    """
+
+    def __init__(self, limit: int = 5, budget: float = None):
+        self.limit = limit
+        self.budget = (
+            budget
+            if budget is not None
+            else getattr(settings, "COURSE_PLANNER_BUDGET", 0.05)
+        )
+
+    def plan(
+        self,
+        groups,
+        occupied: int = 0,
+        no_mornings: bool = False,
+        free_days=(),
+        max_gaps: int = None,
+    ) -> dict:
+        """
+        groups: {课程号: [可选项...]}，可选项为教学班或 SectionGroup，需要有 schedule_mask
+        occupied: 已占用的课表位图（学生已通过的课程）
+        返回值: {"plans", "unavailable", "complete", "explored", "elapsed_ms"}，
+        plans 中每个方案为 {"gaps", "days", "choices": {课程号: [上课时间相同的可选项...]}}
+        """
+        self.started = time.monotonic()
+        self.deadline = self.started + self.budget
+        self.max_gaps = max_gaps
+        self.nodes = 0
+        self.timed_out = False
+        self.dead = set()
+        self.best = []
+        self.sequence = itertools.count()
+
+        excluded = occupied
+        if no_mornings:
+            excluded |= slots_mask(range(1, DAYS_PER_WEEK + 1), *MORNING_PERIODS)
+        if free_days:
+            excluded |= slots_mask(free_days, 1, PERIODS_PER_DAY)
+
+        codes, unavailable = [], []
+        self.options = []
+        for code, sections in groups.items():
+            masks = {}
+            for section in sections:
+                if not section.schedule_mask & excluded:
+                    masks.setdefault(section.schedule_mask, []).append(section)
+            if not masks:
+                unavailable.append(code)
+                continue
+            # 占用天数少、节次少的选项排在前面，先找到较紧凑的方案
+            options = sorted(
+                (Option(mask, sections) for mask, sections in masks.items()),
+                key=lambda option: (
+                    day_stats(option.mask)[0],
+                    option.mask.bit_count(),
+                ),
+            )
+            codes.append(code)
+            self.options.append(options)
+
+        if not unavailable:
+            # 可选项最少的课程先搜索，尽早发现冲突
+            order = sorted(range(len(codes)), key=lambda i: len(self.options[i]))
+            codes = [codes[i] for i in order]
+            self.options = [self.options[i] for i in order]
+            self.search(0, occupied, [])
+
+        plans = []
+        for entry in sorted(self.best, key=lambda entry: entry[:3], reverse=True):
+            chosen = dict(zip(codes, entry[3]))
+            plans.append(
+                {
+                    "gaps": -entry[0],
+                    "days": -entry[1],
+                    # 按提交的课程顺序输出
+                    "choices": {code: chosen[code] for code in groups},
+                }
+            )
+        return {
+            "plans": plans,
+            "unavailable": unavailable,
+            "complete": not self.timed_out,
+            "explored": self.nodes,
+            "elapsed_ms": round((time.monotonic() - self.started) * 1000, 2),
+        }
+
+    def expired(self) -> bool:
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0 and time.monotonic() >= self.deadline:
+            self.timed_out = True
+        return self.timed_out
+
+    def search(self, depth, occupied, chosen) -> bool:
+        """展开第 depth 门课程，返回该状态下是否存在满足条件的方案"""
+        if depth == len(self.options):
+            return self.collect(occupied, chosen)
+        key = (depth, occupied)
+        if key in self.dead or self.expired():
+            return False
+
+        found = False
+        remaining = self.options[depth + 1 :]
+        for option in self.options[depth]:
+            if option.mask & occupied:
+                continue
+            merged = occupied | option.mask
+            if any(all(other.mask & merged for other in rest) for rest in remaining):
+                continue
+            chosen.append(option.sections)
+            found = self.search(depth + 1, merged, chosen) or found
+            chosen.pop()
+            if self.timed_out:
+                return found
+        if not found:
+            self.dead.add(key)
+        return found
+
+    def collect(self, occupied, chosen) -> bool:
+        """记录一个完整方案，按 (空闲节数, 上课天数) 保留最好的 limit 个"""
+        days, gaps, worst = day_stats(occupied)
+        if self.max_gaps is not None and worst > self.max_gaps:
+            return False
+        # 小顶堆中保存取反后的评分，堆顶即当前最差的方案
+        entry = (-gaps, -days, -next(self.sequence), list(chosen))
+        if len(self.best) < self.limit:
+            heapq.heappush(self.best, entry)
+        elif entry[:3] > self.best[0][:3]:
+            heapq.heapreplace(self.best, entry)
+        return True
@@ -0,0 +1,211 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# 课表位图布局：第 w 周、星期 d、第 p 节 对应的位序号为
+#   (w - 1) * WEEK_BITS + (d - 1) * DAY_BITS + (p - 1)
+# 两门课程冲突当且仅当两者位图按位与不为 0
+MAX_WEEKS = 20
+DAYS_PER_WEEK = 7
+PERIODS_PER_DAY = 14
+DAY_BITS = PERIODS_PER_DAY
+WEEK_BITS = DAYS_PER_WEEK * DAY_BITS
+WEEK_MASK = (1 << WEEK_BITS) - 1
+
+# 未标注上课周时默认的教学周
+DEFAULT_WEEKS = (1, 16)
+
+# 单双周：每周上课、只在单周上课、只在双周上课
+WEEKS_ALL, WEEKS_ODD, WEEKS_EVEN = 0, 1, 2
+PARITY_MAP = {"": WEEKS_ALL, "单": WEEKS_ODD, "双": WEEKS_EVEN}
+
+DAY_MAP = {"一": 1, "二": 2, "三": 3, "四": 4, "五": 5, "六": 6, "日": 7, "天": 7}
+DAY_NAMES = {value: key for key, value in DAY_MAP.items() if key != "天"}
+
+# 兼容 "周一 1-2节"、"周四第4-5节"、"星期四第4-5节{1-16周}"、"{1-15周(单)}" 等写法
+SLOT_PATTERN = re.compile(
+    r"(?:周|星期)([一二三四五六日天])\s*第?\s*(\d+)\s*-\s*(\d+)\s*节"
+    r"(?:\s*\{\s*(\d+)\s*-\s*(\d+)\s*周\s*(?:\((单|双)\))?\s*\})?"
+)
+
+
+class Meeting(NamedTuple):
+    """一个上课时段，字段与 CourseMeeting 的列一一对应"""
+
+    weekday: int
+    start_period: int
+    end_period: int
+    start_week: int
+    end_week: int
+    week_parity: int
+
+    def in_week(self, week: int) -> bool:
+        """第 week 周是否上课"""
+        if not self.start_week <= week <= self.end_week:
+            return False
+        if self.week_parity == WEEKS_ODD:
+            return week % 2 == 1
+        if self.week_parity == WEEKS_EVEN:
+            return week % 2 == 0
+        return True
+
+
+@lru_cache(maxsize=None)
+def _week_repeat(start_week: int, end_week: int, parity: int) -> int:
+    """
+    生成周重复因子：把单周位图乘以该因子即可铺满指定的教学周
+    （各周位段互不重叠，乘法等价于逐周移位后按位或）
+    """
+    repeat = 0
+    for week in range(max(1, start_week), min(MAX_WEEKS, end_week) + 1):
+        if parity == WEEKS_ODD and week % 2 == 0:
+            continue
+        if parity == WEEKS_EVEN and week % 2 == 1:
+            continue
+        repeat |= 1 << ((week - 1) * WEEK_BITS)
+    return repeat
+
+
+@lru_cache(maxsize=8192)
+def parse_meetings(time_slot: str) -> Tuple[Meeting, ...]:
+    """
+    把上课时间字符串解析为上课时段列表，同一时段只保留一次
+    未标注上课周时按 DEFAULT_WEEKS 每周上课
+    """
+    meetings = []
+    for match in SLOT_PATTERN.finditer(time_slot or ""):
+        if match.group(4):
+            weeks = (int(match.group(4)), int(match.group(5)))
+        else:
+            weeks = DEFAULT_WEEKS
+        meeting = Meeting(
+            DAY_MAP[match.group(1)],
+            int(match.group(2)),
+            int(match.group(3)),
+            *weeks,
+            PARITY_MAP[match.group(6) or ""],
+        )
+        if meeting.start_period <= meeting.end_period and meeting not in meetings:
+            meetings.append(meeting)
+    return tuple(meetings)
+
+
+def meeting_mask(meeting: Meeting) -> int:
+    """一个上课时段的课表位图，超出位图范围的节次和周次被截断"""
+    start = max(1, meeting.start_period)
+    end = min(PERIODS_PER_DAY, meeting.end_period)
+    if start > end:
+        return 0
+    periods = ((1 << (end - start + 1)) - 1) << (start - 1)
+    repeat = _week_repeat(meeting.start_week, meeting.end_week, meeting.week_parity)
+    return (periods << ((meeting.weekday - 1) * DAY_BITS)) * repeat
+
+
+@lru_cache(maxsize=8192)
+def compile_time_slot(time_slot: str) -> int:
+    """
+    把上课时间字符串编译为课表位图，结果按字符串缓存
+    无法识别的时间（如 "待定"）编译为 0，不与任何课程冲突
+    """
+    return combine(meeting_mask(meeting) for meeting in parse_meetings(time_slot))
+
+
+def combine(masks: Iterable[int]) -> int:
+    """合并多门课程的位图"""
+    combined = 0
+    for mask in masks:
+        combined |= mask
+    return combined
+
+
+def encode_mask(mask: int) -> bytes:
+    """位图转为字节串（小端序，便于存入数据库）"""
+    return mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+
+
+def decode_mask(data) -> int:
+    """字节串还原为位图"""
+    return int.from_bytes(bytes(data or b""), "little")
+
+
+def describe(mask: int) -> str:
+    """描述位图中最早的一个上课时间，例如：第1周 周一 第1节"""
+    if not mask:
+        return ""
+    index = (mask & -mask).bit_length() - 1
+    week, rest = divmod(index, WEEK_BITS)
+    day, period = divmod(rest, DAY_BITS)
+    return f"第{week + 1}周 周{DAY_NAMES[day + 1]} 第{period + 1}节"
+
+
+@lru_cache(maxsize=8192)
+def weekly_slots(mask: int) -> Tuple[int, ...]:
+    """
+    位图占用的 (星期, 节次)：各周位段按位或折叠为一周后为 1 的位序号
+    (d - 1) * DAY_BITS + (p - 1)，结果按位图缓存（课程位图由 compile_time_slot 缓存，取值有限）
+    """
+    weekly = 0
+    while mask:
+        weekly |= mask & WEEK_MASK
+        mask >>= WEEK_BITS
+    slots = []
+    while weekly:
+        low = weekly & -weekly
+        slots.append(low.bit_length() - 1)
+        weekly ^= low
+    return tuple(slots)
+
+
+class ConflictIndex:
+    """
+    课表冲突索引：按 (星期, 节次) 分桶的上课时段索引
+    每门课程的位图折叠为一周后，登记到它占用的每个 (星期, 节次) 桶中；
+    候选课程先与合并位图按位与，不冲突时无需查找，冲突时只取出与它占用同一节次的课程，
+    再按完整位图确认（区分周次和单双周）。
+    查找的代价与候选课程的节次数和同一节次上的课程数有关，与索引中的课程总数无关
+    """
+
+    def __init__(self, courses: Iterable = ()):
+        self.entries: List[Tuple[object, int]] = []
+        # (星期, 节次) 的位序号 -> 占用该节次的课程在 entries 中的下标
+        self.slots: Dict[int, List[int]] = {}
+        self.combined = 0
+        for course in courses:
+            self.add(course)
+
+    def add(self, course, mask: Optional[int] = None):
+        """加入一门课程，mask 默认取 course.schedule_mask"""
+        mask = course.schedule_mask if mask is None else mask
+        position = len(self.entries)
+        self.entries.append((course, mask))
+        self.combined |= mask
+        for slot in weekly_slots(mask):
+            self.slots.setdefault(slot, []).append(position)
+
+    def conflicts(self, mask: int, exclude=None) -> List[Tuple[object, int]]:
+        """
+        与位图冲突的全部课程（exclude 课程本身除外）
+        返回值: [(冲突课程, 重叠位图)...]，按加入顺序
+        """
+        if not mask & self.combined:
+            return []
+        # 只在候选课程占用的节次中查找
+        positions = set()
+        for slot in weekly_slots(mask):
+            positions.update(self.slots.get(slot, ()))
+        found = []
+        for position in sorted(positions):
+            course, other = self.entries[position]
+            if mask & other and course != exclude:
+                found.append((course, mask & other))
+        return found
+
+    def check(self, candidates: Iterable) -> Dict[object, list]:
+        """
+        批量检查候选课程，返回 {候选课程: [(冲突课程, 重叠位图)...]}，不冲突的课程对应空列表
+        候选课程已在索引中时不与自身比较，因此也可用于检查一组候选课程之间的冲突
+        """
+        return {
+            course: self.conflicts(course.schedule_mask, exclude=course)
+            for course in candidates
+        }
@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from rest_framework.renderers import BaseRenderer
+
+from .models import Course, SeatChange
+
+_latest = {"version": None, "checked_at": 0.0}
+_latest_lock = threading.Lock()
+
+
+def seat_feed(since=None) -> dict:
+    """
+    课程余量增量
+    返回 {"version", "reset", "seats": [[id, selected_count, capacity], ...], "removed"}
+    since 为空、早于已清理的记录或大于当前版本时 reset 为 True，seats 为全部课程；
+    否则只包含 since 之后名额或容量有变化的课程。
+    seats 中是当前的绝对值，重复下发同一课程不会出错
+    """
+    oldest, latest = SeatChange.objects.bounds()
+    latest = latest or 0
+    payload = {"version": latest, "reset": False, "seats": [], "removed": []}
+    courses = Course.objects.order_by().values_list("id", "selected_count", "capacity")
+
+    if since is None or since > latest or (oldest and since < oldest - 1):
+        payload["reset"] = True
+        payload["seats"] = [list(row) for row in courses]
+        return payload
+    if since == latest:
+        return payload
+
+    changed = set(
+        SeatChange.objects.filter(pk__gt=since, pk__lte=latest).values_list(
+            "course_id", flat=True
+        )
+    )
+    payload["seats"] = [list(row) for row in courses.filter(pk__in=changed)]
+    payload["removed"] = sorted(changed - {row[0] for row in payload["seats"]})
+    return payload
+
+
+def latest_seat_version(max_age: float) -> int:
+    """最新版本号；同一进程内的订阅连接共享查询结果，max_age 秒内不重复查询"""
+    with _latest_lock:
+        now = time.monotonic()
+        if _latest["version"] is None or now - _latest["checked_at"] >= max_age:
+            _latest["version"] = SeatChange.objects.bounds()[1] or 0
+            _latest["checked_at"] = now
+        return _latest["version"]
+
+
+def format_event(payload: dict) -> str:
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {payload['version']}\nevent: seats\ndata: {data}\n\n"
+
+
+def release_connection():
+    """关闭本线程的数据库连接（使用连接池时归还），推送连接等待期间不占用数据库连接"""
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+def stream_seat_feed(since=None):
+    """
+    Server-Sent Events 生成器：先发送一次增量（或全量），之后有变化时推送增量
+    连接保持 COURSE_SEAT_STREAM_TIMEOUT 秒后关闭，客户端按 retry 间隔自动重连，凭 Last-Event-ID 续传。
+    WSGI 部署时每个推送连接在此期间占用一个工作线程，因此超时较短；每次查询后即关闭数据库连接
+    """
+    interval = getattr(settings, "COURSE_SEAT_STREAM_INTERVAL", 1.0)
+    timeout = getattr(settings, "COURSE_SEAT_STREAM_TIMEOUT", 20)
+    heartbeat = getattr(settings, "COURSE_SEAT_STREAM_HEARTBEAT", 15)
+    deadline = time.monotonic() + timeout
+
+    payload = seat_feed(since)
+    release_connection()
+    version = payload["version"]
+    yield f"retry: {int(interval * 1000)}\n" + format_event(payload)
+    last_sent = time.monotonic()
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        changed = latest_seat_version(interval) != version
+        if changed:
+            payload = seat_feed(version)
+            version = payload["version"]
+        release_connection()
+        if changed:
+            yield format_event(payload)
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= heartbeat:
+            # 注释行作为心跳，防止代理断开空闲连接
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
+
+
+class EventStreamRenderer(BaseRenderer):
+    """text/event-stream 渲染器（只用于内容协商，错误信息按 JSON 输出）"""
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
@@ -1,14 +1,39 @@
 from rest_framework import serializers
-from .models import Course, StudentCourse
+from apps.monitoring.serializers import TimedListSerializer, TimedSerializerMixin
+from .jobs import get_progress
+from .models import Course, ImportJob, StudentCourse
 
-class CourseSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    稀疏字段集：序列化器接收 fields 参数，只输出指定的字段
+    例如 CourseSerializer(courses, many=True, fields=['id', 'name'])
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class CourseSerializer(TimedSerializerMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """课程序列化器"""
     class Meta:
         model = Course
+        list_serializer_class = TimedListSerializer
         fields = '__all__'
         read_only_fields = ('selected_count', 'created_at', 'updated_at')
+        # 不填写教学班时取课程代码（见 Course.save）
+        extra_kwargs = {'section_code': {'required': False}}
 
-class StudentCourseSerializer(serializers.ModelSerializer):
+    def update(self, instance, validated_data):
+        """只写回被修改的列，避免用旧的已选人数覆盖并发选课的结果"""
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data.keys(), 'updated_at'])
+        return instance
+
+class StudentCourseSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """选课关系序列化器"""
     course_name = serializers.CharField(source='course.name', read_only=True)
     teacher = serializers.CharField(source='course.teacher', read_only=True)
@@ -17,6 +42,91 @@ class StudentCourseSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = StudentCourse
+        list_serializer_class = TimedListSerializer
         fields = ('id', 'course', 'course_name', 'teacher', 'time_slot', 
                  'classroom', 'status', 'created_at', 'updated_at')
         read_only_fields = ('status', 'created_at', 'updated_at')
+
+class CourseBatchSerializer(serializers.Serializer):
+    """批量选课、退课请求"""
+    MAX_COURSES = 30
+
+    add = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list,
+        max_length=MAX_COURSES,
+    )
+    drop = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list,
+        max_length=MAX_COURSES,
+    )
+
+    def validate(self, attrs):
+        # 去重并保持提交顺序
+        add = list(dict.fromkeys(attrs['add']))
+        drop = list(dict.fromkeys(attrs['drop']))
+        if not add and not drop:
+            raise serializers.ValidationError('请至少提交一门要选或要退的课程')
+        both = set(add) & set(drop)
+        if both:
+            raise serializers.ValidationError(
+                f'同一课程不能同时选课和退课：{", ".join(map(str, sorted(both)))}'
+            )
+        return {'add': add, 'drop': drop}
+
+class CourseConflictSerializer(serializers.Serializer):
+    """批量冲突检查请求"""
+    MAX_COURSES = 200
+
+    courses = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False,
+        max_length=MAX_COURSES,
+    )
+
+    def validate_courses(self, value):
+        # 去重并保持提交顺序
+        return list(dict.fromkeys(value))
+
+class TimetablePlanSerializer(serializers.Serializer):
+    """排课方案请求"""
+    MAX_COURSES = 15
+
+    courses = serializers.ListField(
+        child=serializers.CharField(max_length=20), allow_empty=False,
+        max_length=MAX_COURSES, help_text='课程号列表'
+    )
+    no_mornings = serializers.BooleanField(default=False, help_text='上午（第 1-4 节）不排课')
+    free_days = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=7), required=False,
+        default=list, help_text='不排课的星期'
+    )
+    max_gaps = serializers.IntegerField(
+        min_value=0, required=False, allow_null=True, default=None,
+        help_text='单日两节课之间最多空闲的节数'
+    )
+    include_full = serializers.BooleanField(default=False, help_text='包含已满的教学班')
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=5)
+
+    def validate_courses(self, value):
+        # 去重并保持提交顺序
+        return list(dict.fromkeys(code.strip() for code in value))
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    """导入任务序列化器"""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    elapsed = serializers.FloatField(read_only=True)
+    throughput = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ImportJob
+        fields = ('id', 'filename', 'file_type', 'status', 'status_display',
+                  'row_count', 'created_count', 'updated_count', 'skipped_count',
+                  'throughput', 'elapsed', 'errors', 'detail',
+                  'created_at', 'started_at', 'finished_at')
+        read_only_fields = fields
+
+    def to_representation(self, instance):
+        # 执行中的任务在事务提交前，计数取自缓存中的进度
+        if instance.status == 'running':
+            for name, value in (get_progress(instance.pk) or {}).items():
+                setattr(instance, name, value)
+        return super().to_representation(instance)
@@ -0,0 +1,920 @@
+import datetime
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from .admission import admission
+from .cache import get_cache
+from .importers import CourseImporter
+from .jobs import PROGRESS_KEY, run_job
+from .models import (
+    Course,
+    CourseMeeting,
+    CourseQuerySet,
+    ImportJob,
+    SeatChange,
+    StudentCourse,
+    StudentSchedule,
+    StudentScheduleManager,
+)
+from .schedule import ConflictIndex, compile_time_slot, encode_mask
+from .seats import seat_feed
+
+User = get_user_model()
+
+# 测试数据中的用户密码只需快速哈希（密码哈希本身的测试见 apps.users.tests）
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+def create_course(code, time_slot, section_code="", **fields):
+    return Course.objects.create(
+        name=f"课程{code}",
+        course_code=code,
+        section_code=section_code or code,
+        teacher="教师",
+        classroom="J1-101",
+        capacity=fields.pop("capacity", 10),
+        time_slot=time_slot,
+        **fields,
+    )
+
+
+@override_settings(COURSE_ADMISSION_QUEUE=False, PASSWORD_HASHERS=FAST_HASHERS)
+class CourseTestCase(APITestCase):
+    """选课接口测试基类（不经过排队，在请求线程中选课）"""
+
+    def setUp(self):
+        cache.clear()
+        get_cache().clear()
+        self.student = User.objects.create_user(
+            "student", password="password123", student_id="1"
+        )
+        self.admin = User.objects.create_user(
+            "admin", password="password123", student_id="2", is_staff=True
+        )
+        self.client.force_authenticate(self.student)
+
+    def select(self, course):
+        return self.client.post(f"/api/courses/courses/{course.pk}/select_course/")
+
+
+def import_row(code, **fields):
+    """导入器的一行数据（与解析器输出的键相同）"""
+    return {
+        "name": f"课程{code}",
+        "course_code": code,
+        "section_code": f"{code}-01",
+        "teacher": "教师",
+        "classroom": "J1-101",
+        "capacity": 30,
+        "selected_count": 0,
+        "time_slot": "周一第1-2节",
+        "credit": "2.0",
+        **fields,
+    }
+
+
+CSV_HEADER = (
+    "开课学院,课程名称,课程性质,教学班名称,课程号,学分,任课教师,"
+    "课堂容量,已选人数,上课时间,教学地点,起始结束周\n"
+)
+
+
+def csv_row(code, capacity="30"):
+    return (
+        f"学院,课程{code},必修,(2024-2025-2)-{code}-01,{code},2.0,教师,"
+        f"{capacity},0,星期一第1-2节{{1-16周}},J1-101,1-16周\n"
+    )
+
+
+def run_concurrently(func, args_list):
+    """每组参数一个线程，同时开始执行 func，返回各线程的结果（抛出异常时为异常对象）"""
+    barrier = threading.Barrier(len(args_list))
+    results = [None] * len(args_list)
+
+    def run(index, args):
+        try:
+            barrier.wait()
+            results[index] = func(*args)
+        except Exception as e:
+            results[index] = e
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=run, args=(index, args))
+        for index, args in enumerate(args_list)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class SeatReservationTests(TransactionTestCase):
+    """名额占用：并发选课不超卖，退课恰好释放一个名额"""
+
+    def setUp(self):
+        cache.clear()
+        self.course = create_course("C1", "周一第1-2节", capacity=5)
+        self.students = [
+            User.objects.create_user(f"student{index}", student_id=str(index))
+            for index in range(20)
+        ]
+
+    def selected_count(self):
+        return Course.objects.get(pk=self.course.pk).selected_count
+
+    def test_concurrent_enroll_within_capacity(self):
+        results = run_concurrently(
+            StudentCourse.objects.enroll,
+            [(student, self.course) for student in self.students],
+        )
+        self.assertEqual([r for r in results if isinstance(r, Exception)], [])
+        self.assertEqual(sum(r is not None for r in results), 5)
+        self.assertEqual(self.selected_count(), 5)
+        self.assertEqual(StudentCourse.objects.filter(course=self.course).count(), 5)
+
+    def test_duplicate_enroll_keeps_seat(self):
+        student = self.students[0]
+        StudentCourse.objects.enroll(student, self.course)
+        with self.assertRaises(IntegrityError):
+            StudentCourse.objects.enroll(student, self.course)
+        self.assertEqual(self.selected_count(), 1)
+
+    def test_withdraw_releases_one_seat(self):
+        first, second = self.students[:2]
+        StudentCourse.objects.enroll(first, self.course)
+        StudentCourse.objects.enroll(second, self.course)
+
+        results = run_concurrently(
+            StudentCourse.objects.withdraw, [(first, self.course)] * 4
+        )
+        self.assertEqual(sorted(results), [False, False, False, True])
+        self.assertEqual(self.selected_count(), 1)
+        self.assertFalse(StudentCourse.objects.withdraw(first, self.course))
+        self.assertEqual(self.selected_count(), 1)
+
+
+@override_settings(COURSE_ADMISSION_QUEUE=False)
+class DeletedStudentTests(APITransactionTestCase):
+    """用户已被删除而令牌仍有效（吊销尚未生效）时，选课不能报告为重复选课"""
+
+    def setUp(self):
+        cache.clear()
+        self.course = create_course("C1", "周一第1-2节")
+        self.student = User.objects.create_user("student", student_id="1")
+        self.client.force_authenticate(self.student)
+        User.objects.filter(pk=self.student.pk).delete()
+
+    def test_select_reports_deleted_user(self):
+        response = self.client.post(
+            f"/api/courses/courses/{self.course.pk}/select_course/"
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"detail": "用户不存在"})
+        self.assertEqual(Course.objects.get(pk=self.course.pk).selected_count, 0)
+        self.assertFalse(StudentCourse.objects.exists())
+
+    def test_enroll_reports_deleted_user(self):
+        # 用户在读取课表位图之后才被删除：选课记录的外键约束失败
+        with mock.patch.object(StudentScheduleManager, "mask_for", return_value=0):
+            response = self.client.post(
+                f"/api/courses/courses/{self.course.pk}/select_course/"
+            )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(Course.objects.get(pk=self.course.pk).selected_count, 0)
+
+    def test_batch_reports_deleted_user(self):
+        response = self.client.post(
+            "/api/courses/courses/batch/",
+            {"add": [self.course.pk], "drop": []},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(Course.objects.get(pk=self.course.pk).selected_count, 0)
+
+
+class StudentScheduleTests(CourseTestCase):
+    """学生课表位图：审核通过时并入，拒绝、退课时重建，选课时只与位图比较"""
+
+    def approve(self, *courses):
+        for course in courses:
+            StudentCourse.objects.create(student=self.student, course=course)
+        return StudentCourse.objects.set_status(
+            StudentCourse.objects.filter(student=self.student, course__in=courses),
+            "approved",
+        )
+
+    def test_approval_occupies_schedule(self):
+        course = create_course("C1", "周一第1-2节")
+        selection = StudentCourse.objects.create(student=self.student, course=course)
+        self.assertEqual(StudentSchedule.objects.mask_for(self.student), 0)
+
+        selection.status = "approved"
+        selection.save()
+        self.assertEqual(
+            StudentSchedule.objects.mask_for(self.student), course.schedule_mask
+        )
+        response = self.select(create_course("C2", "周一第2-3节"))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [conflict["course"] for conflict in response.json()["conflicts"]],
+            [course.pk],
+        )
+        self.assertEqual(
+            self.select(create_course("C3", "周二第1-2节")).status_code, 200
+        )
+
+    def test_rejection_rebuilds_schedule(self):
+        monday = create_course("C1", "周一第1-2节")
+        wednesday = create_course("C2", "周三第1-2节")
+        self.assertEqual(self.approve(monday, wednesday), 2)
+        self.assertEqual(
+            StudentSchedule.objects.mask_for(self.student),
+            monday.schedule_mask | wednesday.schedule_mask,
+        )
+
+        StudentCourse.objects.set_status(
+            StudentCourse.objects.filter(course=monday), "rejected"
+        )
+        self.assertEqual(
+            StudentSchedule.objects.mask_for(self.student), wednesday.schedule_mask
+        )
+
+    def test_stale_schedule_repaired_on_select(self):
+        # 位图中有已不存在的课程，以选课记录为准修复后允许选课
+        StudentSchedule.objects.create(
+            student=self.student,
+            occupancy=encode_mask(compile_time_slot("周一第1-2节")),
+        )
+        self.assertEqual(
+            self.select(create_course("C1", "周一第1-2节")).status_code, 200
+        )
+        self.assertEqual(StudentSchedule.objects.mask_for(self.student), 0)
+
+    def test_rebuild_command(self):
+        course = create_course("C1", "周一第1-2节")
+        self.approve(course)
+        StudentSchedule.objects.filter(pk=self.student.pk).update(occupancy=b"")
+
+        call_command(
+            "rebuild_schedules", "--student", str(self.student.pk), stdout=StringIO()
+        )
+        self.assertEqual(
+            StudentSchedule.objects.mask_for(self.student), course.schedule_mask
+        )
+
+
+class Slot:
+    """只有上课时间的课程，供 ConflictIndex 使用"""
+
+    def __init__(self, time_slot):
+        self.time_slot = time_slot
+        self.schedule_mask = compile_time_slot(time_slot)
+
+    def __repr__(self):
+        return self.time_slot
+
+
+class ConflictIndexTests(SimpleTestCase):
+    """冲突索引：区分上课周和单双周，返回全部冲突课程"""
+
+    def test_disjoint_weeks_do_not_conflict(self):
+        index = ConflictIndex([Slot("周一第1-2节{1-8周}")])
+        self.assertEqual(index.conflicts(Slot("周一第1-2节{9-16周}").schedule_mask), [])
+        self.assertEqual(
+            len(index.conflicts(Slot("周一第2-3节{8-16周}").schedule_mask)), 1
+        )
+
+    def test_odd_and_even_weeks_do_not_conflict(self):
+        index = ConflictIndex([Slot("周三第3-4节{1-16周(单)}")])
+        self.assertEqual(
+            index.conflicts(Slot("周三第3-4节{1-16周(双)}").schedule_mask), []
+        )
+        self.assertEqual(
+            len(index.conflicts(Slot("周三第4-5节{1-16周}").schedule_mask)), 1
+        )
+
+    def test_all_conflicts_in_insertion_order(self):
+        courses = [
+            Slot("周二第3-4节"),
+            Slot("周一第1-2节"),
+            Slot("周一第5-6节"),
+            Slot("周一第2-3节{1-8周}"),
+        ]
+        index = ConflictIndex(courses)
+        candidate = Slot("周一第2-5节")
+        found = index.conflicts(candidate.schedule_mask)
+        self.assertEqual([course for course, _ in found], courses[1:])
+        self.assertEqual(
+            found[1][1], candidate.schedule_mask & courses[2].schedule_mask
+        )
+
+    def test_check_candidates_against_each_other(self):
+        first, second, third = (
+            Slot("周一第1-2节"),
+            Slot("周一第2-3节"),
+            Slot("周五第1-2节"),
+        )
+        results = ConflictIndex([first, second, third]).check([first, second, third])
+        self.assertEqual([course for course, _ in results[first]], [second])
+        self.assertEqual([course for course, _ in results[second]], [first])
+        self.assertEqual(results[third], [])
+
+
+class CourseImporterTests(CourseTestCase):
+    """批量导入：按教学班新建、更新、跳过，查询次数与行数无关"""
+
+    def test_reimport_is_idempotent(self):
+        importer = CourseImporter(batch_size=5)
+        for size in (5, 50):
+            rows = [import_row(f"{size}-{index}") for index in range(size)]
+            self.assertEqual(importer.run(rows).created, size)
+            with CaptureQueriesContext(connection) as queries:
+                result = importer.run(rows)
+            self.assertEqual(
+                (result.created, result.updated, result.skipped), (0, 0, size)
+            )
+            if size == 5:
+                baseline = len(queries)
+        self.assertEqual(len(queries), baseline)
+        self.assertEqual(Course.objects.count(), 55)
+
+    def test_changed_rows_update_meetings_and_schedules(self):
+        CourseImporter().run([import_row("1"), import_row("2")])
+        course = Course.objects.get(section_code="1-01")
+        Course.objects.filter(pk=course.pk).update(selected_count=1)
+        StudentCourse.objects.create(
+            student=self.student, course=course, status="approved"
+        )
+        StudentSchedule.objects.rebuild([self.student.pk])
+
+        result = CourseImporter().run(
+            [import_row("1", time_slot="周三第3-4节", capacity=40), import_row("2")]
+        )
+        self.assertEqual((result.created, result.updated, result.skipped), (0, 1, 1))
+        course.refresh_from_db()
+        self.assertEqual((course.time_slot, course.capacity), ("周三第3-4节", 40))
+        # 已选人数由选课流程维护，导入不覆盖
+        self.assertEqual(course.selected_count, 1)
+        self.assertEqual(
+            list(course.meetings.values_list("weekday", "start_period", "end_period")),
+            [(3, 3, 4)],
+        )
+        self.assertEqual(
+            StudentSchedule.objects.mask_for(self.student),
+            compile_time_slot("周三第3-4节"),
+        )
+
+    def test_invalid_and_duplicate_rows_skipped(self):
+        result = CourseImporter().run(
+            [
+                import_row("1"),
+                import_row("1", name="重复的教学班"),
+                import_row("2", name=""),
+                import_row("3", capacity="abc"),
+            ]
+        )
+        self.assertEqual((result.rows, result.created, result.skipped), (4, 1, 3))
+        self.assertEqual(
+            result.errors, ["第3行: 缺少课程名称", "第4行: capacity 不是整数"]
+        )
+        self.assertEqual(Course.objects.get().name, "课程1")
+
+
+@override_settings(
+    COURSE_IMPORT_RUNNER="command",
+    COURSE_IMPORT_CHUNK_SIZE=2,
+    PASSWORD_HASHERS=FAST_HASHERS,
+)
+class ImportJobTests(APITransactionTestCase):
+    """导入任务：上传后由执行者抢占执行，失败时不写入任何课程（任务自行管理事务和数据库连接）"""
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        admin = User.objects.create_user(
+            "admin", password="password123", student_id="2", is_staff=True
+        )
+        self.client.force_authenticate(admin)
+
+    def upload(self, content):
+        response = self.client.post(
+            "/api/courses/courses/import_courses/",
+            {"file": ContentFile(content.encode(), name="courses.csv")},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 202)
+        return response.json()["job"]["id"]
+
+    def get_job(self, job_id):
+        response = self.client.get(f"/api/courses/imports/{job_id}/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_job_imports_all_chunks(self):
+        job_id = self.upload(CSV_HEADER + "".join(csv_row(i) for i in range(1, 6)))
+        self.assertEqual(self.get_job(job_id)["status"], "pending")
+
+        self.assertTrue(run_job(job_id))
+        job = self.get_job(job_id)
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual((job["row_count"], job["created_count"]), (5, 5))
+        self.assertEqual(Course.objects.count(), 5)
+        # 已执行的任务不会被再次抢占
+        self.assertFalse(run_job(job_id))
+
+    def test_bad_row_fails_job_without_partial_writes(self):
+        content = CSV_HEADER + csv_row(1) + csv_row(2) + csv_row(3, capacity="很多")
+        job_id = self.upload(content)
+
+        with self.assertLogs("apps.courses.jobs", "ERROR"):
+            self.assertTrue(run_job(job_id))
+        job = self.get_job(job_id)
+        self.assertEqual(job["status"], "failed")
+        self.assertIn("很多", job["detail"])
+        self.assertFalse(Course.objects.exists())
+        self.assertFalse(CourseMeeting.objects.exists())
+
+    def test_running_job_reports_cached_progress(self):
+        job = ImportJob.objects.create(
+            filename="courses.csv", file_type="csv", status="running"
+        )
+        cache.set(
+            PROGRESS_KEY.format(job.pk),
+            {
+                "row_count": 4,
+                "created_count": 3,
+                "updated_count": 0,
+                "skipped_count": 1,
+            },
+        )
+        payload = self.get_job(job.pk)
+        self.assertEqual(
+            (payload["row_count"], payload["created_count"], payload["skipped_count"]),
+            (4, 3, 1),
+        )
+
+
+class CatalogCacheTests(CourseTestCase):
+    """课程列表、详情按目录版本缓存：名额变化或修改课程后版本递增，ETag 随之变化"""
+
+    def setUp(self):
+        super().setUp()
+        self.course = create_course("C1", "周一第1-2节")
+
+    def get(self, path, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(path, **headers)
+
+    def test_unchanged_catalog_returns_304(self):
+        first = self.get("/api/courses/courses/")
+        self.assertEqual((first.status_code, first["X-Cache"]), (200, "MISS"))
+        second = self.get("/api/courses/courses/")
+        self.assertEqual((second["X-Cache"], second["ETag"]), ("HIT", first["ETag"]))
+
+        response = self.get("/api/courses/courses/", first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], first["ETag"])
+        # ETag 按请求区分，列表的 ETag 对详情无效
+        detail = self.get(f"/api/courses/courses/{self.course.pk}/", first["ETag"])
+        self.assertEqual(detail.status_code, 200)
+
+    def test_seat_change_bumps_version(self):
+        path = f"/api/courses/courses/{self.course.pk}/"
+        before = self.get(path)
+        self.assertEqual(before.json()["selected_count"], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.select(self.course).status_code, 200)
+
+        after = self.get(path, before["ETag"])
+        self.assertEqual((after.status_code, after["X-Cache"]), (200, "MISS"))
+        self.assertNotEqual(after["ETag"], before["ETag"])
+        self.assertEqual(after.json()["selected_count"], 1)
+        self.assertEqual(self.get(path, after["ETag"]).status_code, 304)
+
+    def test_course_edit_bumps_version(self):
+        before = self.get("/api/courses/courses/")
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f"/api/courses/courses/{self.course.pk}/",
+                {"name": "新课程名"},
+                format="multipart",
+            )
+        self.assertEqual(response.status_code, 200)
+
+        after = self.get("/api/courses/courses/", before["ETag"])
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after["ETag"], before["ETag"])
+        self.assertEqual(after.json()["results"][0]["name"], "新课程名")
+
+
+class SelectionDeltaTests(CourseTestCase):
+    """选课记录增量获取：since 的写法、退选的记录、课程信息修改"""
+
+    EPOCH = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+
+    def setUp(self):
+        super().setUp()
+        self.first = create_course("C1", "周一第1-2节")
+        self.second = create_course("C2", "周二第1-2节")
+        for course in (self.first, self.second):
+            StudentCourse.objects.enroll(self.student, course)
+        StudentCourse.objects.update(updated_at=self.EPOCH)
+        Course.objects.update(updated_at=self.EPOCH)
+        self.ids = list(
+            StudentCourse.objects.order_by("pk").values_list("pk", flat=True)
+        )
+
+    def delta(self, since):
+        return self.client.get("/api/courses/selections/", {"since": since})
+
+    def test_since_formats(self):
+        later = self.EPOCH + datetime.timedelta(hours=1)
+        responses = [
+            self.delta(str(later.timestamp())),
+            self.delta(later.isoformat()),
+            # 未编码的 "+" 在查询参数中解码为空格
+            self.client.get("/api/courses/selections/?since=2026-01-01T01:00:00+00:00"),
+            # 没有时区的时间按 UTC 处理
+            self.delta("2026-01-01T01:00:00"),
+        ]
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["results"], [])
+            self.assertEqual(sorted(response.json()["ids"]), self.ids)
+
+        response = self.delta(str(self.EPOCH.timestamp()))
+        self.assertEqual(len(response.json()["results"]), 2)
+        self.assertEqual(
+            datetime.datetime.fromisoformat(response.json()["timestamp"]), self.EPOCH
+        )
+        self.assertEqual(self.delta("yesterday").status_code, 400)
+
+    def test_dropped_selection_missing_from_ids(self):
+        since = str(self.EPOCH.timestamp() + 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/api/courses/courses/{self.first.pk}/drop_course/"
+            )
+        self.assertEqual(response.status_code, 204)
+        response = self.delta(since)
+        self.assertEqual(response.json()["ids"], self.ids[1:])
+        self.assertEqual(response.json()["results"], [])
+
+    def test_course_edit_in_delta(self):
+        since = str(self.EPOCH.timestamp() + 1)
+        self.assertEqual(self.delta(since).json()["results"], [])
+        self.second.teacher = "新教师"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.second.save(update_fields=["teacher"])
+
+        response = self.delta(since).json()
+        self.assertEqual(
+            [(item["course"], item["teacher"]) for item in response["results"]],
+            [(self.second.pk, "新教师")],
+        )
+        self.assertGreater(
+            datetime.datetime.fromisoformat(response["timestamp"]), self.EPOCH
+        )
+
+
+class SeatFeedTests(CourseTestCase):
+    """余量订阅：名额变化记录与名额更新在同一事务中写入，客户端按版本增量同步"""
+
+    def setUp(self):
+        super().setUp()
+        self.course = create_course("C1", "周一第1-2节", capacity=2)
+        self.other = create_course("C2", "周二第1-2节", capacity=3)
+
+    def test_snapshot_then_delta(self):
+        snapshot = seat_feed()
+        self.assertTrue(snapshot["reset"])
+        self.assertCountEqual(
+            snapshot["seats"], [[self.course.pk, 0, 2], [self.other.pk, 0, 3]]
+        )
+        version = snapshot["version"]
+        self.assertEqual(seat_feed(version)["seats"], [])
+
+        # 变化记录随选课一同写入，不依赖事务提交后的回调
+        self.assertEqual(self.select(self.course).status_code, 200)
+        delta = seat_feed(version)
+        self.assertFalse(delta["reset"])
+        self.assertGreater(delta["version"], version)
+        self.assertEqual(delta["seats"], [[self.course.pk, 1, 2]])
+
+        version, removed = delta["version"], self.other.pk
+        self.other.delete()
+        delta = seat_feed(version)
+        self.assertEqual((delta["seats"], delta["removed"]), ([], [removed]))
+
+    def test_rolled_back_change_not_recorded(self):
+        StudentCourse.objects.enroll(self.student, self.course)
+        version = seat_feed()["version"]
+        with self.assertRaises(IntegrityError):
+            StudentCourse.objects.enroll(self.student, self.course)
+        self.assertEqual(seat_feed(version)["seats"], [])
+        self.assertEqual(Course.objects.get(pk=self.course.pk).selected_count, 1)
+
+    def test_pruned_version_gets_snapshot(self):
+        version = seat_feed()["version"]
+        for student_id in range(3):
+            student = User.objects.create_user(
+                f"s{student_id}", student_id=f"s{student_id}"
+            )
+            StudentCourse.objects.enroll(student, self.other)
+        self.assertFalse(seat_feed(version)["reset"])
+
+        call_command("prune_seat_changes", "--keep", "1", stdout=StringIO())
+        self.assertEqual(SeatChange.objects.count(), 1)
+        feed = seat_feed(version)
+        self.assertTrue(feed["reset"])
+        self.assertCountEqual(
+            feed["seats"], [[self.course.pk, 0, 2], [self.other.pk, 3, 3]]
+        )
+        # 最新版本仍在保留范围内，增量同步不受影响
+        self.assertFalse(seat_feed(feed["version"])["reset"])
+
+    def test_since_validation(self):
+        response = self.client.get("/api/courses/courses/seats/", {"since": "-1"})
+        self.assertEqual(response.status_code, 400)
+        latest = seat_feed()["version"]
+        response = self.client.get(
+            "/api/courses/courses/seats/", {"since": str(latest + 100)}
+        )
+        self.assertTrue(response.json()["reset"])
+
+
+class BatchTests(CourseTestCase):
+    """批量选课、退课：任一课程失败时全部回滚"""
+
+    def batch(self, add=(), drop=()):
+        return self.client.post(
+            "/api/courses/courses/batch/",
+            {"add": list(add), "drop": list(drop)},
+            format="json",
+        )
+
+    def seats(self, *courses):
+        return [Course.objects.get(pk=course.pk).selected_count for course in courses]
+
+    def test_batch_commits_adds_and_drops(self):
+        kept, dropped = create_course("C1", "周一第1-2节"), create_course(
+            "C2", "周二第1-2节"
+        )
+        added = create_course("C3", "周二第1-2节")
+        self.assertEqual(self.batch(add=[kept.pk, dropped.pk]).status_code, 200)
+
+        # 退课释放的时段可以在同一批次中选入
+        response = self.batch(add=[added.pk], drop=[dropped.pk])
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual(
+            StudentCourse.objects.filter(student=self.student).values_list(
+                "course_id", flat=True
+            ),
+            [kept.pk, added.pk],
+        )
+        self.assertEqual(self.seats(kept, dropped, added), [1, 0, 1])
+
+    def test_full_course_rolls_back_drops_and_seats(self):
+        dropped = create_course("C1", "周一第1-2节")
+        available = create_course("C2", "周二第1-2节")
+        full = create_course("C3", "周三第1-2节", capacity=1)
+        StudentCourse.objects.enroll(self.student, dropped)
+        other = User.objects.create_user("other", student_id="3")
+        StudentCourse.objects.enroll(other, full)
+
+        response = self.batch(add=[available.pk, full.pk], drop=[dropped.pk])
+        self.assertEqual(response.status_code, 400)
+        details = {r["course"]: r["detail"] for r in response.json()["results"]}
+        self.assertEqual(details[full.pk], "课程已满")
+        self.assertTrue(
+            StudentCourse.objects.filter(student=self.student, course=dropped).exists()
+        )
+        self.assertFalse(
+            StudentCourse.objects.filter(
+                student=self.student, course=available
+            ).exists()
+        )
+        self.assertEqual(self.seats(dropped, available, full), [1, 0, 1])
+
+    def test_seat_taken_during_commit_rolls_back(self):
+        # 锁定课程后名额才被占满（PostgreSQL 上由并发事务造成），条件更新失败时已执行的退课和占座全部回滚
+        dropped = create_course("C1", "周一第1-2节")
+        available = create_course("C2", "周二第1-2节")
+        contested = create_course("C3", "周三第1-2节", capacity=1)
+        StudentCourse.objects.enroll(self.student, dropped)
+        reserve_seats = CourseQuerySet.reserve_seats
+
+        def take_last_seat(queryset, pks):
+            Course.objects.filter(pk=contested.pk).update(selected_count=1)
+            return reserve_seats(queryset, pks)
+
+        with mock.patch.object(CourseQuerySet, "reserve_seats", take_last_seat):
+            failed = StudentCourse.objects.change_batch(
+                self.student, [available.pk, contested.pk], [dropped.pk]
+            )
+        self.assertEqual(failed["full"], [available.pk, contested.pk])
+        self.assertEqual(
+            list(
+                StudentCourse.objects.filter(student=self.student).values_list(
+                    "course_id", flat=True
+                )
+            ),
+            [dropped.pk],
+        )
+        self.assertEqual(self.seats(dropped, available), [1, 0])
+
+
+class RescheduleTests(CourseTestCase):
+    """修改课程上课时间后，已通过该课程的学生按新时间检查冲突"""
+
+    def test_time_slot_change_rebuilds_schedule(self):
+        moved = create_course("C1", "周一第1-2节")
+        StudentCourse.objects.create(
+            student=self.student, course=moved, status="approved"
+        )
+        target = create_course("C2", "周三第3-4节")
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch(
+            f"/api/courses/courses/{moved.pk}/",
+            {"time_slot": "周三第3-4节"},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            StudentSchedule.objects.mask_for(self.student),
+            Course.objects.get(pk=moved.pk).schedule_mask,
+        )
+
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.select(target).status_code, 400)
+
+    def test_course_delete_rebuilds_schedule(self):
+        deleted = create_course("C1", "周一第1-2节")
+        StudentCourse.objects.create(
+            student=self.student, course=deleted, status="approved"
+        )
+        deleted.delete()
+        self.assertEqual(StudentSchedule.objects.mask_for(self.student), 0)
+        self.assertEqual(
+            self.select(create_course("C2", "周一第1-2节")).status_code, 200
+        )
+
+
+class WithdrawTests(CourseTestCase):
+    """退课按删除时的选课状态释放名额、更新课表位图"""
+
+    def test_withdraw_approved_selection(self):
+        course = create_course("C1", "周一第1-2节", selected_count=1)
+        StudentCourse.objects.create(
+            student=self.student, course=course, status="approved"
+        )
+        response = self.client.post(f"/api/courses/courses/{course.pk}/drop_course/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Course.objects.get(pk=course.pk).selected_count, 0)
+        self.assertEqual(StudentSchedule.objects.mask_for(self.student), 0)
+        response = self.client.post(f"/api/courses/courses/{course.pk}/drop_course/")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Course.objects.get(pk=course.pk).selected_count, 0)
+
+
+class SectionGroupTests(CourseTestCase):
+    """同一课程号可以同时选基础教学班及其配套教学班（如 "-01" 和 "-01A"），不能选其他教学班"""
+
+    def setUp(self):
+        super().setUp()
+        self.base = create_course("83563", "周一第1-2节", "(2024-2025-2)-83563-01")
+        self.companion = create_course(
+            "83563", "周三第1-2节", "(2024-2025-2)-83563-01A"
+        )
+        self.other = create_course("83563", "周五第1-2节", "(2024-2025-2)-83563-02")
+
+    def test_select_base_and_companion(self):
+        self.assertEqual(self.select(self.base).status_code, 200)
+        self.assertEqual(self.select(self.companion).status_code, 200)
+        response = self.select(self.other)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], "已经选过该课程的其他教学班")
+
+    def test_batch_base_and_companion(self):
+        response = self.client.post(
+            "/api/courses/courses/batch/",
+            {"add": [self.base.pk, self.companion.pk]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(StudentCourse.objects.filter(student=self.student).count(), 2)
+
+    def test_batch_rejects_other_section(self):
+        response = self.client.post(
+            "/api/courses/courses/batch/",
+            {"add": [self.companion.pk, self.other.pk]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        details = [result["detail"] for result in response.json()["results"]]
+        self.assertEqual(details, [None, "已经选过该课程的其他教学班"])
+
+
+class PlanTests(CourseTestCase):
+    """排课方案把基础教学班与配套教学班作为一个选项"""
+
+    def test_companion_planned_with_base(self):
+        base = create_course("83563", "周一第1-2节", "(2024-2025-2)-83563-01")
+        companion = create_course("83563", "周三第1-2节", "(2024-2025-2)-83563-01A")
+        other = create_course("83563", "周二第1-2节", "(2024-2025-2)-83563-02")
+        response = self.client.post(
+            "/api/courses/courses/plan/",
+            {"courses": ["83563"], "limit": 5},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        choices = [plan["sections"][0]["courses"] for plan in response.json()["plans"]]
+        self.assertCountEqual(choices, [[other.pk], [base.pk, companion.pk]])
+
+
+@override_settings(
+    COURSE_ADMISSION_QUEUE=True, METRICS_SAMPLE_RATE=1.0, PASSWORD_HASHERS=FAST_HASHERS
+)
+class AdmissionTests(APITransactionTestCase):
+    """排队选课：埋点记入原请求，不存在的课程不建立队列，批量退课唤醒排队请求"""
+
+    def setUp(self):
+        cache.clear()
+        admission.queues.clear()
+        self.student = User.objects.create_user(
+            "student", password="password123", student_id="1"
+        )
+        self.client.force_authenticate(self.student)
+
+    def select(self, pk):
+        return self.client.post(f"/api/courses/courses/{pk}/select_course/")
+
+    def test_server_timing_includes_queued_attempt(self):
+        course = create_course("C1", "周一第1-2节")
+        response = self.select(course.pk)
+        self.assertEqual(response.status_code, 200)
+        timing = response["Server-Timing"]
+        self.assertIn("conflict_check;", timing)
+        queries = int(timing.split('desc="')[1].split(" ")[0])
+        self.assertGreater(queries, 3)
+
+    def test_unknown_course_not_queued(self):
+        self.assertEqual(self.select(999999).status_code, 404)
+        self.assertNotIn(999999, admission.queues)
+
+    def test_batch_drop_wakes_queue(self):
+        course = create_course("C1", "周一第1-2节", capacity=1)
+        self.assertEqual(self.select(course.pk).status_code, 200)
+        other = User.objects.create_user(
+            "other", password="password123", student_id="2"
+        )
+        self.client.force_authenticate(other)
+        self.assertEqual(self.select(course.pk).status_code, 400)
+        self.assertTrue(admission.is_full(course.pk))
+
+        self.client.force_authenticate(self.student)
+        response = self.client.post(
+            "/api/courses/courses/batch/", {"drop": [course.pk]}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(admission.is_full(course.pk))
+
+
+class CourseFilterTests(CourseTestCase):
+    """课程列表筛选参数校验"""
+
+    def test_credit_filter(self):
+        create_course("C1", "周一第1-2节", credit="2.0")
+        create_course("C2", "周二第1-2节", credit="3.0")
+        response = self.client.get("/api/courses/courses/", {"credit": "2"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [course["course_code"] for course in response.json()["results"]], ["C1"]
+        )
+
+    def test_non_finite_credit_rejected(self):
+        for value in ("NaN", "sNaN", "Infinity", "-inf", "abc"):
+            response = self.client.get("/api/courses/courses/", {"credit": value})
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn("credit", response.json())
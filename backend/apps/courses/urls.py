@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CourseViewSet, StudentCourseViewSet
+from .views import CourseViewSet, ImportJobViewSet, StudentCourseViewSet
 
 router = DefaultRouter()
 router.register("courses", CourseViewSet)
 router.register("selections", StudentCourseViewSet, basename="selection")
+router.register("imports", ImportJobViewSet)
 
 urlpatterns = [
     path("", include(router.urls)),
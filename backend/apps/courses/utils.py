@@ -1,8 +1,12 @@
+import io
+import os
 import pandas as pd
 import pdfplumber
-from typing import List, Dict, Any, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterator, Tuple
 import re
 from datetime import datetime, time
+from django.conf import settings
 
 
 class FileParser:
@@ -11,139 +15,288 @@ class FileParser:
     def parse(self, file) -> List[Dict[str, Any]]:
         raise NotImplementedError
 
+    def iter_chunks(self, file, chunksize: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+        """分块解析文件，默认一次解析整个文件作为一块"""
+        yield self.parse(file)
+
+
+# PDF 课表行格式：开课学院,课程名称,课程性质,教学班名称,课程号,学分,任课教师,课堂容量,已选人数,上课时间,教学地点
+# 字段不跨行；教学班名称形如 "(2024-2025-2)-80508-01"
+PDF_ROW_PATTERN = re.compile(
+    r"([^,\n]+),([^,\n]+),([^,\n]+),(\([^)\n]+\)[^,\n]*),(\d+),(\d+\.?\d*),"
+    r"([^,\n]+),(\d+),(\d+),([^,\n]+),([^,\n]+)"
+)
+PDF_WEEKS_PATTERN = re.compile(r"{(\d+)-(\d+)周}")
+# 上课时间中分隔各时段的分号及其两侧空白
+SEGMENT_SEPARATOR_PATTERN = re.compile(r"\s*;\s*")
+
+
+def normalize_time_slot(value: str) -> str:
+    """
+    标准化上课时间，保留分号分隔的全部时段及其上课周（解析见 schedule.parse_meetings），例如：
+    "星期二第1-1节{1-16周}; 星期四第6-7节{1-15周(单)}" -> "周二第1-1节{1-16周};周四第6-7节{1-15周(单)}"
+    """
+    return SEGMENT_SEPARATOR_PATTERN.sub(";", value.replace("星期", "周")).strip()
+
+
+def normalize_classroom(value: str) -> str:
+    """
+    标准化教学地点：分号分隔的教室与上课时间一一对应，全部相同时只保留一个，例如：
+    "J6-103;J6-103" -> "J6-103"，"J6-103;J5-201" 保持不变
+    """
+    rooms = [room.strip() for room in value.split(";")]
+    return rooms[0] if len(set(rooms)) == 1 else ";".join(rooms)
+
+
+def parse_pdf_text(text: str) -> List[Dict[str, Any]]:
+    """从一页 PDF 文本中提取课程信息"""
+    courses = []
+    for match in PDF_ROW_PATTERN.finditer(text or ""):
+        classroom = normalize_classroom(match.group(11).strip())
+        time_slot = normalize_time_slot(match.group(10).strip())
+
+        # 从时间字符串中提取起始结束周
+        weeks_match = PDF_WEEKS_PATTERN.search(match.group(10))
+        if weeks_match:
+            start_week = int(weeks_match.group(1))
+            end_week = int(weeks_match.group(2))
+        else:
+            start_week = 1
+            end_week = 16
+
+        courses.append(
+            {
+                "name": match.group(2).strip(),
+                "course_code": match.group(5).strip(),
+                "section_code": match.group(4).strip(),
+                "teacher": match.group(7).strip(),
+                "classroom": classroom,
+                "capacity": int(match.group(8)),
+                "selected_count": int(match.group(9)),
+                "time_slot": time_slot,
+                "college": match.group(1).strip(),
+                "credit": match.group(6),
+                "description": f"{match.group(3).strip()} - {match.group(1).strip()} - {match.group(6)}学分",
+                "start_week": start_week,
+                "end_week": end_week,
+            }
+        )
+    return courses
+
+
+def parse_pdf_pages(source, start: int, end: int) -> List[Dict[str, Any]]:
+    """
+    解析 PDF 中 [start, end) 范围的页面
+    source 为文件路径或文件内容（bytes），供进程池中的工作进程各自打开文件
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    courses = []
+    with pdfplumber.open(source, pages=list(range(start + 1, end + 1))) as pdf:
+        for page in pdf.pages:
+            courses.extend(parse_pdf_text(page.extract_text()))
+            # 释放页面缓存，避免大文件占用过多内存
+            page.close()
+    return courses
+
 
 class PDFParser(FileParser):
-    """PDF文件解析器"""
+    """
+    PDF文件解析器
+    页数较多时按页段分发到进程池并行解析，结果按页序合并
+    """
+
+    def __init__(self, workers: int = None, pages_per_task: int = None):
+        self.workers = (
+            workers or getattr(settings, "COURSE_PDF_WORKERS", None) or os.cpu_count() or 1
+        )
+        self.pages_per_task = pages_per_task or getattr(
+            settings, "COURSE_PDF_PAGES_PER_TASK", 20
+        )
+
+    @staticmethod
+    def get_source(file):
+        """获取可在其他进程中重新打开的文件来源：磁盘路径优先，否则读出文件内容"""
+        if isinstance(file, (str, os.PathLike)):
+            return os.fspath(file)
+        if hasattr(file, "temporary_file_path"):
+            return file.temporary_file_path()
+        if hasattr(file, "seek"):
+            file.seek(0)
+        return file.read()
+
+    def page_ranges(self, source) -> List[Tuple[int, int]]:
+        """按 pages_per_task 切分页段"""
+        opened = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+        with pdfplumber.open(opened) as pdf:
+            page_count = len(pdf.pages)
+        return [
+            (start, min(start + self.pages_per_task, page_count))
+            for start in range(0, page_count, self.pages_per_task)
+        ]
+
+    def iter_chunks(self, file, chunksize: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+        """按页段产出解析结果，顺序与页序一致"""
+        source = self.get_source(file)
+        ranges = self.page_ranges(source)
+        if self.workers <= 1 or len(ranges) <= 1:
+            for start, end in ranges:
+                yield parse_pdf_pages(source, start, end)
+            return
+
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(ranges))) as pool:
+            starts, ends = zip(*ranges)
+            # map 按提交顺序返回结果，保证页序
+            yield from pool.map(parse_pdf_pages, [source] * len(ranges), starts, ends)
 
     def parse(self, file) -> List[Dict[str, Any]]:
         courses = []
-        with pdfplumber.open(file) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                # 使用正则表达式匹配课程信息
-                # 格式：开课学院,课程名称,课程性质,教学班名称,课程号,学分,任课教师,课堂容量,已选人数,上课时间,教学地点
-                pattern = r"([^,]+),([^,]+),([^,]+),\([^)]+\),(\d+),(\d+\.?\d*),([^,]+),(\d+),(\d+),([^,]+),([^,]+)"
-                matches = re.finditer(pattern, text)
-
-                for match in matches:
-                    # 处理教学地点，可能有多个地点用分号分隔
-                    classroom = match.group(10).strip()
-                    if ";" in classroom:
-                        classroom = classroom.split(";")[0]  # 取第一个教室
-
-                    # 处理上课时间
-                    time_slot = match.group(9).strip()
-                    if "{" in time_slot:
-                        # 将时间格式标准化，例如：
-                        # "星期四第4-5节{1-16周}" -> "周四 4-5节"
-                        time_slot = time_slot.replace("星期", "周")
-                        time_slot = time_slot.split("{")[0].strip()
-
-                    # 从时间字符串中提取起始结束周
-                    weeks_match = re.search(r"{(\d+)-(\d+)周}", match.group(9))
-                    if weeks_match:
-                        start_week = int(weeks_match.group(1))
-                        end_week = int(weeks_match.group(2))
-                    else:
-                        start_week = 1
-                        end_week = 16
-
-                    course = {
-                        "name": match.group(2).strip(),
-                        "course_code": match.group(4).strip(),
-                        "teacher": match.group(6).strip(),
-                        "classroom": classroom,
-                        "capacity": int(match.group(7)),
-                        "selected_count": int(match.group(8)),
-                        "time_slot": time_slot,
-                        "description": f"{match.group(3).strip()} - {match.group(1).strip()} - {match.group(5)}学分",
-                        "start_week": start_week,
-                        "end_week": end_week,
-                    }
-                    courses.append(course)
-
+        for chunk in self.iter_chunks(file):
+            courses.extend(chunk)
         return courses
 
 
 class CSVParser(FileParser):
     """CSV文件解析器"""
 
-    def parse(self, file) -> List[Dict[str, Any]]:
-        df = pd.read_csv(file, encoding="utf-8")
-
-        # 验证所需列是否存在
-        required_columns = [
-            "课程名称",
-            "课程号",
-            "任课教师",
-            "教学地点",
-            "课堂容量",
-            "已选人数",
-            "上课时间",
-            "课程性质",
-            "学分",
-            "开课学院",
-            "起始结束周",
-        ]
+    required_columns = [
+        "课程名称",
+        "课程号",
+        "任课教师",
+        "教学地点",
+        "课堂容量",
+        "已选人数",
+        "上课时间",
+        "课程性质",
+        "学分",
+        "开课学院",
+        "起始结束周",
+    ]
+    # 可选列：缺少时各教学班以课程号区分
+    optional_columns = ["教学班名称"]
+    # 数值列按浮点读入（允许空值），其余列按字符串读入，避免逐列类型推断
+    numeric_columns = {"课堂容量": "float64", "已选人数": "float64"}
+    # 文件开头可能有标题行，最多向下查找的表头行数
+    max_header_rows = 5
+
+    def locate_header(self, file) -> int:
+        """查找表头所在行，找不到时抛出缺少列的错误"""
+        preview = pd.read_csv(
+            file, header=None, nrows=self.max_header_rows, dtype=str, encoding="utf-8"
+        )
+        if hasattr(file, "seek"):
+            file.seek(0)
+        for index, row in enumerate(preview.itertuples(index=False)):
+            if set(self.required_columns) <= set(row):
+                return index
+        first_row = set(preview.iloc[0]) if len(preview) else set()
+        missing_columns = [col for col in self.required_columns if col not in first_row]
+        raise ValueError(f"CSV文件缺少必要的列：{', '.join(missing_columns)}")
+
+    def read(self, file, chunksize: int = None):
+        """
+        只读取所需的列，并指定每列的类型
+        指定 chunksize 时返回按块读取的迭代器
+        """
+        header = self.locate_header(file)
+        columns = self.required_columns + self.optional_columns
+        dtype = {column: str for column in columns}
+        dtype.update(self.numeric_columns)
+        return pd.read_csv(
+            file,
+            header=header,
+            usecols=lambda column: column in columns,
+            dtype=dtype,
+            encoding="utf-8",
+            chunksize=chunksize,
+        )
 
-        # 验证所需列是否存在
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            raise ValueError(f"CSV文件缺少必要的列：{', '.join(missing_columns)}")
+    @staticmethod
+    def map_unique(series: pd.Series, func) -> pd.Series:
+        """
+        只对去重后的取值做向量化处理，再映射回整列
+        课表中教室、上课时间、上课周大量重复，去重后通常只剩几百种取值
+        """
+        uniques = pd.Series(series.dropna().unique(), dtype=object)
+        return series.map(dict(zip(uniques, func(uniques))))
+
+    def transform(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """对整列做向量化处理，一次生成全部课程数据"""
+        # 跳过没有课程号的行
+        df = df[df["课程号"].notna()]
+
+        # 处理教学地点，多个地点用分号分隔，与上课时间一一对应
+        classroom = self.map_unique(
+            df["教学地点"], lambda s: s.map(normalize_classroom)
+        ).fillna("待定")
+
+        # 处理上课时间，例如："星期四第4-5节{1-16周};星期五第1-2节{1-16周}" -> "周四第4-5节{1-16周};周五第1-2节{1-16周}"
+        time_slot = self.map_unique(
+            df["上课时间"],
+            lambda s: s.str.replace("星期", "周", regex=False)
+            .str.replace(SEGMENT_SEPARATOR_PATTERN.pattern, ";", regex=True)
+            .str.strip(),
+        ).fillna("待定")
+
+        course_code = df["课程号"].str.strip()
+        if "教学班名称" in df:
+            section_code = df["教学班名称"].str.strip().fillna(course_code)
+        else:
+            section_code = course_code
+
+        # 处理起始结束周，例如："1-16周"、"1-15周(单)"
+        start_week, end_week = (
+            self.map_unique(
+                df["起始结束周"],
+                lambda s: pd.to_numeric(
+                    s.str.extract(pattern, expand=False), errors="coerce"
+                ),
+            )
+            .fillna(default)
+            .astype(int)
+            for pattern, default in ((r"^\s*(\d+)", 1), (r"-\s*(\d+)", 16))
+        )
+
+        def to_int(column: str) -> pd.Series:
+            return df[column].fillna(0).astype(int)
+
+        description = (
+            df["课程性质"].fillna("")
+            + " - "
+            + df["开课学院"].fillna("")
+            + " - "
+            + df["学分"].fillna("")
+            + "学分"
+        )
+
+        columns = {
+            "name": df["课程名称"].fillna("").str.strip(),
+            "course_code": course_code,
+            "section_code": section_code,
+            "teacher": df["任课教师"].fillna("").str.strip(),
+            "classroom": classroom,
+            "capacity": to_int("课堂容量"),
+            "selected_count": to_int("已选人数"),
+            "time_slot": time_slot,
+            "college": df["开课学院"].fillna("").str.strip(),
+            "credit": df["学分"],
+            "description": description,
+            "start_week": start_week,
+            "end_week": end_week,
+        }
+        # tolist() 一次性转换为 Python 原生类型，再按行拼装成字典
+        keys = list(columns)
+        values = [column.tolist() for column in columns.values()]
+        return [dict(zip(keys, row)) for row in zip(*values)]
 
-        # 转换为课程数据列表
-        courses = []
-        for _, row in df.iterrows():
-            # 跳过没有课程号的行
-            if pd.isna(row["课程号"]):
-                continue
-
-            # 处理教学地点，可能有多个地点用分号分隔
-            classroom = row["教学地点"]
-            if pd.isna(classroom):
-                classroom = "待定"
-            elif ";" in str(classroom):
-                classroom = classroom.split(";")[0]  # 取第一个教室
-
-            # 处理上课时间
-            time_slot = row["上课时间"]
-            if pd.isna(time_slot):
-                time_slot = "待定"
-            else:
-                # 将时间格式标准化，例如：
-                # "星期四第4-5节{1-16周}" -> "周四 4-5节"
-                time_slot = time_slot.replace("星期", "周")
-                time_slot = time_slot.split("{")[0].strip()
-
-            # 处理起始结束周
-            weeks = row["起始结束周"]
-            if not pd.isna(weeks):
-                if "周" in weeks:
-                    weeks = weeks.replace("周", "")
-                try:
-                    start_week, end_week = map(int, weeks.split("-"))
-                except:
-                    start_week, end_week = 1, 16
-            else:
-                start_week, end_week = 1, 16
-
-            course = {
-                "name": row["课程名称"],
-                "course_code": str(row["课程号"]),
-                "teacher": row["任课教师"],
-                "classroom": classroom,
-                "capacity": int(row["课堂容量"]) if not pd.isna(row["课堂容量"]) else 0,
-                "selected_count": int(row["已选人数"])
-                if not pd.isna(row["已选人数"])
-                else 0,
-                "time_slot": time_slot,
-                "description": f"{row['课程性质']} - {row['开课学院']} - {row['学分']}学分",
-                "start_week": start_week,
-                "end_week": end_week,
-            }
-            courses.append(course)
+    def parse(self, file) -> List[Dict[str, Any]]:
+        return self.transform(self.read(file))
 
-        return courses
+    def iter_chunks(self, file, chunksize: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+        """流式解析：每次只读入 chunksize 行，内存占用与文件大小无关"""
+        with self.read(file, chunksize=chunksize) as reader:
+            for df in reader:
+                yield self.transform(df)
 
 
 def get_parser(file_type: str) -> FileParser:
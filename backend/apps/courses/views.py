@@ -1,11 +1,53 @@
-from rest_framework import viewsets, permissions, status
+import datetime
+
+from rest_framework import viewsets, permissions, serializers, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser
-from django.db import transaction
-from .models import Course, StudentCourse
-from .serializers import CourseSerializer, StudentCourseSerializer
-from .utils import get_parser, ConflictChecker
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.reverse import reverse
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.db.models import F, Q
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
+from apps.monitoring.probe import span
+from apps.users.authentication import StatelessJWTAuthentication
+from .admission import COURSE_FULL, QueueFull, admission
+from .cache import catalog_version, get_cache, response_key, selections_key
+from .filters import CourseFilterBackend
+from .jobs import enqueue
+from .models import (
+    Course,
+    CourseMeeting,
+    ImportJob,
+    StudentCourse,
+    StudentSchedule,
+    section_group,
+)
+from .pagination import CourseCursorPagination
+from .planner import SectionGroup, TimetablePlanner
+from .serializers import (
+    CourseBatchSerializer,
+    CourseConflictSerializer,
+    CourseSerializer,
+    ImportJobSerializer,
+    StudentCourseSerializer,
+    TimetablePlanSerializer,
+)
+from .schedule import MAX_WEEKS, ConflictIndex, describe
+from .seats import EventStreamRenderer, seat_feed, stream_seat_feed
+from .utils import get_parser
+
+# 无状态认证不查询用户表，用户被删除后其令牌在吊销生效前仍能通过认证
+USER_DELETED = {"detail": "用户不存在"}
+
+
+def user_exists(user) -> bool:
+    return get_user_model().objects.filter(pk=user.pk).exists()
 
 
 class CourseViewSet(viewsets.ModelViewSet):
@@ -13,8 +55,78 @@ class CourseViewSet(viewsets.ModelViewSet):
 
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    # 高频接口，用户信息取自令牌声明，不查询用户表
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser]
+    pagination_class = CourseCursorPagination
+    filter_backends = [CourseFilterBackend]
+
+    def get_requested_fields(self):
+        """
+        解析 ?fields=id,name,teacher 稀疏字段参数（仅用于列表和详情）
+        未指定时返回 None，表示输出全部字段
+        """
+        if self.action not in ("list", "retrieve"):
+            return None
+        value = self.request.query_params.get("fields")
+        if not value:
+            return None
+        fields = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = set(fields) - set(CourseSerializer().fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {"fields": f"未知字段：{', '.join(sorted(unknown))}"}
+            )
+        return fields
+
+    def get_queryset(self):
+        """指定稀疏字段时只查询需要的列"""
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        if fields:
+            queryset = queryset.only(*fields)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields:
+            kwargs.setdefault("fields", fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """
+        按课程目录版本缓存列表和详情的序列化结果
+        请求头 If-None-Match 与当前 ETag 一致时直接返回 304，不查询也不序列化
+        """
+        version = catalog_version()
+        key = response_key(
+            version, self.action, request.get_host(), request.get_full_path()
+        )
+        etag = f'"{key.rsplit(":", 1)[-1][:20]}-{version}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        cache = get_cache()
+        data = cache.get(key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(key, data)
+            headers["X-Cache"] = "MISS"
+        else:
+            headers["X-Cache"] = "HIT"
+        return Response(data, headers=headers)
 
     def get_permissions(self):
         """根据不同操作设置权限"""
@@ -53,108 +165,564 @@ class CourseViewSet(viewsets.ModelViewSet):
                 {"detail": "无法处理该文件类型"}, status=status.HTTP_400_BAD_REQUEST
             )
 
+        # 保存文件并创建导入任务，解析与写入在后台执行
+        job = ImportJob.objects.create(
+            file=file,
+            filename=file.name,
+            file_type=file_type,
+            created_by=request.user,
+        )
+        enqueue(job)
+
+        serializer = ImportJobSerializer(job)
+        return Response(
+            {
+                "message": "导入任务已提交",
+                "job": serializer.data,
+                "status_url": reverse(
+                    "importjob-detail", args=[job.pk], request=request
+                ),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    def get_since(self, value):
+        """解析余量订阅的起始版本，未指定时返回 None（全量）"""
+        if value in (None, ""):
+            return None
         try:
-            # 解析文件
-            courses_data = parser.parse(file)
-
-            # 批量创建课程
-            created_courses = []
-            with transaction.atomic():
-                for course_data in courses_data:
-                    course, created = Course.objects.get_or_create(
-                        course_code=course_data["course_code"], defaults=course_data
-                    )
-                    if created:
-                        created_courses.append(course)
-
-            # 返回创建的课程信息
-            serializer = CourseSerializer(created_courses, many=True)
-            return Response(
-                {
-                    "message": f"成功导入 {len(created_courses)} 门课程",
-                    "courses": serializer.data,
-                }
-            )
+            since = int(value)
+        except (TypeError, ValueError):
+            since = -1
+        if since < 0:
+            raise serializers.ValidationError({"since": "必须是非负整数"})
+        return since
 
-        except Exception as e:
-            return Response(
-                {"detail": f"文件解析错误: {str(e)}"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+    @action(detail=False, methods=["get"])
+    def seats(self, request):
+        """课程余量增量：?since=<version> 返回该版本之后有变化的 [id, 已选人数, 容量]"""
+        return Response(seat_feed(self.get_since(request.query_params.get("since"))))
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="seats/stream",
+        renderer_classes=[EventStreamRenderer, JSONRenderer],
+    )
+    def seats_stream(self, request):
+        """课程余量推送（Server-Sent Events），断线重连时按 Last-Event-ID 续传"""
+        since = self.get_since(
+            request.query_params.get("since") or request.headers.get("Last-Event-ID")
+        )
+        response = StreamingHttpResponse(
+            stream_seat_feed(since), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # 关闭 Nginx 缓冲
+        return response
 
     @action(detail=True, methods=["post"])
     def select_course(self, request, pk=None):
-        """选课操作"""
-        course = self.get_object()
+        """
+        选课操作
+        COURSE_ADMISSION_QUEUE 开启时同一门课程的选课请求排队逐个处理（见 admission.py）：
+        COURSE_ADMISSION_WAIT 秒内处理完成时直接返回结果，否则返回 202 和排队凭证，
+        凭 queue/<凭证>/ 查询排队位置和结果
+        """
+        if not getattr(settings, "COURSE_ADMISSION_QUEUE", True):
+            status_code, data = self.attempt_selection(self.get_object(), request.user)
+            return Response(data, status=status_code)
+
+        try:
+            course_id = int(pk)
+        except ValueError:
+            raise NotFound("课程不存在")
+        # 已知课程已满时直接拒绝，不访问数据库
+        if admission.is_full(course_id):
+            return Response(COURSE_FULL, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            ticket = admission.submit(course_id, request.user, self.attempt_selection)
+        except Course.DoesNotExist:
+            raise NotFound("课程不存在")
+        except QueueFull:
+            return Response(
+                {"detail": "排队人数过多，请稍后重试"},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
 
-        # 检查课程容量
+        ticket.done.wait(getattr(settings, "COURSE_ADMISSION_WAIT", 5))
+        if ticket.result is not None:
+            status_code, data = ticket.result
+            return Response(data, status=status_code)
+        location = reverse("course-queue", args=[course_id, ticket.id], request=request)
+        return Response(
+            self.ticket_payload(ticket),
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": location},
+        )
+
+    @action(detail=True, methods=["get"], url_path=r"queue/(?P<ticket>[0-9a-f]+)")
+    def queue(self, request, pk=None, ticket=None):
+        """查询排队选课的位置和结果（凭证在处理完成 COURSE_ADMISSION_TICKET_TTL 秒后失效）"""
+        found = admission.get_ticket(ticket, request.user.pk)
+        if found is None or str(found.course_id) != pk:
+            raise NotFound("排队凭证不存在或已过期")
+        return Response(self.ticket_payload(found))
+
+    @staticmethod
+    def ticket_payload(ticket) -> dict:
+        if ticket.result is None:
+            return {
+                "ticket": ticket.id,
+                "status": "waiting",
+                "position": admission.position(ticket),
+            }
+        status_code, data = ticket.result
+        return {
+            "ticket": ticket.id,
+            "status": "done",
+            "code": status_code,
+            "result": data,
+        }
+
+    def attempt_selection(self, course, student):
+        """
+        检查并选课（请求线程或排队线程中执行）
+        返回值: (状态码, 响应内容)
+        """
+        # 检查课程容量（快速失败，最终以条件更新为准）
         if course.selected_count >= course.capacity:
-            return Response({"detail": "课程已满"}, status=status.HTTP_400_BAD_REQUEST)
+            return status.HTTP_400_BAD_REQUEST, COURSE_FULL
 
-        # 检查是否已经选过这门课
-        if StudentCourse.objects.filter(student=request.user, course=course).exists():
-            return Response(
-                {"detail": "已经选过这门课程"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # 获取学生已选课程
-        student_courses = StudentCourse.objects.filter(
-            student=request.user,
-            status="approved",  # 只检查已通过的选课
-        ).select_related("course")
-
-        # 检查时间冲突
-        for student_course in student_courses:
-            has_conflict, conflict_msg = ConflictChecker.check_conflicts(
-                course.time_slot, student_course.course.time_slot
-            )
-            if has_conflict:
-                return Response(
-                    {
-                        "detail": f"与已选课程 {student_course.course.name} {conflict_msg}"
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+        # 检查是否已经选过这门课程（同一课程号只能选一组教学班：基础教学班及其配套教学班）
+        selected = dict(
+            StudentCourse.objects.filter(
+                student=student, course__course_code=course.course_code
+            ).values_list("course_id", "course__section_code")
+        )
+        if course.pk in selected:
+            return status.HTTP_400_BAD_REQUEST, {"detail": "已经选过这门课程"}
+        if any(
+            section_group(code) != course.section_group for code in selected.values()
+        ):
+            return status.HTTP_400_BAD_REQUEST, {"detail": "已经选过该课程的其他教学班"}
 
-        # 创建选课记录
-        with transaction.atomic():
-            student_course = StudentCourse.objects.create(
-                student=request.user, course=course, status="pending"
+        # 检查时间冲突：候选课程位图与学生课表位图按位与（只读一行）
+        with span("conflict_check"):
+            try:
+                occupied = StudentSchedule.objects.mask_for(student)
+            except IntegrityError:
+                # 课表位图尚未生成时现场重建，用户已被删除时违反外键约束
+                if not user_exists(student):
+                    return status.HTTP_401_UNAUTHORIZED, USER_DELETED
+                raise
+            overlap = course.schedule_mask & occupied
+        if overlap:
+            # 确有冲突时才查询已通过的课程，定位冲突的具体课程
+            student_courses = (
+                StudentCourse.objects.filter(
+                    student=student,
+                    status="approved",  # 只检查已通过的选课
+                )
+                .select_related("course")
+                .only("course__name", "course__time_slot")
+                .order_by()  # 冲突检测不需要排序
+            )
+            conflicts = ConflictIndex(sc.course for sc in student_courses).conflicts(
+                course.schedule_mask
             )
-            course.selected_count += 1
-            course.save()
+            if conflicts:
+                conflict_course, overlap = conflicts[0]
+                return status.HTTP_400_BAD_REQUEST, {
+                    "detail": f"与已选课程 {conflict_course.name} 课程时间冲突：{describe(overlap)}",
+                    "conflicts": self.conflict_payload(conflicts),
+                }
+            # 位图与选课记录不一致（例如直接修改了数据库），以选课记录为准修复位图
+            StudentSchedule.objects.rebuild([student.pk])
+
+        # 占用名额并创建选课记录（条件更新，并发下不会超卖）
+        try:
+            student_course = StudentCourse.objects.enroll(student, course)
+        except IntegrityError:
+            # 只有选课记录已存在时才是重复选课；用户已被删除而令牌仍有效时违反的是外键约束
+            if StudentCourse.objects.filter(student=student, course=course).exists():
+                return status.HTTP_400_BAD_REQUEST, {"detail": "已经选过这门课程"}
+            if not user_exists(student):
+                return status.HTTP_401_UNAUTHORIZED, USER_DELETED
+            raise
+        if student_course is None:
+            return status.HTTP_400_BAD_REQUEST, COURSE_FULL
 
         serializer = StudentCourseSerializer(student_course)
-        return Response(serializer.data)
+        return status.HTTP_200_OK, serializer.data
+
+    @staticmethod
+    def conflict_payload(conflicts) -> list:
+        """冲突列表：[{"course", "name", "time"}]，time 为最早的一个冲突时间"""
+        return [
+            {"course": course.pk, "name": course.name, "time": describe(overlap)}
+            for course, overlap in conflicts
+        ]
+
+    @action(detail=False, methods=["post"], parser_classes=[JSONParser])
+    def check_conflicts(self, request):
+        """
+        批量检查时间冲突（不选课）：{"courses": [课程id...]}
+        返回每门候选课程与已通过课程（selected）、以及与其他候选课程（candidates）的全部冲突
+        """
+        serializer = CourseConflictSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data["courses"]
+
+        courses = Course.objects.only("name", "time_slot").in_bulk(ids)
+        approved = (
+            StudentCourse.objects.filter(student=request.user, status="approved")
+            .select_related("course")
+            .only("course__name", "course__time_slot")
+            .order_by()
+        )
+        candidates = list(courses.values())
+        with span("conflict_check"):
+            selected = ConflictIndex(sc.course for sc in approved).check(candidates)
+            mutual = ConflictIndex(candidates).check(candidates)
+        results = []
+        for pk in ids:
+            course = courses.get(pk)
+            if course is None:
+                results.append({"course": pk, "detail": "课程不存在"})
+                continue
+            results.append(
+                {
+                    "course": pk,
+                    "selected": self.conflict_payload(selected[course]),
+                    "candidates": self.conflict_payload(mutual[course]),
+                }
+            )
+        return Response({"results": results})
+
+    @action(detail=False, methods=["post"], parser_classes=[JSONParser])
+    def plan(self, request):
+        """
+        排课方案（不选课）：{"courses": [课程号...], "no_mornings", "free_days", "max_gaps", "limit"}
+        为每个课程号挑选一组教学班（基础教学班及其配套教学班），返回与已通过课程、彼此之间都不冲突的最好 limit 个组合，
+        按空闲节数、上课天数从少到多排序；搜索超过 COURSE_PLANNER_BUDGET 秒时返回已找到的方案，complete 为 false
+        """
+        serializer = TimetablePlanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        sections = (
+            Course.objects.filter(course_code__in=data["courses"])
+            .only(
+                "course_code",
+                "section_code",
+                "teacher",
+                "time_slot",
+                "capacity",
+                "selected_count",
+            )
+            .order_by("section_code")
+        )
+        # 基础教学班与其配套教学班须一起选，作为一个可选项
+        members = {code: {} for code in data["courses"]}
+        for section in sections:
+            members[section.course_code].setdefault(section.section_group, []).append(
+                section
+            )
+        groups = {code: [] for code in data["courses"]}
+        for code, by_group in members.items():
+            for group in map(SectionGroup, by_group.values()):
+                full = any(
+                    section.selected_count >= section.capacity
+                    for section in group.sections
+                )
+                # 组内教学班彼此冲突时无法同时选
+                if group.overlapping or (full and not data["include_full"]):
+                    continue
+                groups[code].append(group)
+
+        with span("plan"):
+            result = TimetablePlanner(limit=data["limit"]).plan(
+                groups,
+                occupied=StudentSchedule.objects.mask_for(request.user),
+                no_mornings=data["no_mornings"],
+                free_days=data["free_days"],
+                max_gaps=data["max_gaps"],
+            )
+        result["plans"] = [self.plan_payload(plan) for plan in result["plans"]]
+        return Response(result)
+
+    @staticmethod
+    def plan_payload(plan) -> dict:
+        """
+        排课方案：每个课程号选出的一组教学班（基础教学班及其配套教学班，courses 须一起选）
+        上课时间相同的教学班组任选其一，alternatives 为其余可替换的教学班组
+        """
+        selections = []
+        for code, choices in plan["choices"].items():
+            group = choices[0]
+            selections.append(
+                {
+                    "course_code": code,
+                    "courses": [section.pk for section in group.sections],
+                    "sections": [
+                        {
+                            "course": section.pk,
+                            "section_code": section.section_code,
+                            "teacher": section.teacher,
+                            "time_slot": section.time_slot,
+                        }
+                        for section in group.sections
+                    ],
+                    "alternatives": [
+                        [section.pk for section in other.sections]
+                        for other in choices[1:]
+                    ],
+                }
+            )
+        return {"gaps": plan["gaps"], "days": plan["days"], "sections": selections}
 
     @action(detail=True, methods=["post"])
     def drop_course(self, request, pk=None):
         """退课操作"""
         course = self.get_object()
 
-        try:
-            student_course = StudentCourse.objects.get(
-                student=request.user, course=course
-            )
-        except StudentCourse.DoesNotExist:
+        if not StudentCourse.objects.withdraw(request.user, course):
             return Response(
                 {"detail": "未选择该课程"}, status=status.HTTP_400_BAD_REQUEST
             )
-
-        with transaction.atomic():
-            student_course.delete()
-            course.selected_count = max(0, course.selected_count - 1)
-            course.save()
+        admission.seat_released(course.pk)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=["post"], parser_classes=[JSONParser])
+    def batch(self, request):
+        """
+        批量选课、退课：{"add": [课程id...], "drop": [课程id...]}
+        所选课程之间以及与已选课程之间一次性检查冲突，全部通过后在一个事务中提交；
+        任一课程失败时所有操作均不生效，响应中给出每门课程的结果
+        """
+        serializer = CourseBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        add = serializer.validated_data["add"]
+        drop = serializer.validated_data["drop"]
+
+        courses = Course.objects.only(
+            "name",
+            "course_code",
+            "section_code",
+            "time_slot",
+            "capacity",
+            "selected_count",
+        ).in_bulk(add)
+        codes = {course.course_code for course in courses.values()}
+        # 一次取出涉及的选课记录（含同一课程的其他教学班）和全部已通过的选课（冲突检测用）
+        selections = (
+            StudentCourse.objects.filter(student=request.user)
+            .filter(
+                Q(course__in=[*add, *drop])
+                | Q(course__course_code__in=codes)
+                | Q(status="approved")
+            )
+            .select_related("course")
+            .only(
+                "status",
+                "course__name",
+                "course__course_code",
+                "course__section_code",
+                "course__time_slot",
+            )
+            .order_by()
+        )
+        selected = {sc.course_id for sc in selections}
+        dropping = set(drop)
+        # 退课后仍保留的课程号及其教学班组：同一课程号只能选一组教学班
+        kept_groups = {
+            sc.course.course_code: sc.course.section_group
+            for sc in selections
+            if sc.course_id not in dropping
+        }
+        # 冲突索引：退课后仍保留的已通过课程，检查通过的候选课程随后加入
+        index = ConflictIndex(
+            sc.course
+            for sc in selections
+            if sc.status == "approved" and sc.course_id not in dropping
+        )
+
+        results = []
+        accepted = []
+        for pk in add:
+            course = courses.get(pk)
+            detail = None
+            if course is None:
+                detail = "课程不存在"
+            elif pk in selected:
+                detail = "已经选过这门课程"
+            elif kept_groups.get(course.course_code, course.section_group) != (
+                course.section_group
+            ):
+                detail = "已经选过该课程的其他教学班"
+            elif course.selected_count >= course.capacity:
+                detail = "课程已满"
+            else:
+                with span("conflict_check"):
+                    conflicts = index.conflicts(course.schedule_mask)
+                if conflicts:
+                    conflict_course, overlap = conflicts[0]
+                    source = "本次所选" if conflict_course in accepted else "已选"
+                    detail = f"与{source}课程 {conflict_course.name} 课程时间冲突：{describe(overlap)}"
+                else:
+                    accepted.append(course)
+                    index.add(course)
+                    kept_groups[course.course_code] = course.section_group
+            results.append({"course": pk, "action": "add", "detail": detail})
+        for pk in drop:
+            detail = None if pk in selected else "未选择该课程"
+            results.append({"course": pk, "action": "drop", "detail": detail})
+
+        if not any(result["detail"] for result in results):
+            # 检查通过后提交；并发下名额或选课记录可能已变化，以事务内的结果为准
+            try:
+                failed = StudentCourse.objects.change_batch(request.user, add, drop)
+            except IntegrityError:
+                if not user_exists(request.user):
+                    return Response(USER_DELETED, status=status.HTTP_401_UNAUTHORIZED)
+                failed = {"full": [], "missing": [], "duplicate": add}
+            for result in results:
+                if result["action"] == "drop":
+                    if result["course"] in failed["missing"]:
+                        result["detail"] = "未选择该课程"
+                elif result["course"] in failed["full"]:
+                    result["detail"] = "课程已满"
+                elif result["course"] in failed.get("duplicate", ()):
+                    result["detail"] = "选课记录已变化，请重试"
+
+        for result in results:
+            result["success"] = result["detail"] is None
+        if all(result["success"] for result in results):
+            # 与单门退课一致，唤醒在已满课程上排队的请求
+            for pk in drop:
+                admission.seat_released(pk)
+            return Response({"results": results})
+        return Response(
+            {"detail": "批量选课未完成，所有操作均未生效", "results": results},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
 
 class StudentCourseViewSet(viewsets.ReadOnlyModelViewSet):
     """学生选课记录视图集"""
 
     serializer_class = StudentCourseSerializer
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        """只返回当前用户的选课记录"""
-        return StudentCourse.objects.filter(student=self.request.user)
+        """只返回当前用户的选课记录；与课程表联表一次查出，只取列表需要的列"""
+        return (
+            StudentCourse.objects.filter(student=self.request.user)
+            .select_related("course")
+            .only(
+                "course",
+                "status",
+                "created_at",
+                "updated_at",
+                "course__updated_at",
+                *(f"course__{name}" for name in Course.LISTED_FIELDS),
+            )
+        )
+
+    def list(self, request, *args, **kwargs):
+        """
+        选课记录列表，按学生缓存（选课、退课、审核后失效）
+        ?since=<时间> 增量获取：返回 {"results": 该时间之后有变化的记录, "ids": 当前全部选课记录 id,
+        "timestamp": 最近一次变化的时间}，不在 ids 中的记录已退选；
+        记录的变化时间取选课记录和课程修改时间中较晚的一个，课程名称、教师、上课时间、教室修改后也会返回。
+        下次请求以 timestamp 作为 since。时间为 ISO 8601 格式或 Unix 时间戳（秒）
+        """
+        since = self.get_since(request.query_params.get("since"))
+        cache = get_cache()
+        key = selections_key(request.user.pk)
+        cached = cache.get(key)
+        if cached is None:
+            selections = list(self.get_queryset())
+            serializer = self.get_serializer(selections, many=True)
+            items = [dict(item) for item in serializer.data]
+            # 修改课程不会更新选课记录，变化时间以两者中较晚的为准
+            stamps = [max(sc.updated_at, sc.course.updated_at) for sc in selections]
+            cached = (items, stamps)
+            cache.set(
+                key, cached, getattr(settings, "COURSE_SELECTIONS_CACHE_TIMEOUT", 60)
+            )
+        items, stamps = cached
+        if since is None:
+            return Response(items)
+
+        return Response(
+            {
+                "results": [
+                    item for item, stamp in zip(items, stamps) if stamp >= since
+                ],
+                "ids": [item["id"] for item in items],
+                "timestamp": max(stamps).isoformat() if stamps else None,
+            }
+        )
+
+    def get_since(self, value):
+        """解析增量获取的起始时间，未指定时返回 None（全量）"""
+        if value in (None, ""):
+            return None
+        try:
+            return datetime.datetime.fromtimestamp(
+                float(value), tz=datetime.timezone.utc
+            )
+        except (ValueError, OverflowError, OSError):
+            pass
+        try:
+            # 未编码的 "+00:00" 在查询参数中会变成空格
+            since = parse_datetime(value.replace(" ", "+"))
+        except ValueError:
+            since = None
+        if since is None:
+            raise serializers.ValidationError(
+                {"since": "必须是 ISO 8601 时间或 Unix 时间戳"}
+            )
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=datetime.timezone.utc)
+        return since
+
+    @action(detail=False, methods=["get"])
+    def timetable(self, request):
+        """
+        当前学生的课表：每个上课时段一行，按星期、节次排序，一次联表查询得到
+        ?week=<n> 只返回第 n 周上课的时段
+        """
+        meetings = CourseMeeting.objects.filter(
+            course__studentcourse__student=request.user
+        )
+        week = request.query_params.get("week")
+        if week:
+            week = CourseFilterBackend.parse_int("week", week, 1, MAX_WEEKS)
+            meetings = CourseFilterBackend.filter_week(meetings, week)
+        rows = meetings.order_by("weekday", "start_period", "course_id").values(
+            "course_id",
+            "weekday",
+            "start_period",
+            "end_period",
+            "start_week",
+            "end_week",
+            "week_parity",
+            "classroom",
+            name=F("course__name"),
+            teacher=F("course__teacher"),
+            status=F("course__studentcourse__status"),
+        )
+        return Response(list(rows))
+
+
+class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """课程导入任务视图集（查询导入进度）"""
+
+    queryset = ImportJob.objects.all()
+    serializer_class = ImportJobSerializer
+    permission_classes = [permissions.IsAdminUser]
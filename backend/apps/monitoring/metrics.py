@@ -0,0 +1,121 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# 耗时直方图的桶（秒）
+DURATION_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+# SQL 次数直方图的桶
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Prometheus 直方图（按标签值分别统计，进程内聚合）"""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str], buckets
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # 标签值 -> [各桶计数（非累计）, 总和, 次数]
+        self.series: Dict[Tuple, List] = {}
+
+    def observe(self, labels: Tuple, value: float):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self.lock:
+            items = [
+                (labels, list(counts), total, count)
+                for labels, (counts, total, count) in self.series.items()
+            ]
+        for labels, counts, total, count in sorted(items):
+            base = ",".join(
+                f'{name}="{escape_label(value)}"'
+                for name, value in zip(self.labelnames, labels)
+            )
+            prefix = f"{base}," if base else ""
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else format_value(float(bound))
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            suffix = f"{{{base}}}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {format_value(float(total))}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+    def reset(self):
+        with self.lock:
+            self.series.clear()
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "请求处理耗时（全部请求）",
+    ("view", "method", "status"),
+    DURATION_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "每个请求的 SQL 次数（采样请求）",
+    ("view",),
+    QUERY_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "每个请求的 SQL 总耗时（采样请求）",
+    ("view",),
+    DURATION_BUCKETS,
+)
+SPAN_DURATION = Histogram(
+    "http_request_span_duration_seconds",
+    "请求内各埋点（认证、冲突检测、序列化等）的耗时，不含其间的 SQL（采样请求）",
+    ("view", "span"),
+    DURATION_BUCKETS,
+)
+
+REGISTRY = (REQUEST_DURATION, REQUEST_QUERIES, REQUEST_DB_DURATION, SPAN_DURATION)
+
+
+def render_metrics() -> str:
+    """Prometheus 文本格式"""
+    lines = []
+    for histogram in REGISTRY:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
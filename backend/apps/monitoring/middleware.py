@@ -0,0 +1,87 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import (
+    REQUEST_DB_DURATION,
+    REQUEST_DURATION,
+    REQUEST_QUERIES,
+    SPAN_DURATION,
+)
+from .probe import Probe, activate, deactivate
+
+# 方法标签只取标准方法，其余一律归为 other，避免任意方法名产生无界的指标序列
+METHODS = frozenset(("GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"))
+
+
+def view_label(request) -> str:
+    """以 URL 名称作为视图标签，避免把路径参数带入指标"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match.route or "unnamed"
+
+
+def method_label(request) -> str:
+    return request.method if request.method in METHODS else "other"
+
+
+def format_server_timing(elapsed, probe) -> str:
+    parts = [f"total;dur={elapsed * 1000:.2f}"]
+    if probe is not None:
+        parts.append(
+            f'db;dur={probe.query_time * 1000:.2f};desc="{probe.query_count} queries"'
+        )
+        parts.extend(
+            f"{name};dur={duration * 1000:.2f}"
+            for name, duration in probe.spans.items()
+        )
+    return ", ".join(parts)
+
+
+class InstrumentationMiddleware:
+    """
+    请求性能埋点
+    所有请求记录总耗时；按 METRICS_SAMPLE_RATE 采样的请求额外记录 SQL 次数、SQL 耗时
+    和各埋点（apps.monitoring.probe.span）耗时。结果写入 Server-Timing 响应头，
+    并聚合为直方图，由 /metrics 以 Prometheus 文本格式输出
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "METRICS_SAMPLE_RATE", 0.1)
+        self.server_timing = getattr(settings, "METRICS_SERVER_TIMING", True)
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        probe = Probe() if random.random() < self.sample_rate else None
+        token = activate(probe)
+        try:
+            if probe is None:
+                response = self.get_response(request)
+            else:
+                with ExitStack() as stack:
+                    for connection in connections.all():
+                        stack.enter_context(
+                            connection.execute_wrapper(probe.db_wrapper)
+                        )
+                    response = self.get_response(request)
+        finally:
+            deactivate(token)
+        elapsed = time.perf_counter() - start
+
+        view = view_label(request)
+        REQUEST_DURATION.observe(
+            (view, method_label(request), response.status_code), elapsed
+        )
+        if probe is not None:
+            REQUEST_QUERIES.observe((view,), probe.query_count)
+            REQUEST_DB_DURATION.observe((view,), probe.query_time)
+            for name, duration in probe.spans.items():
+                SPAN_DURATION.observe((view, name), duration)
+        if self.server_timing:
+            response["Server-Timing"] = format_server_timing(elapsed, probe)
+        return response
@@ -0,0 +1,92 @@
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import Context, ContextVar
+from typing import Dict, Optional
+
+from django.db import connections
+
+# 当前请求的探针；未被采样的请求为 None，埋点直接跳过
+_current: ContextVar[Optional["Probe"]] = ContextVar("monitoring_probe", default=None)
+
+
+class Probe:
+    """记录单个被采样请求的 SQL 次数、SQL 耗时和各埋点耗时"""
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_time = 0.0
+        self.spans: Dict[str, float] = {}
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper 钩子"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_time += time.perf_counter() - start
+            self.query_count += 1
+
+    def add_span(self, name: str, elapsed: float):
+        self.spans[name] = self.spans.get(name, 0.0) + elapsed
+
+    def merge(self, other: "Probe"):
+        """并入其他线程中为同一请求记录的结果"""
+        self.query_count += other.query_count
+        self.query_time += other.query_time
+        for name, elapsed in other.spans.items():
+            self.add_span(name, elapsed)
+
+
+def current_probe() -> Optional[Probe]:
+    return _current.get()
+
+
+def activate(probe: Optional[Probe]):
+    return _current.set(probe)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def run_in_context(context: Context, func, *args):
+    """
+    在其他线程中代请求执行 func，context 为请求线程中 contextvars.copy_context() 的结果
+    请求被采样时，本线程数据库连接上的 SQL 和其间的埋点记录到单独的探针，执行后并入请求的探针
+    """
+    parent = context.get(_current)
+    if parent is None:
+        return context.run(func, *args)
+
+    probe = Probe()
+
+    def call():
+        _current.set(probe)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(probe.db_wrapper))
+            return func(*args)
+
+    try:
+        return context.run(call)
+    finally:
+        parent.merge(probe)
+
+
+@contextmanager
+def span(name: str):
+    """
+    埋点：记录代码块耗时（扣除其间的 SQL 耗时，SQL 单独统计）
+    当前请求未被采样时不做任何记录
+    """
+    probe = _current.get()
+    if probe is None:
+        yield
+        return
+    query_time = probe.query_time
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start - (probe.query_time - query_time)
+        probe.add_span(name, max(elapsed, 0.0))
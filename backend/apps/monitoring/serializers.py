@@ -0,0 +1,24 @@
+from rest_framework import serializers
+
+from .probe import span
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    """记录序列化耗时的列表序列化器"""
+
+    @property
+    def data(self):
+        with span("serialize"):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    记录序列化耗时（埋点名称 serialize）
+    many=True 时需同时在 Meta 中指定 list_serializer_class = TimedListSerializer
+    """
+
+    @property
+    def data(self):
+        with span("serialize"):
+            return super().data
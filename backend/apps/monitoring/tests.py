@@ -0,0 +1,23 @@
+from django.test import SimpleTestCase, override_settings
+
+from .metrics import REQUEST_DURATION
+
+
+@override_settings(METRICS_SAMPLE_RATE=0)
+class InstrumentationTests(SimpleTestCase):
+    def setUp(self):
+        REQUEST_DURATION.reset()
+        self.addCleanup(REQUEST_DURATION.reset)
+
+    def methods(self):
+        return {method for _, method, _ in REQUEST_DURATION.series}
+
+    def test_standard_method_is_kept(self):
+        self.client.get("/metrics")
+        self.assertEqual(self.methods(), {"GET"})
+
+    def test_arbitrary_method_is_collapsed(self):
+        for method in ("FOO", "BAR", "PROPFIND"):
+            self.client.generic(method, "/metrics")
+        self.assertEqual(self.methods(), {"other"})
+        self.assertIn('method="other"', self.client.get("/metrics").content.decode())
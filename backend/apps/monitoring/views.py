@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .metrics import render_metrics
+
+
+def metrics(request):
+    """Prometheus 指标（只允许 METRICS_ALLOWED_IPS 中的地址访问）"""
+    allowed = getattr(settings, "METRICS_ALLOWED_IPS", ("127.0.0.1", "::1"))
+    if "*" not in allowed and request.META.get("REMOTE_ADDR") not in allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
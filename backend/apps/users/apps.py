@@ -1,7 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save, pre_save
 
 
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.users"
     verbose_name = "用户管理"
+
+    def ready(self):
+        from .authentication import user_deleted, user_pre_save, user_saved
+
+        User = self.get_model("User")
+        pre_save.connect(user_pre_save, sender=User)
+        post_save.connect(user_saved, sender=User)
+        post_delete.connect(user_deleted, sender=User)
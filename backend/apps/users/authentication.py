@@ -0,0 +1,186 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication as BaseJWTAuthentication,
+)
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.monitoring.probe import span
+
+User = get_user_model()
+
+# 写入访问令牌的用户声明（见 apps.users.serializers.TokenObtainPairSerializer）
+USER_CLAIMS = ("username", "student_id", "role", "is_staff", "is_superuser")
+# 决定权限的声明：变更后吊销已签发的令牌；令牌声明为管理员时总是从数据库加载用户
+PRIVILEGE_CLAIMS = ("role", "is_staff", "is_superuser")
+# 令牌中记录从数据库读取上述声明的时间（浮点秒），吊销时据此判断令牌先后
+CLAIMS_TIME = "claims_at"
+# 共享缓存中记录主动吊销的用户 id 及吊销时间
+REVOKED_KEY = "auth:revoked_users"
+
+
+class RevocationList:
+    """
+    已停用或令牌被吊销的用户（进程内缓存）
+    每 ttl 秒从数据库（is_active=False）和共享缓存（revoke_user_tokens）重新加载一次，
+    本进程内的停用、吊销立即生效。吊销只拒绝吊销时间之前签发的令牌，重新登录或刷新后的令牌不受影响
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inactive = frozenset()
+        self.revoked = {}
+        self.loaded_at = None
+
+    def refresh(self):
+        inactive = User.objects.filter(is_active=False).values_list("pk", flat=True)
+        self.inactive = frozenset(inactive)
+        self.revoked = dict(cache.get(REVOKED_KEY) or {})
+        self.loaded_at = time.monotonic()
+
+    def rejects(self, user_id, issued_at) -> bool:
+        """用户已停用，或令牌中的声明读取于吊销之前"""
+        ttl = getattr(settings, "JWT_REVOCATION_TTL", 30)
+        if self.loaded_at is None or time.monotonic() - self.loaded_at >= ttl:
+            with self.lock:
+                if self.loaded_at is None or time.monotonic() - self.loaded_at >= ttl:
+                    self.refresh()
+        if user_id in self.inactive:
+            return True
+        revoked_at = self.revoked.get(user_id)
+        # 没有签发时间的令牌无法判断先后，按已吊销处理
+        return revoked_at is not None and (issued_at is None or issued_at < revoked_at)
+
+    def deactivate(self, user_id):
+        with self.lock:
+            self.inactive = self.inactive | {user_id}
+
+    def revoke(self, user_id, revoked_at):
+        with self.lock:
+            self.revoked = {**self.revoked, user_id: revoked_at}
+
+    def clear(self):
+        with self.lock:
+            self.inactive = frozenset()
+            self.revoked = {}
+            self.loaded_at = None
+
+
+revocations = RevocationList()
+
+
+def revoke_user_tokens(user_id):
+    """
+    吊销用户此前签发的访问令牌（修改角色、权限时自动调用），在访问令牌有效期内生效
+    其他进程最迟在 JWT_REVOCATION_TTL 秒后生效
+    """
+    revoked_at = time.time()
+    timeout = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    revoked = {
+        pk: at
+        for pk, at in (cache.get(REVOKED_KEY) or {}).items()
+        if at > revoked_at - timeout
+    }
+    revoked[user_id] = revoked_at
+    cache.set(REVOKED_KEY, revoked, timeout)
+    revocations.revoke(user_id, revoked_at)
+
+
+def write_user_claims(token, user):
+    """把用户声明写入令牌（刷新令牌中的声明会复制到由它签发的访问令牌）"""
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[CLAIMS_TIME] = time.time()
+
+
+def user_pre_save(sender, instance, update_fields=None, **kwargs):
+    """记录角色、权限是否变更（pre_save 信号处理函数）"""
+    instance._privileges_changed = False
+    if instance.pk is None or (
+        update_fields is not None and not set(update_fields) & set(PRIVILEGE_CLAIMS)
+    ):
+        return
+    saved = sender.objects.filter(pk=instance.pk).values(*PRIVILEGE_CLAIMS).first()
+    instance._privileges_changed = saved is not None and any(
+        saved[claim] != getattr(instance, claim) for claim in PRIVILEGE_CLAIMS
+    )
+
+
+def user_saved(sender, instance, **kwargs):
+    """用户被停用时立即拒绝其令牌，角色、权限变更时吊销已签发的令牌（post_save 信号处理函数）"""
+    if not instance.is_active:
+        revocations.deactivate(instance.pk)
+    if getattr(instance, "_privileges_changed", False):
+        # 提交后再吊销：提交前刷新的令牌读到的仍是旧声明，其读取时间早于吊销时间
+        transaction.on_commit(lambda: revoke_user_tokens(instance.pk))
+
+
+def user_deleted(sender, instance, **kwargs):
+    """用户被删除时立即拒绝其令牌，并吊销已签发的令牌使其他进程也拒绝（post_delete 信号处理函数）"""
+    user_id = instance.pk
+    revocations.deactivate(user_id)
+    transaction.on_commit(lambda: revoke_user_tokens(user_id))
+
+
+def is_privileged(claims) -> bool:
+    """令牌声明的用户是否为管理员"""
+    return bool(
+        claims.get("is_staff")
+        or claims.get("is_superuser")
+        or claims.get("role") == "admin"
+    )
+
+
+class JWTAuthentication(BaseJWTAuthentication):
+    """JWT 认证（记录令牌解码和用户查询的耗时，埋点名称 auth）"""
+
+    def authenticate(self, request):
+        with span("auth"):
+            return super().authenticate(request)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    无状态 JWT 认证（用于选课等高频接口）
+    信任访问令牌中签名的用户声明，直接构造用户对象而不查询用户表；
+    未写入的字段为延迟字段，访问时才从数据库加载。
+    停用或被吊销的用户通过 RevocationList 拒绝；缺少声明的旧令牌，以及声明为管理员的令牌
+    （管理员权限以数据库为准）按普通方式认证
+    """
+
+    def get_user(self, validated_token):
+        if (
+            not getattr(settings, "JWT_STATELESS_AUTH", True)
+            or any(claim not in validated_token for claim in USER_CLAIMS)
+            or is_privileged(validated_token)
+        ):
+            return super().get_user(validated_token)
+        try:
+            # 令牌中的用户标识为字符串，转换为主键类型
+            user_id = User._meta.pk.to_python(
+                validated_token[api_settings.USER_ID_CLAIM]
+            )
+        except (KeyError, ValidationError) as e:
+            raise InvalidToken("令牌中没有用户标识") from e
+        issued_at = validated_token.get(CLAIMS_TIME, validated_token.get("iat"))
+        if revocations.rejects(user_id, issued_at):
+            raise AuthenticationFailed("用户已停用或令牌已被吊销", code="user_inactive")
+
+        values = {claim: validated_token[claim] for claim in USER_CLAIMS}
+        values.update({api_settings.USER_ID_FIELD: user_id, "is_active": True})
+        # from_db 要求字段按模型中的定义顺序传入
+        fields = [
+            field.attname
+            for field in User._meta.concrete_fields
+            if field.attname in values
+        ]
+        return User.from_db(
+            DEFAULT_DB_ALIAS, fields, [values[field] for field in fields]
+        )
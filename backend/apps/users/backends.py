@@ -0,0 +1,68 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend as BaseModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+
+User = get_user_model()
+
+
+class HashPool:
+    """
+    密码哈希线程池
+    哈希计算（hashlib 会释放 GIL）限制在 LOGIN_HASH_WORKERS 个线程内执行，
+    登录高峰时其余请求排队等待，不会占满 CPU 拖慢选课等接口；pending 为排队和执行中的任务数
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pending = 0
+
+    def run(self, func, *args):
+        with self.lock:
+            if self.executor is None:
+                workers = (
+                    getattr(settings, "LOGIN_HASH_WORKERS", None) or os.cpu_count()
+                )
+                self.executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="password-hash"
+                )
+            self.pending += 1
+        try:
+            return self.executor.submit(func, *args).result()
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+
+hash_pool = HashPool()
+
+
+class ModelBackend(BaseModelBackend):
+    """用户名密码认证（在哈希线程池中校验密码，哈希强度低于配置时登录成功后重新计算）"""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # 用户不存在时同样计算一次哈希，避免通过响应时间判断用户名是否存在
+            hash_pool.run(make_password, password)
+            return None
+
+        # 哈希算法与当前配置不一致或迭代次数低于配置时，check_password 会调用 setter
+        outdated = []
+        valid = hash_pool.run(check_password, password, user.password, outdated.append)
+        if not (valid and self.user_can_authenticate(user)):
+            return None
+        if outdated:
+            user.password = hash_pool.run(make_password, password)
+            user.save(update_fields=["password"])
+        return user
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher as BasePBKDF2PasswordHasher
+from django.contrib.auth.hashers import must_update_salt
+
+
+class PBKDF2PasswordHasher(BasePBKDF2PasswordHasher):
+    """
+    迭代次数可配置的 PBKDF2-SHA256 哈希（PASSWORD_PBKDF2_ITERATIONS，未配置时与 Django 默认相同）
+    与 Django 默认哈希格式相同；迭代次数低于配置的旧哈希在用户登录成功时自动重新计算，
+    高于配置的哈希保持不变，调低配置不会降低已有哈希的强度
+    """
+
+    @property
+    def iterations(self):
+        return (
+            getattr(settings, "PASSWORD_PBKDF2_ITERATIONS", None) or super().iterations
+        )
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return decoded["iterations"] < self.iterations or must_update_salt(
+            decoded["salt"], self.salt_entropy
+        )
@@ -1,6 +1,14 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import get_user_model
 
+from .authentication import write_user_claims
+
 User = get_user_model()
 
 
@@ -80,3 +88,45 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         print(f"是否是超级用户: {user.is_superuser}")
         print(f"是否激活: {user.is_active}\n")
         return user
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    """登录序列化器（在令牌中写入用户声明，供无状态认证使用）"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        write_user_claims(token, user)
+        return token
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """
+    刷新令牌序列化器
+    按数据库中的用户重新写入声明，角色、权限变更后刷新即生效，不会沿用旧令牌中的声明
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+        write_user_claims(refresh, user)
+
+        data = {"access": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    # 未安装 token_blacklist 应用
+                    pass
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+        return data
@@ -0,0 +1,151 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher as BasePBKDF2PasswordHasher
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from apps.courses.models import Course
+
+from .authentication import revocations
+from .backends import ModelBackend
+from .hashers import PBKDF2PasswordHasher
+
+User = get_user_model()
+
+
+class PrivilegeChangeTests(APITestCase):
+    """角色、权限变更后旧令牌中的声明不再生效"""
+
+    def setUp(self):
+        cache.clear()
+        revocations.clear()
+        self.admin = User.objects.create_user(
+            "admin", password="password123", student_id="1", is_staff=True
+        )
+        self.course = Course.objects.create(
+            name="课程",
+            course_code="C1",
+            teacher="教师",
+            classroom="J1-101",
+            capacity=10,
+            time_slot="周一第1-2节",
+        )
+        response = self.client.post(
+            "/api/users/token/", {"username": "admin", "password": "password123"}
+        )
+        self.tokens = response.json()
+
+    def demote(self):
+        self.admin.is_staff = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.save()
+
+    def delete_course(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return self.client.delete(f"/api/courses/courses/{self.course.pk}/")
+
+    def test_refresh_rebuilds_claims(self):
+        self.demote()
+        response = self.client.post(
+            "/api/users/token/refresh/", {"refresh": self.tokens["refresh"]}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AccessToken(response.json()["access"])["is_staff"])
+        self.assertFalse(RefreshToken(response.json()["refresh"])["is_staff"])
+        self.assertEqual(self.delete_course(response.json()["access"]).status_code, 403)
+        self.assertTrue(Course.objects.filter(pk=self.course.pk).exists())
+
+    def test_old_access_token_denied(self):
+        self.demote()
+        self.assertEqual(self.delete_course(self.tokens["access"]).status_code, 403)
+
+    def test_student_token_is_not_admin(self):
+        User.objects.create_user("student", password="password123", student_id="2")
+        tokens = self.client.post(
+            "/api/users/token/", {"username": "student", "password": "password123"}
+        ).json()
+        self.assertEqual(self.delete_course(tokens["access"]).status_code, 403)
+
+    def test_role_change_revokes_tokens(self):
+        User.objects.create_user("student", password="password123", student_id="2")
+        tokens = self.client.post(
+            "/api/users/token/", {"username": "student", "password": "password123"}
+        ).json()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get("/api/courses/courses/").status_code, 200)
+
+        student = User.objects.get(username="student")
+        student.role = "admin"
+        with self.captureOnCommitCallbacks(execute=True):
+            student.save()
+        self.assertEqual(self.client.get("/api/courses/courses/").status_code, 401)
+
+    def test_admin_claims_checked_against_database(self):
+        # 绕过信号直接修改数据库，令牌仍声明为管理员
+        User.objects.filter(pk=self.admin.pk).update(is_staff=False)
+        self.assertEqual(self.delete_course(self.tokens["access"]).status_code, 403)
+
+    def test_unrelated_save_keeps_tokens(self):
+        self.admin.email = "admin@example.com"
+        self.admin.save()
+        self.assertEqual(self.delete_course(self.tokens["access"]).status_code, 204)
+
+
+class DeletedUserTests(APITestCase):
+    """删除用户后其令牌不再通过无状态认证"""
+
+    def setUp(self):
+        cache.clear()
+        revocations.clear()
+        self.student = User.objects.create_user(
+            "student", password="password123", student_id="1"
+        )
+        tokens = self.client.post(
+            "/api/users/token/", {"username": "student", "password": "password123"}
+        ).json()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+    def test_delete_revokes_tokens(self):
+        self.assertEqual(self.client.get("/api/courses/courses/").status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.delete()
+        self.assertEqual(self.client.get("/api/courses/courses/").status_code, 401)
+
+    def test_delete_revoked_in_other_processes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.delete()
+        # 其他进程没有收到信号，从共享缓存加载吊销记录
+        revocations.clear()
+        self.assertEqual(self.client.get("/api/courses/courses/").status_code, 401)
+
+
+class PasswordRehashTests(TestCase):
+    """登录时只把迭代次数更低的哈希重新计算为配置的迭代次数，不降低已有哈希的强度"""
+
+    def login(self, encoded):
+        user = User.objects.create(username="student", student_id="1", password=encoded)
+        authenticated = ModelBackend().authenticate(
+            None, username="student", password="password123"
+        )
+        self.assertEqual(authenticated.pk, user.pk)
+        user.refresh_from_db()
+        return PBKDF2PasswordHasher().decode(user.password)["iterations"]
+
+    def test_default_iterations(self):
+        self.assertEqual(
+            PBKDF2PasswordHasher().iterations,
+            BasePBKDF2PasswordHasher.iterations,
+        )
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_stronger_hash_kept(self):
+        encoded = PBKDF2PasswordHasher().encode("password123", "salt" * 6, 2000)
+        self.assertEqual(self.login(encoded), 2000)
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=2000)
+    def test_weaker_hash_upgraded(self):
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            encoded = make_password("password123")
+        self.assertEqual(self.login(encoded), 2000)
@@ -0,0 +1,61 @@
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from .backends import hash_pool
+
+
+class TokenBucket:
+    """令牌桶：每秒补充 rate 个令牌，最多积累 burst 个"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tokens = None
+        self.updated_at = None
+
+    def take(self, rate, burst) -> float:
+        """取一个令牌，成功返回 0，否则返回需要等待的秒数"""
+        with self.lock:
+            now = time.monotonic()
+            if self.tokens is None:
+                self.tokens = burst
+            else:
+                elapsed = now - self.updated_at
+                self.tokens = min(burst, self.tokens + elapsed * rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / rate
+
+
+login_bucket = TokenBucket()
+
+
+class LoginAdmissionThrottle(BaseThrottle):
+    """
+    登录准入控制（按进程统计，不区分用户）
+    每秒接受 LOGIN_RATE 个登录请求（允许突发 LOGIN_BURST 个），
+    等待密码校验的请求超过 LOGIN_MAX_PENDING 时同样拒绝；被拒绝的请求返回 429 和 Retry-After
+    """
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def allow_request(self, request, view):
+        max_pending = getattr(settings, "LOGIN_MAX_PENDING", None)
+        if max_pending is not None and hash_pool.pending >= max_pending:
+            self.wait_seconds = 1.0
+            return False
+
+        rate = getattr(settings, "LOGIN_RATE", None)
+        if not rate:
+            return True
+        burst = getattr(settings, "LOGIN_BURST", None) or rate
+        self.wait_seconds = login_bucket.take(rate, burst)
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
@@ -1,10 +1,10 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import UserRegisterView, UserProfileView
+from rest_framework_simplejwt.views import TokenRefreshView
+from .views import LoginView, UserRegisterView, UserProfileView
 
 urlpatterns = [
     # JWT认证相关
-    path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("token/", LoginView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     # 用户相关
     path("register/", UserRegisterView.as_view(), name="user_register"),
@@ -3,10 +3,17 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
 from .serializers import UserSerializer, UserRegisterSerializer
+from .throttling import LoginAdmissionThrottle
 
 User = get_user_model()
 
 
+class LoginView(TokenObtainPairView):
+    """登录视图（获取 JWT，登录请求过多时返回 429）"""
+
+    throttle_classes = (LoginAdmissionThrottle,)
+
+
 class UserRegisterView(generics.CreateAPIView):
     """用户注册视图"""
 
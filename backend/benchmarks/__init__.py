@@ -0,0 +1,5 @@
+"""
+性能基准测试
+每个脚本都在临时 SQLite 数据库上运行，不会影响开发数据库
+运行方式（在 backend 目录下）：python -m benchmarks.bench_seats
+"""
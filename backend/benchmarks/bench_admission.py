@@ -0,0 +1,102 @@
+"""
+热门课程选课排队基准测试
+大量学生同时抢选同一门课程，比较直接争抢课程行（COURSE_ADMISSION_QUEUE=False）
+与按课程排队时的吞吐量、延迟分布、请求线程中的查询数，以及名额是否超卖
+
+示例：python -m benchmarks.bench_admission --students 400 --capacity 100 --threads 16
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+
+from benchmarks.common import Timer, setup_django, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=400, help="每种方式的学生数")
+    parser.add_argument("--capacity", type=int, default=100, help="热门课程容量")
+    parser.add_argument("--threads", type=int, default=16, help="并发线程数")
+    args = parser.parse_args()
+
+    setup_django(ALLOWED_HOSTS=["testserver"])
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    from apps.courses.models import Course, StudentCourse
+    from benchmarks.bench_batch_select import seed
+
+    User = get_user_model()
+    lock = threading.Lock()
+    query_count = [0]
+
+    def count_queries(execute, sql, params, many, context):
+        with lock:
+            query_count[0] += 1
+        return execute(sql, params, many, context)
+
+    report = {"students": args.students, "capacity": args.capacity, "modes": {}}
+    for name, enabled in (("direct", False), ("queued", True)):
+        course_id = seed(1, prefix=f"{name}-hot")[0]
+        Course.objects.filter(pk=course_id).update(capacity=args.capacity)
+        pending = queue.Queue()
+        for index in range(args.students):
+            pending.put(
+                User.objects.create_user(
+                    f"{name}{index}", password="x", student_id=f"{name}{index}"
+                )
+            )
+        samples, statuses = [], {}
+
+        def worker():
+            client = APIClient()
+            with connection.execute_wrapper(count_queries):
+                while True:
+                    try:
+                        user = pending.get_nowait()
+                    except queue.Empty:
+                        break
+                    client.force_authenticate(user)
+                    start = time.perf_counter()
+                    response = client.post(
+                        f"/api/courses/courses/{course_id}/select_course/"
+                    )
+                    with lock:
+                        samples.append(time.perf_counter() - start)
+                        statuses[response.status_code] = (
+                            statuses.get(response.status_code, 0) + 1
+                        )
+            connection.close()
+
+        query_count[0] = 0
+        with override_settings(COURSE_ADMISSION_QUEUE=enabled):
+            threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+            with Timer() as timer:
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        course = Course.objects.get(pk=course_id)
+        result = summarize(samples)
+        result["requests_per_sec"] = round(len(samples) / timer.elapsed, 1)
+        result["statuses"] = statuses
+        # 排队模式下选课在排队线程中执行，只统计请求线程的查询
+        result["request_thread_queries"] = query_count[0]
+        result["selected_count"] = course.selected_count
+        # 没有超卖，且已选人数与选课记录一致
+        result["consistent"] = (
+            course.selected_count <= course.capacity
+            and StudentCourse.objects.filter(course_id=course_id).count()
+            == course.selected_count
+        )
+        report["modes"][name] = result
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+批量选课基准测试
+比较逐门调用 select_course 与一次调用 batch 组成一张课表时的 SQL 查询数和耗时
+
+示例：python -m benchmarks.bench_batch_select --courses 10 --students 200
+"""
+import argparse
+import json
+
+from benchmarks.common import Timer, setup_django, summarize
+
+
+def seed(courses, prefix="B"):
+    """生成互不冲突的课程（每门课占用不同的星期和节次），课程号以 prefix 开头"""
+    from apps.courses.models import Course
+
+    created = []
+    for index in range(courses):
+        day = "一二三四五"[index % 5]
+        start = 1 + 2 * (index // 5)
+        created.append(
+            Course.objects.create(
+                name=f"课程{index}",
+                course_code=f"{prefix}{index}",
+                teacher="教师",
+                classroom="J1-101",
+                capacity=100000,
+                time_slot=f"周{day}第{start}-{start + 1}节",
+            )
+        )
+    return [course.pk for course in created]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=10, help="每张课表的课程数")
+    parser.add_argument("--students", type=int, default=200, help="每种方式的学生数")
+    args = parser.parse_args()
+
+    setup_django(ALLOWED_HOSTS=["testserver"])
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    query_count = [0]
+
+    def count_queries(execute, sql, params, many, context):
+        query_count[0] += 1
+        return execute(sql, params, many, context)
+
+    course_ids = seed(args.courses)
+    User = get_user_model()
+
+    def single(client):
+        for pk in course_ids:
+            response = client.post(f"/api/courses/courses/{pk}/select_course/")
+            assert response.status_code == 200, response.content
+
+    def batch(client):
+        response = client.post(
+            "/api/courses/courses/batch/", {"add": course_ids}, format="json"
+        )
+        assert response.status_code == 200, response.content
+
+    report = {"courses": args.courses, "students": args.students, "modes": {}}
+    for name, build in (("select_course", single), ("batch", batch)):
+        samples, queries = [], []
+        for index in range(args.students):
+            user = User.objects.create_user(
+                f"{name}{index}", password="x", student_id=f"{name}{index}"
+            )
+            client = APIClient()
+            client.force_authenticate(user)
+            query_count[0] = 0
+            with connection.execute_wrapper(count_queries), Timer() as timer:
+                build(client)
+            samples.append(timer.elapsed)
+            queries.append(query_count[0])
+        result = summarize(samples)
+        result["queries_per_schedule"] = max(queries)
+        report["modes"][name] = result
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
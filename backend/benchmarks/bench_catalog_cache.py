@@ -0,0 +1,112 @@
+"""
+课程目录缓存基准测试
+模拟选课期间学生反复刷新课程列表和详情，比较不缓存、各缓存后端以及
+ETag 协商（304）下的每秒请求数
+
+示例：python -m benchmarks.bench_catalog_cache --courses 5000 --requests 3000
+"""
+import argparse
+import json
+import random
+import tempfile
+
+from benchmarks.common import Timer, setup_django, summarize
+
+BACKENDS = {
+    "none": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    "locmem_lru": {
+        "BACKEND": "apps.courses.cache.SizeLimitedLocMemCache",
+        "LOCATION": "bench-catalog",
+        "OPTIONS": {"MAX_ENTRIES": 10000, "MAX_SIZE": 64 * 1024 * 1024},
+    },
+    "file": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache"},
+    "db": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "bench_catalog_cache",
+    },
+}
+
+
+def build_urls(course_ids, count, seed=7):
+    """请求序列：列表首页、常用筛选条件和热门课程详情"""
+    rng = random.Random(seed)
+    pages = [
+        "/api/courses/courses/",
+        "/api/courses/courses/?has_seats=true",
+        "/api/courses/courses/?weekday=1",
+        "/api/courses/courses/?search=英语",
+    ]
+    hot = rng.sample(course_ids, min(200, len(course_ids)))
+    urls = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            urls.append(rng.choice(pages))
+        else:
+            urls.append(f"/api/courses/courses/{rng.choice(hot)}/")
+    return urls
+
+
+def run(client, urls, revalidate):
+    """依次发出请求；revalidate 为 True 时模拟浏览器携带上次的 ETag"""
+    etags = {}
+    samples = []
+    statuses = {}
+    with Timer() as timer:
+        for url in urls:
+            headers = {}
+            if revalidate and url in etags:
+                headers["HTTP_IF_NONE_MATCH"] = etags[url]
+            with Timer() as request_timer:
+                response = client.get(url, **headers)
+            samples.append(request_timer.elapsed)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.has_header("ETag"):
+                etags[url] = response["ETag"]
+    result = summarize(samples)
+    result["requests_per_s"] = round(len(urls) / timer.elapsed, 1)
+    result["statuses"] = statuses
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=5000, help="课程数")
+    parser.add_argument("--requests", type=int, default=3000, help="每种模式的请求数")
+    args = parser.parse_args()
+
+    setup_django(ALLOWED_HOSTS=["testserver"])
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    from apps.courses.models import Course
+    from benchmarks.bench_catalog_search import seed
+
+    seed(args.courses)
+    user = get_user_model().objects.create_user("bench", password="x", student_id="1")
+    client = APIClient()
+    client.force_authenticate(user)
+    urls = build_urls(list(Course.objects.values_list("id", flat=True)), args.requests)
+
+    report = {"courses": args.courses, "requests": args.requests, "modes": {}}
+    with tempfile.TemporaryDirectory(prefix="course-cache-") as cache_dir:
+        BACKENDS["file"]["LOCATION"] = cache_dir
+        for name, backend in BACKENDS.items():
+            with override_settings(
+                CACHES={"default": BACKENDS["locmem_lru"], "course_catalog": backend}
+            ):
+                if name == "db":
+                    call_command("createcachetable", verbosity=0)
+                report["modes"][name] = run(client, urls, revalidate=False)
+                if name == "locmem_lru":
+                    report["modes"]["locmem_lru+etag"] = run(client, urls, revalidate=True)
+
+    baseline = report["modes"]["none"]["requests_per_s"]
+    for result in report["modes"].values():
+        result["speedup"] = round(result["requests_per_s"] / baseline, 2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
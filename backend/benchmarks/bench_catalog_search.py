@@ -0,0 +1,95 @@
+"""
+课程检索基准测试
+用全校总课表生成约 10 万门课程，测量课程列表各筛选条件的查询耗时，
+并与不使用全文索引的 LIKE 查询对比
+
+示例：python -m benchmarks.bench_catalog_search --courses 100000
+"""
+import argparse
+import json
+import time
+
+from benchmarks.common import TIMETABLE_CSV, Timer, setup_django, summarize
+
+
+def seed(courses):
+    """按课表循环生成指定数量的课程（教学班加序号保证唯一）"""
+    from apps.courses.importers import CourseImporter
+    from apps.courses.utils import CSVParser
+
+    rows = CSVParser().parse(str(TIMETABLE_CSV))
+    generated = []
+    for index in range(courses):
+        row = dict(rows[index % len(rows)])
+        row["section_code"] = f"{row['section_code']}-{index}"
+        generated.append(row)
+    return CourseImporter(batch_size=1000).run(generated)
+
+
+def measure(request_factory, view, user, query, repeat):
+    """多次请求课程列表接口，返回耗时统计"""
+    from rest_framework.test import force_authenticate
+
+    samples = []
+    count = 0
+    for _ in range(repeat):
+        request = request_factory.get("/api/courses/courses/", query)
+        force_authenticate(request, user=user)
+        start = time.perf_counter()
+        response = view(request)
+        response.render()
+        samples.append(time.perf_counter() - start)
+        count = len(response.data["results"])
+    result = summarize(samples)
+    result["results"] = count
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=100000, help="课程数")
+    parser.add_argument("--repeat", type=int, default=20, help="每个查询的重复次数")
+    args = parser.parse_args()
+
+    setup_django(ALLOWED_HOSTS=["testserver"])
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIRequestFactory
+
+    from apps.courses import filters
+    from apps.courses.views import CourseViewSet
+
+    with Timer() as timer:
+        seed(args.courses)
+    user = get_user_model().objects.create_user("bench", password="x", student_id="1")
+    view = CourseViewSet.as_view({"get": "list"})
+    factory = APIRequestFactory()
+
+    queries = {
+        "list": {},
+        "search_name": {"search": "国际贸易"},
+        "search_teacher_short": {"search": "蔡丞"},
+        "search_code": {"search": "80508"},
+        "weekday_period": {"weekday": "3", "period": "6"},
+        "has_seats": {"has_seats": "true"},
+        "college_credit": {"college": "财税学院", "credit": "2.0"},
+        "combined": {"search": "英语", "weekday": "2", "has_seats": "true"},
+    }
+    report = {"courses": args.courses, "seed_s": round(timer.elapsed, 1), "queries": {}}
+    for name, query in queries.items():
+        query = {"fields": "id,name,teacher,time_slot,selected_count,capacity", **query}
+        report["queries"][name] = measure(factory, view, user, query, args.repeat)
+
+    # 关闭全文索引，对比 LIKE 查询
+    filters._fts_available = False
+    for name in ("search_name", "search_code"):
+        query = {"fields": "id,name,teacher,time_slot,selected_count,capacity"}
+        query.update(queries[name])
+        report["queries"][name + "_like"] = measure(
+            factory, view, user, query, args.repeat
+        )
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
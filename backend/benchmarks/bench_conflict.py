@@ -0,0 +1,222 @@
+"""
+课程冲突检测基准测试
+在仓库自带的全校总课表上比较两种冲突检测方式：
+- legacy：逐对调用 ConflictChecker.check_conflicts（每次都重新解析时间字符串）
+- bitmap：课表位图（每种时间字符串只编译一次，检测为一次按位与）
+另外比较批量检查（每个学生一组候选课程，找出全部冲突）：逐对比较 vs ConflictIndex.check，
+以及不区分上课周时误报的冲突数；
+随索引中的课程数增长（直到全校课表），比较逐对比较与 ConflictIndex 每个候选课程的检查耗时
+
+示例：python -m benchmarks.bench_conflict --schedule-size 8 --checks 20000
+"""
+
+import argparse
+import csv
+import json
+import random
+import re
+import sys
+
+from benchmarks.common import BACKEND_DIR, TIMETABLE_CSV, Timer
+
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from apps.courses.schedule import (  # noqa: E402
+    ConflictIndex,
+    combine,
+    compile_time_slot,
+)
+from apps.courses.utils import ConflictChecker, normalize_time_slot  # noqa: E402
+
+WEEKS_PATTERN = re.compile(r"\{[^}]*\}")
+
+
+def load_time_slots(path):
+    """
+    读取课表中的上课时间，每条返回四种写法：
+    入库格式 "周四第4-5节{1-16周}"、旧解析器支持的 "周四 4-5节"、原始格式、去掉上课周的 "周四第4-5节"
+    """
+    with open(path, encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    header_index = next(i for i, row in enumerate(rows) if "上课时间" in row)
+    column = rows[header_index].index("上课时间")
+    slots = []
+    for row in rows[header_index + 1 :]:
+        raw = row[column].strip() if len(row) > column else ""
+        if not raw:
+            continue
+        # 与解析器入库时的标准化保持一致
+        stored = normalize_time_slot(raw)
+        week_blind = WEEKS_PATTERN.sub("", stored)
+        slots.append((stored, week_blind.replace("第", " "), raw, week_blind))
+    return slots
+
+
+class Slot:
+    """只有上课时间的课程，供 ConflictIndex 使用"""
+
+    def __init__(self, time_slot):
+        self.schedule_mask = compile_time_slot(time_slot)
+
+
+def run_bulk_pairs(schedules, candidate_lists):
+    """逐对比较候选课程与已选课程的位图，找出全部冲突"""
+    conflicts = 0
+    for schedule, candidates in zip(schedules, candidate_lists):
+        masks = [compile_time_slot(existing) for existing in schedule]
+        for candidate in candidates:
+            mask = compile_time_slot(candidate)
+            conflicts += sum(1 for other in masks if mask & other)
+    return conflicts
+
+
+def run_bulk_index(schedules, candidate_lists):
+    """ConflictIndex 一次检查一组候选课程（元素为 Slot）"""
+    conflicts = 0
+    for schedule, candidates in zip(schedules, candidate_lists):
+        results = ConflictIndex(schedule).check(candidates)
+        conflicts += sum(len(found) for found in results.values())
+    return conflicts
+
+
+def run_scaling(slots, sizes, candidates, rng):
+    """索引中的课程数从小到大：逐对比较 vs ConflictIndex.check（每个候选课程的耗时）"""
+    results = []
+    for size in sizes:
+        courses = [Slot(value) for value in rng.sample(slots, min(size, len(slots)))]
+        checked = [Slot(value) for value in rng.sample(slots, candidates)]
+        with Timer() as pairs:
+            pair_conflicts = sum(
+                1
+                for candidate in checked
+                for course in courses
+                if candidate.schedule_mask & course.schedule_mask
+            )
+        index = ConflictIndex(courses)
+        # 与 compile_time_slot 一样，weekly_slots 在进程中按位图缓存，预热后计时
+        index.check(checked)
+        with Timer() as indexed:
+            index_conflicts = sum(len(found) for found in index.check(checked).values())
+        results.append(
+            {
+                "format": "index_size",
+                "courses": len(courses),
+                "candidates": candidates,
+                "pairs_us_per_candidate": round(pairs.elapsed / candidates * 1e6, 2),
+                "index_us_per_candidate": round(indexed.elapsed / candidates * 1e6, 2),
+                "speedup": round(pairs.elapsed / indexed.elapsed, 1),
+                "conflicts": index_conflicts,
+                "pairs_conflicts": pair_conflicts,
+            }
+        )
+    return results
+
+
+def run_legacy(schedules, candidates):
+    conflicts = 0
+    for schedule, candidate in zip(schedules, candidates):
+        for existing in schedule:
+            has_conflict, _ = ConflictChecker.check_conflicts(candidate, existing)
+            if has_conflict:
+                conflicts += 1
+                break
+    return conflicts
+
+
+def run_bitmap(schedules, candidates):
+    conflicts = 0
+    for schedule, candidate in zip(schedules, candidates):
+        combined = combine(compile_time_slot(existing) for existing in schedule)
+        if compile_time_slot(candidate) & combined:
+            conflicts += 1
+    return conflicts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default=str(TIMETABLE_CSV), help="课表 CSV 路径")
+    parser.add_argument(
+        "--schedule-size", type=int, default=8, help="每个学生已选课程数"
+    )
+    parser.add_argument("--checks", type=int, default=20000, help="冲突检测次数")
+    parser.add_argument(
+        "--candidates", type=int, default=10, help="批量检查的候选课程数"
+    )
+    parser.add_argument(
+        "--index-sizes",
+        default="8,64,512,100000",
+        help="逐级增大的索引课程数（逗号分隔，超过课表行数时取全部）",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    slots = load_time_slots(args.csv)
+    rng = random.Random(args.seed)
+    results = []
+    for fmt, index in (("stored", 0), ("spaced", 1), ("raw", 2), ("week_blind", 3)):
+        values = [slot[index] for slot in slots]
+        schedules = [rng.sample(values, args.schedule_size) for _ in range(args.checks)]
+        candidates = [rng.choice(values) for _ in range(args.checks)]
+
+        compile_time_slot.cache_clear()
+        with Timer() as legacy:
+            legacy_conflicts = run_legacy(schedules, candidates)
+        with Timer() as bitmap:
+            bitmap_conflicts = run_bitmap(schedules, candidates)
+
+        results.append(
+            {
+                "format": fmt,
+                "rows": len(slots),
+                "checks": args.checks,
+                "schedule_size": args.schedule_size,
+                "legacy_us_per_check": round(legacy.elapsed / args.checks * 1e6, 2),
+                "bitmap_us_per_check": round(bitmap.elapsed / args.checks * 1e6, 2),
+                "speedup": round(legacy.elapsed / bitmap.elapsed, 1),
+                "legacy_conflicts": legacy_conflicts,
+                "bitmap_conflicts": bitmap_conflicts,
+                "compiled_patterns": compile_time_slot.cache_info().currsize,
+            }
+        )
+
+    stored = [slot[0] for slot in slots]
+    week_blind = dict(zip(stored, (slot[3] for slot in slots)))
+    schedules = [rng.sample(stored, args.schedule_size) for _ in range(args.checks)]
+    candidate_lists = [rng.sample(stored, args.candidates) for _ in range(args.checks)]
+    with Timer() as pairs:
+        pair_conflicts = run_bulk_pairs(schedules, candidate_lists)
+    # 课程对象（含位图）在选课接口中随查询结果一起得到，不计入耗时
+    schedule_courses = [[Slot(value) for value in values] for values in schedules]
+    candidate_courses = [
+        [Slot(value) for value in values] for values in candidate_lists
+    ]
+    with Timer() as indexed:
+        index_conflicts = run_bulk_index(schedule_courses, candidate_courses)
+    blind_conflicts = run_bulk_pairs(
+        [[week_blind[value] for value in schedule] for schedule in schedules],
+        [[week_blind[value] for value in values] for values in candidate_lists],
+    )
+    results.append(
+        {
+            "format": "bulk",
+            "checks": args.checks,
+            "schedule_size": args.schedule_size,
+            "candidates": args.candidates,
+            "pairs_us_per_check": round(pairs.elapsed / args.checks * 1e6, 2),
+            "index_us_per_check": round(indexed.elapsed / args.checks * 1e6, 2),
+            "speedup": round(pairs.elapsed / indexed.elapsed, 1),
+            "conflicts": index_conflicts,
+            "pairs_conflicts": pair_conflicts,
+            "week_blind_conflicts": blind_conflicts,
+        }
+    )
+
+    sizes = [int(size) for size in args.index_sizes.split(",")]
+    results.extend(run_scaling(stored, sizes, args.candidates * 20, rng))
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+CSV 解析基准测试
+把仓库自带的全校总课表放大若干倍，比较逐行 iterrows 的旧解析器与按列向量化的 CSVParser
+
+示例：python -m benchmarks.bench_csv_parser --scale 100
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+from benchmarks.common import BACKEND_DIR, TIMETABLE_CSV, Timer
+
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from apps.courses.utils import CSVParser  # noqa: E402
+
+
+def legacy_parse(file):
+    """旧实现：逐行 iterrows（仅用于对比，要求表头位于第一行）"""
+    df = pd.read_csv(file, encoding="utf-8")
+    courses = []
+    for _, row in df.iterrows():
+        if pd.isna(row["课程号"]):
+            continue
+        classroom = row["教学地点"]
+        if pd.isna(classroom):
+            classroom = "待定"
+        elif ";" in str(classroom):
+            classroom = classroom.split(";")[0]
+        time_slot = row["上课时间"]
+        if pd.isna(time_slot):
+            time_slot = "待定"
+        else:
+            time_slot = time_slot.replace("星期", "周")
+            time_slot = time_slot.split("{")[0].strip()
+        weeks = row["起始结束周"]
+        if not pd.isna(weeks):
+            if "周" in weeks:
+                weeks = weeks.replace("周", "")
+            try:
+                start_week, end_week = map(int, weeks.split("-"))
+            except ValueError:
+                start_week, end_week = 1, 16
+        else:
+            start_week, end_week = 1, 16
+        courses.append(
+            {
+                "name": row["课程名称"],
+                "course_code": str(row["课程号"]),
+                "teacher": row["任课教师"],
+                "classroom": classroom,
+                "capacity": int(row["课堂容量"]) if not pd.isna(row["课堂容量"]) else 0,
+                "selected_count": int(row["已选人数"])
+                if not pd.isna(row["已选人数"])
+                else 0,
+                "time_slot": time_slot,
+                "description": f"{row['课程性质']} - {row['开课学院']} - {row['学分']}学分",
+                "start_week": start_week,
+                "end_week": end_week,
+            }
+        )
+    return courses
+
+
+def build_scaled_csv(source, scale):
+    """生成放大后的课表（去掉标题行，表头置于第一行）"""
+    with open(source, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    header_index = next(i for i, line in enumerate(lines) if "上课时间" in line)
+    header, body = lines[header_index], lines[header_index + 1 :]
+    fd, path = tempfile.mkstemp(prefix="course-bench-", suffix=".csv")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(header + "\n")
+        for _ in range(scale):
+            f.write("\n".join(body) + "\n")
+    return path, len(body) * scale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default=str(TIMETABLE_CSV), help="课表 CSV 路径")
+    parser.add_argument("--scale", type=int, default=100, help="放大倍数")
+    parser.add_argument("--skip-legacy", action="store_true", help="不运行旧解析器")
+    args = parser.parse_args()
+
+    path, rows = build_scaled_csv(args.csv, args.scale)
+    try:
+        result = {"rows": rows, "scale": args.scale}
+        with Timer() as vectorized:
+            parsed = CSVParser().parse(path)
+        result["vectorized_s"] = round(vectorized.elapsed, 3)
+        result["vectorized_rows"] = len(parsed)
+        if not args.skip_legacy:
+            with Timer() as legacy:
+                legacy_rows = legacy_parse(path)
+            result["legacy_s"] = round(legacy.elapsed, 3)
+            result["legacy_rows"] = len(legacy_rows)
+            result["speedup"] = round(legacy.elapsed / vectorized.elapsed, 1)
+    finally:
+        os.remove(path)
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+数据库写入争用基准测试
+多个线程同时选课、退课，比较 SQLite 默认配置、SQLite WAL 配置（IMMEDIATE 事务、
+busy_timeout、synchronous=NORMAL）与 PostgreSQL 连接池下每秒成功的选课数和出错次数
+
+示例：python -m benchmarks.bench_db_contention --workers 8 --seconds 10
+PostgreSQL：按 config/settings.py 的说明设置 DB_ENGINE 等环境变量后加 --postgres
+（会在该数据库中执行迁移并写入测试数据，请使用专门的测试库）
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import BACKEND_DIR, setup_django, summarize
+
+MODES = ("sqlite_default", "sqlite_wal", "postgres_pool")
+
+
+def database_settings(mode):
+    """各模式的 DATABASES 和 SQLITE_PRAGMAS 配置"""
+    if mode == "postgres_pool":
+        from config import settings as project_settings
+
+        return {"DATABASES": project_settings.DATABASES}
+    db_path = os.path.join(tempfile.mkdtemp(prefix="course-bench-"), "bench.sqlite3")
+    default = {"ENGINE": "django.db.backends.sqlite3", "NAME": db_path}
+    if mode == "sqlite_default":
+        # Django 默认：回滚日志模式，DEFERRED 事务，锁等待 5 秒
+        return {"DATABASES": {"default": default}, "SQLITE_PRAGMAS": {}}
+    default["OPTIONS"] = {"transaction_mode": "IMMEDIATE"}
+    return {"DATABASES": {"default": default}}
+
+
+def run_mode(mode, workers, seconds, courses, hot):
+    setup_django(ALLOWED_HOSTS=["testserver"], **database_settings(mode))
+    from django.contrib.auth import get_user_model
+    from django.db import connection, connections
+    from rest_framework.test import APIClient
+
+    from apps.courses.models import Course
+    from benchmarks.bench_batch_select import seed
+
+    Course.objects.filter(course_code__startswith="B").delete()
+    course_ids = seed(courses)[:hot]
+    User = get_user_model()
+    User.objects.filter(username__startswith="contention").delete()
+    users = [
+        User.objects.create_user(
+            f"contention{index}", password="x", student_id=f"C{index}"
+        )
+        for index in range(workers)
+    ]
+    connections.close_all()
+
+    lock = threading.Lock()
+    selected, errors, samples = [0], {}, []
+    deadline = time.monotonic() + seconds
+
+    def worker(user, seed_value):
+        rng = random.Random(seed_value)
+        client = APIClient()
+        client.force_authenticate(user)
+        try:
+            while time.monotonic() < deadline:
+                course_id = rng.choice(course_ids)
+                for action in ("select_course", "drop_course"):
+                    start = time.perf_counter()
+                    try:
+                        response = client.post(
+                            f"/api/courses/courses/{course_id}/{action}/"
+                        )
+                        error = None if response.status_code < 500 else "HTTP 500"
+                    except Exception as e:  # database is locked 等
+                        error = f"{type(e).__name__}: {e}"
+                    with lock:
+                        if error:
+                            errors[error] = errors.get(error, 0) + 1
+                        elif action == "select_course":
+                            samples.append(time.perf_counter() - start)
+                            if response.status_code == 200:
+                                selected[0] += 1
+                    if error:
+                        break
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(user, index))
+        for index, user in enumerate(users)
+    ]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    result = summarize(samples)
+    result["selections_per_sec"] = round(selected[0] / elapsed, 1)
+    result["errors"] = errors
+    result["vendor"] = connection.vendor
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8, help="并发线程数")
+    parser.add_argument("--seconds", type=float, default=10, help="每种模式的运行时间")
+    parser.add_argument("--courses", type=int, default=20, help="课程数")
+    parser.add_argument("--hot", type=int, default=5, help="被集中选课的课程数")
+    parser.add_argument("--postgres", action="store_true", help="同时测试 PostgreSQL")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # 子进程：每种模式需要独立的 Django 配置
+        result = run_mode(args.mode, args.workers, args.seconds, args.courses, args.hot)
+        print(json.dumps(result, ensure_ascii=False))
+        return
+
+    report = {"workers": args.workers, "seconds": args.seconds, "modes": {}}
+    for mode in MODES:
+        if mode == "postgres_pool" and not args.postgres:
+            report["modes"][mode] = {"skipped": "未指定 --postgres"}
+            continue
+        if mode == "postgres_pool" and "postgresql" not in os.environ.get(
+            "DB_ENGINE", ""
+        ):
+            report["modes"][mode] = {"skipped": "未设置 DB_ENGINE 等环境变量"}
+            continue
+        command = [
+            sys.executable,
+            "-W",
+            "ignore",
+            "-m",
+            "benchmarks.bench_db_contention",
+        ]
+        command += ["--mode", mode, "--workers", str(args.workers)]
+        command += ["--seconds", str(args.seconds), "--courses", str(args.courses)]
+        command += ["--hot", str(args.hot)]
+        process = subprocess.run(
+            command, cwd=BACKEND_DIR, capture_output=True, text=True
+        )
+        if process.returncode:
+            report["modes"][mode] = {"failed": process.stderr.strip().splitlines()[-1]}
+        else:
+            report["modes"][mode] = json.loads(process.stdout.strip().splitlines()[-1])
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+性能埋点开销测试
+比较不启用埋点中间件、以及不同采样率下课程列表和选课记录接口的延迟
+
+示例：python -m benchmarks.bench_instrumentation --requests 2000
+"""
+import argparse
+import json
+
+from benchmarks.common import Timer, setup_django, summarize
+
+MIDDLEWARE_PATH = "apps.monitoring.middleware.InstrumentationMiddleware"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=2000, help="课程数")
+    parser.add_argument("--requests", type=int, default=2000, help="每种模式的请求数")
+    parser.add_argument(
+        "--rates", type=float, nargs="+", default=[0.0, 0.1, 1.0], help="要测试的采样率"
+    )
+    args = parser.parse_args()
+
+    setup_django(ALLOWED_HOSTS=["testserver"])
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    from benchmarks.bench_catalog_search import seed
+
+    seed(args.courses)
+    user = get_user_model().objects.create_user("bench", password="x", student_id="1")
+    urls = ["/api/courses/courses/?has_seats=true", "/api/courses/selections/"]
+    without = [name for name in settings.MIDDLEWARE if name != MIDDLEWARE_PATH]
+
+    modes = [("disabled", {"MIDDLEWARE": without})]
+    modes += [(f"sample_{rate}", {"METRICS_SAMPLE_RATE": rate}) for rate in args.rates]
+    # 关闭响应缓存，测量完整的请求处理
+    no_cache = {
+        "course_catalog": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    }
+
+    report = {"requests": args.requests, "modes": {}}
+    for name, overrides in modes:
+        with override_settings(CACHES={**settings.CACHES, **no_cache}, **overrides):
+            client = APIClient()
+            client.force_authenticate(user)
+            samples = []
+            for index in range(args.requests):
+                with Timer() as timer:
+                    client.get(urls[index % len(urls)])
+                samples.append(timer.elapsed)
+            report["modes"][name] = summarize(samples)
+
+    baseline = report["modes"]["disabled"]["p50_ms"]
+    for result in report["modes"].values():
+        result["p50_overhead_ms"] = round(result["p50_ms"] - baseline, 3)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
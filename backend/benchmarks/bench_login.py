@@ -0,0 +1,127 @@
+"""
+登录吞吐量基准测试
+通过登录接口（/api/users/token/）比较每秒登录数、每核每秒登录数和登录后重新计算的哈希数：
+- django_default：Django 默认 PBKDF2 哈希（100 万次迭代）
+- lowered：调低迭代次数（PASSWORD_PBKDF2_ITERATIONS=--iterations）后的新哈希
+- upgrade_on_login：迭代次数较低的旧哈希在默认配置下首次登录，重新计算为默认迭代次数
+- no_downgrade：默认迭代次数的哈希在调低配置后登录，哈希保持不变
+
+示例：python -m benchmarks.bench_login --logins 200 --threads 4 --iterations 260000
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+
+from benchmarks.common import Timer, setup_django, summarize
+
+DEFAULT_HASHERS = ["django.contrib.auth.hashers.PBKDF2PasswordHasher"]
+DEFAULT_BACKENDS = ["django.contrib.auth.backends.ModelBackend"]
+
+
+def run_logins(usernames, password, threads):
+    """threads 个线程并发登录，返回 (每次登录耗时, 总耗时)"""
+    from rest_framework.test import APIClient
+
+    pending = queue.Queue()
+    for username in usernames:
+        pending.put(username)
+    samples, lock = [], threading.Lock()
+
+    def worker():
+        client = APIClient()
+        while True:
+            try:
+                username = pending.get_nowait()
+            except queue.Empty:
+                return
+            with Timer() as timer:
+                response = client.post(
+                    "/api/users/token/",
+                    {"username": username, "password": password},
+                    format="json",
+                )
+            assert response.status_code == 200, response.content
+            with lock:
+                samples.append(timer.elapsed)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    with Timer() as timer:
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    return samples, timer.elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200, help="每种方式的登录次数")
+    parser.add_argument("--threads", type=int, default=4, help="并发线程数")
+    parser.add_argument("--password", default="LoadTest#2025", help="学生密码")
+    parser.add_argument(
+        "--iterations", type=int, default=260000, help="调低后的 PBKDF2 迭代次数"
+    )
+    args = parser.parse_args()
+
+    setup_django(ALLOWED_HOSTS=["testserver"], LOGIN_RATE=None, LOGIN_MAX_PENDING=None)
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.test import override_settings
+
+    User = get_user_model()
+    cores = min(args.threads, os.cpu_count())
+    project = {
+        "PASSWORD_HASHERS": settings.PASSWORD_HASHERS,
+        "AUTHENTICATION_BACKENDS": settings.AUTHENTICATION_BACKENDS,
+        "PASSWORD_PBKDF2_ITERATIONS": None,
+    }
+    lowered = dict(project, PASSWORD_PBKDF2_ITERATIONS=args.iterations)
+    default = {
+        "PASSWORD_HASHERS": DEFAULT_HASHERS,
+        "AUTHENTICATION_BACKENDS": DEFAULT_BACKENDS,
+    }
+    # (名称, 生成密码哈希时的配置, 登录时的配置)
+    modes = [
+        ("django_default", default, default),
+        ("lowered", lowered, lowered),
+        ("upgrade_on_login", lowered, project),
+        ("no_downgrade", project, lowered),
+    ]
+
+    report = {
+        "logins": args.logins,
+        "threads": args.threads,
+        "cores_used": cores,
+        "lowered_iterations": args.iterations,
+        "modes": {},
+    }
+    for name, stored, login in modes:
+        with override_settings(**stored):
+            encoded = make_password(args.password)
+        usernames = [f"{name}{index}" for index in range(args.logins)]
+        User.objects.bulk_create(
+            [
+                User(username=username, student_id=username, password=encoded)
+                for username in usernames
+            ]
+        )
+        with override_settings(**login):
+            samples, elapsed = run_logins(usernames, args.password, args.threads)
+        result = summarize(samples)
+        result["logins_per_sec"] = round(len(samples) / elapsed, 1)
+        result["logins_per_sec_per_core"] = round(len(samples) / elapsed / cores, 1)
+        result["rehashed"] = (
+            User.objects.filter(username__in=usernames)
+            .exclude(password=encoded)
+            .count()
+        )
+        report["modes"][name] = result
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
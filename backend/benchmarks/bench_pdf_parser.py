@@ -0,0 +1,114 @@
+"""
+PDF 解析基准测试
+生成一个多页的合成课表 PDF，比较不同进程数下 PDFParser 的解析耗时
+
+示例：python -m benchmarks.bench_pdf_parser --pages 500 --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.common import BACKEND_DIR, Timer, setup_django
+
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def build_synthetic_pdf(path, pages, rows_per_page):
+    """
+    手工拼装一个只含 ASCII 文本的 PDF（不依赖第三方库）
+    每行格式与 PDF_ROW_PATTERN 一致
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # 页面树，最后填充
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(pages):
+        lines = []
+        for row in range(rows_per_page):
+            code = 10000 + page * rows_per_page + row
+            lines.append(
+                f"College{page % 7},Course{code},Required,(2024-2025-2)-{code}-01,"
+                f"{code},2.0,Teacher{row},120,0,Mon1-2,J{row % 9}-{100 + row}"
+            )
+        stream = "BT /F1 7 Tf 10 TL 20 820 Td " + " ".join(
+            f"({line}) Tj T*" for line in lines
+        )
+        stream += " ET"
+        content = stream.encode("latin-1")
+        objects.append(
+            b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"
+        )
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(objects) + 1, xref)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=500, help="PDF 页数")
+    parser.add_argument("--rows-per-page", type=int, default=60, help="每页课程行数")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4], help="要测试的进程数"
+    )
+    parser.add_argument("--pages-per-task", type=int, default=20, help="每个任务的页数")
+    args = parser.parse_args()
+
+    setup_django()
+    from apps.courses.utils import PDFParser
+
+    fd, path = tempfile.mkstemp(prefix="course-bench-", suffix=".pdf")
+    os.close(fd)
+    results = []
+    try:
+        build_synthetic_pdf(path, args.pages, args.rows_per_page)
+        baseline = None
+        for workers in args.workers:
+            pdf_parser = PDFParser(workers=workers, pages_per_task=args.pages_per_task)
+            with Timer() as timer:
+                courses = pdf_parser.parse(path)
+            baseline = baseline or timer.elapsed
+            results.append(
+                {
+                    "pages": args.pages,
+                    "workers": workers,
+                    "rows": len(courses),
+                    "elapsed_s": round(timer.elapsed, 3),
+                    "pages_per_s": round(args.pages / timer.elapsed, 1),
+                    "speedup": round(baseline / timer.elapsed, 2),
+                    "in_page_order": [c["course_code"] for c in courses]
+                    == sorted(c["course_code"] for c in courses),
+                }
+            )
+    finally:
+        os.remove(path)
+
+    print(json.dumps({"cpu_count": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+排课方案搜索基准测试
+随机生成课程（每门课程若干教学班，每个教学班每周两次课，部分只在前/后半学期上课），比较：
+- naive：枚举全部教学班组合，逐个检查冲突并评分（只在组合数不多时运行）
+- planner：TimetablePlanner（按位图分组、前向检查、记忆化、时间预算）
+并测量 /api/courses/courses/plan/ 接口的端到端耗时
+
+示例：python -m benchmarks.bench_planner --courses 10 --sections 8 --runs 50
+"""
+import argparse
+import itertools
+import json
+import random
+
+from benchmarks.common import Timer, setup_django, summarize
+
+STARTS = (1, 3, 5, 7, 9)
+WEEKS = ("{1-16周}", "{1-16周}", "{1-8周}", "{9-16周}", "{1-15周(单)}", "{2-16周(双)}")
+
+
+def random_time_slot(rng):
+    meetings = []
+    for day in rng.sample("一二三四五", 2):
+        start = rng.choice(STARTS)
+        meetings.append(f"周{day}第{start}-{start + 1}节{rng.choice(WEEKS)}")
+    return ";".join(meetings)
+
+
+class Section:
+    """只有上课时间的教学班，供不写数据库的测试使用"""
+
+    def __init__(self, code, time_slot):
+        from apps.courses.schedule import compile_time_slot
+
+        self.course_code = code
+        self.time_slot = time_slot
+        self.schedule_mask = compile_time_slot(time_slot)
+
+
+def random_groups(rng, courses, sections):
+    return {
+        f"P{course}": [
+            Section(f"P{course}", random_time_slot(rng)) for _ in range(sections)
+        ]
+        for course in range(courses)
+    }
+
+
+def naive(groups, limit):
+    """枚举全部组合，返回 (方案数, 最好的 limit 个评分)"""
+    from apps.courses.planner import day_stats
+
+    scores = []
+    for combination in itertools.product(*groups.values()):
+        occupied = 0
+        for section in combination:
+            if section.schedule_mask & occupied:
+                break
+            occupied |= section.schedule_mask
+        else:
+            days, gaps, _ = day_stats(occupied)
+            scores.append((gaps, days))
+    return len(scores), sorted(scores)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=10, help="每次搜索的课程数")
+    parser.add_argument("--sections", type=int, default=8, help="每门课程的教学班数")
+    parser.add_argument("--runs", type=int, default=50, help="随机场景数")
+    parser.add_argument("--limit", type=int, default=5, help="返回的方案数")
+    parser.add_argument(
+        "--naive-courses", type=int, default=6, help="与枚举法对比时的课程数"
+    )
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    setup_django(ALLOWED_HOSTS=["testserver"])
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIClient
+
+    from apps.courses.models import Course
+    from apps.courses.planner import TimetablePlanner
+
+    rng = random.Random(args.seed)
+    report = {
+        "courses": args.courses,
+        "sections": args.sections,
+        "runs": args.runs,
+        "modes": {},
+    }
+
+    # 与枚举法对比：课程数较少时两者都能搜完，评分应一致
+    naive_samples, planner_samples, mismatched = [], [], 0
+    for _ in range(args.runs):
+        groups = random_groups(rng, args.naive_courses, args.sections)
+        with Timer() as timer:
+            _, expected = naive(groups, args.limit)
+        naive_samples.append(timer.elapsed)
+        with Timer() as timer:
+            result = TimetablePlanner(limit=args.limit, budget=60).plan(groups)
+        planner_samples.append(timer.elapsed)
+        found = [(plan["gaps"], plan["days"]) for plan in result["plans"]]
+        mismatched += found != expected
+    report["modes"][f"naive_{args.naive_courses}_courses"] = summarize(naive_samples)
+    report["modes"][f"planner_{args.naive_courses}_courses"] = dict(
+        summarize(planner_samples), mismatched=mismatched
+    )
+
+    # 完整规模：带时间预算，统计搜完的比例
+    for name, preferences in (
+        ("planner", {}),
+        ("planner_preferences", {"free_days": [5], "max_gaps": 4}),
+    ):
+        samples, complete, empty = [], 0, 0
+        for _ in range(args.runs):
+            groups = random_groups(rng, args.courses, args.sections)
+            with Timer() as timer:
+                result = TimetablePlanner(limit=args.limit).plan(groups, **preferences)
+            samples.append(timer.elapsed)
+            complete += result["complete"]
+            empty += not result["plans"]
+        report["modes"][name] = dict(
+            summarize(samples), complete=complete, no_plan=empty
+        )
+
+    # 接口端到端耗时（含查询教学班、学生课表和序列化）
+    for course in range(args.courses):
+        Course.objects.bulk_create(
+            Course(
+                name=f"课程{course}",
+                course_code=f"P{course}",
+                section_code=f"P{course}-{section:02d}",
+                teacher="教师",
+                classroom="J1-101",
+                capacity=100,
+                time_slot=random_time_slot(rng),
+            )
+            for section in range(args.sections)
+        )
+    user = get_user_model().objects.create_user("bench", password="x", student_id="1")
+    client = APIClient()
+    client.force_authenticate(user)
+    body = {"courses": [f"P{course}" for course in range(args.courses)]}
+    client.post("/api/courses/courses/plan/", body, format="json")  # 预热，不计入耗时
+    samples = []
+    for _ in range(args.runs):
+        with Timer() as timer:
+            response = client.post("/api/courses/courses/plan/", body, format="json")
+        assert response.status_code == 200, response.content
+        samples.append(timer.elapsed)
+    report["modes"]["endpoint"] = summarize(samples)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
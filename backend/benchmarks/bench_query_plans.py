@@ -0,0 +1,165 @@
+"""
+选课热点查询的执行计划检查
+写入约 100 万条选课记录后，对每个热点查询执行 EXPLAIN，
+确认走索引查找而不是全表扫描；任一查询出现全表扫描时以非零状态退出
+
+示例：python -m benchmarks.bench_query_plans --students 50000 --per-student 20
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+
+from benchmarks.common import Timer, setup_django
+
+# SQLite 执行计划中表示全表扫描的行，例如 "SCAN courses_studentcourse"
+FULL_SCAN = re.compile(r"\bSCAN (courses_\w+|users_\w+)\b(?! USING)")
+# 需要额外排序的执行计划；没有这一行时按主键顺序扫描，取够 LIMIT 条即停止
+TEMP_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+
+def full_scans(plan, queryset):
+    """执行计划中的全表扫描；不带筛选条件、带 LIMIT 且无需额外排序的分页查询不算"""
+    query = queryset.query
+    if query.high_mark is not None and not query.where and TEMP_SORT not in plan:
+        return []
+    return FULL_SCAN.findall(plan)
+
+
+def seed(students, courses, per_student):
+    """用原生 SQL 批量写入压测数据"""
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    now = timezone.now().isoformat()
+    rng = random.Random(7)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO users_user (id, password, is_superuser, username, first_name,"
+            " last_name, email, is_staff, is_active, date_joined, student_id, role)"
+            " VALUES (%s, '!', 0, %s, '', '', '', 0, 1, %s, %s, 'student')",
+            [(i, f"s{i}", now, str(i)) for i in range(1, students + 1)],
+        )
+        cursor.executemany(
+            "INSERT INTO courses_course (id, name, course_code, section_code, teacher,"
+            " classroom, capacity, selected_count, time_slot, college, description,"
+            " created_at, updated_at)"
+            " VALUES (%s, %s, %s, %s, %s, %s, 100, 0, '周一第1-2节', '', '', %s, %s)",
+            [
+                (i, f"课程{i}", f"C{i}", f"C{i}-01", f"教师{i % 300}", f"J{i % 50}")
+                + (now, now)
+                for i in range(1, courses + 1)
+            ],
+        )
+        statuses = ("pending", "approved", "rejected")
+        batch = []
+        for student in range(1, students + 1):
+            for course in rng.sample(range(1, courses + 1), per_student):
+                batch.append((student, course, rng.choice(statuses), now, now))
+            if len(batch) >= 50000:
+                cursor.executemany(
+                    "INSERT INTO courses_studentcourse (student_id, course_id, status,"
+                    " created_at, updated_at) VALUES (%s, %s, %s, %s, %s)",
+                    batch,
+                )
+                batch = []
+        if batch:
+            cursor.executemany(
+                "INSERT INTO courses_studentcourse (student_id, course_id, status,"
+                " created_at, updated_at) VALUES (%s, %s, %s, %s, %s)",
+                batch,
+            )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def course_list_queryset(before_id=None):
+    """
+    CourseViewSet.list 实际执行的分页查询：视图的查询集经过滤后按游标分页的排序取一页
+    before_id 为游标位置（翻页时游标之后的记录主键小于它），None 表示第一页
+    """
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from apps.courses.views import CourseViewSet
+
+    request = Request(APIRequestFactory().get("/api/courses/"))
+    view = CourseViewSet(action="list", request=request, format_kwarg=None, kwargs={})
+    queryset = view.filter_queryset(view.get_queryset())
+    paginator = view.paginator
+    ordering = paginator.get_ordering(request, queryset, view)
+    if before_id is not None:
+        field = ordering[0].lstrip("-")
+        lookup = "lt" if ordering[0].startswith("-") else "gt"
+        queryset = queryset.filter(**{f"{field}__{lookup}": before_id})
+    # 与 CursorPagination.paginate_queryset 相同，多取一条判断是否还有下一页
+    return queryset.order_by(*ordering)[: paginator.page_size + 1]
+
+
+def hot_queries(student_id, course_id):
+    """与视图中一致的热点查询"""
+    from apps.courses.models import Course, StudentCourse
+
+    return {
+        # select_course：重复选课检查
+        "select_course.exists": StudentCourse.objects.filter(
+            student_id=student_id, course_id=course_id
+        ),
+        # select_course：已通过课程（冲突检测）
+        "select_course.approved": StudentCourse.objects.filter(
+            student_id=student_id, status="approved"
+        )
+        .select_related("course")
+        .only("course__name", "course__time_slot")
+        .order_by(),
+        # drop_course：删除选课记录
+        "drop_course.lookup": StudentCourse.objects.filter(
+            student_id=student_id, course_id=course_id
+        ),
+        # StudentCourseViewSet.get_queryset
+        "selections.list": StudentCourse.objects.filter(student_id=student_id),
+        # CourseViewSet.list：第一页和翻页
+        "courses.list": course_list_queryset(),
+        "courses.list.next": course_list_queryset(before_id=course_id),
+        # 后台按教师筛选
+        "admin.teacher_filter": Course.objects.filter(teacher="教师1"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=50000, help="学生数")
+    parser.add_argument("--courses", type=int, default=2000, help="课程数")
+    parser.add_argument("--per-student", type=int, default=20, help="每个学生的选课数")
+    args = parser.parse_args()
+
+    setup_django()
+    with Timer() as timer:
+        seed(args.students, args.courses, args.per_student)
+
+    report = {
+        "selections": args.students * args.per_student,
+        "seed_s": round(timer.elapsed, 1),
+        "queries": {},
+    }
+    failed = False
+    for name, queryset in hot_queries(args.students // 2, args.courses // 2).items():
+        plan = queryset.explain()
+        with Timer() as query_timer:
+            list(queryset)
+        scans = full_scans(plan, queryset)
+        failed = failed or bool(scans)
+        report["queries"][name] = {
+            "plan": plan.splitlines(),
+            "index_lookup": not scans,
+            "elapsed_ms": round(query_timer.elapsed * 1000, 3),
+        }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
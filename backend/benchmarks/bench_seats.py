@@ -0,0 +1,198 @@
+"""
+选课名额并发基准测试
+N 个并发线程同时抢同一门课程，比较三种占座方式：
+- naive：旧实现，Python 中比较容量后 save() 整行
+- row_lock：select_for_update 行锁后读改写
+- atomic：条件 UPDATE（StudentCourse.objects.enroll）
+输出每种方式的吞吐量以及最终的已选人数、选课记录数是否与容量一致
+
+默认使用临时 SQLite 数据库：SQLite 不支持行锁（select_for_update 不生效），
+IMMEDIATE 事务开始时即获取整库写锁，所有写事务串行执行，因此 row_lock 与 atomic 的吞吐量相近，
+只能说明两者都不超卖；两者的吞吐量差异需要在支持行锁的数据库上比较（--postgres）
+
+示例：python -m benchmarks.bench_seats --workers 16 --students 2000 --capacity 500
+PostgreSQL：按 config/settings.py 的说明设置 DB_ENGINE 等环境变量后加 --postgres
+（会在该数据库中执行迁移并清空课程和选课记录，请使用专门的测试库）
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import Timer, setup_django
+
+STRATEGIES = ("naive", "row_lock", "atomic")
+
+
+def naive_select(student, course_id):
+    """旧实现：先读后写，存在丢失更新"""
+    from django.db import transaction
+    from apps.courses.models import Course, StudentCourse
+
+    course = Course.objects.get(pk=course_id)
+    if course.selected_count >= course.capacity:
+        return False
+    with transaction.atomic():
+        StudentCourse.objects.create(student=student, course=course)
+        course.selected_count += 1
+        course.save()
+    return True
+
+
+def row_lock_select(student, course_id):
+    """行锁实现：锁住课程行后再检查容量"""
+    from django.db import transaction
+    from apps.courses.models import Course, StudentCourse
+
+    with transaction.atomic():
+        course = Course.objects.select_for_update().get(pk=course_id)
+        if course.selected_count >= course.capacity:
+            return False
+        StudentCourse.objects.create(student=student, course=course)
+        course.selected_count += 1
+        course.save(update_fields=["selected_count"])
+    return True
+
+
+def atomic_select(student, course_id):
+    """条件更新实现"""
+    from apps.courses.models import Course, StudentCourse
+
+    course = Course(pk=course_id)
+    return StudentCourse.objects.enroll(student, course) is not None
+
+
+SELECTORS = {
+    "naive": naive_select,
+    "row_lock": row_lock_select,
+    "atomic": atomic_select,
+}
+
+
+def seed(students, capacity):
+    """创建压测用户和课程，返回 (用户列表, 课程id)"""
+    from django.contrib.auth import get_user_model
+    from apps.courses.models import Course, StudentCourse
+
+    User = get_user_model()
+    StudentCourse.objects.all().delete()
+    Course.objects.all().delete()
+    if User.objects.count() < students:
+        User.objects.all().delete()
+        User.objects.bulk_create(
+            [
+                User(username=f"bench{i}", student_id=str(100000 + i), password="!")
+                for i in range(students)
+            ],
+            batch_size=500,
+        )
+    course = Course.objects.create(
+        name="压测课程",
+        course_code="BENCH-001",
+        teacher="压测",
+        classroom="J1-101",
+        capacity=capacity,
+        time_slot="周一 1-2节",
+    )
+    return list(User.objects.order_by("id")[:students]), course.pk
+
+
+def run_strategy(strategy, users, course_id, workers):
+    """并发执行一种占座方式"""
+    from django.db import OperationalError, IntegrityError, connection
+
+    selector = SELECTORS[strategy]
+    stats = {"selected": 0, "full": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def worker(chunk):
+        local = {"selected": 0, "full": 0, "errors": 0}
+        try:
+            for student in chunk:
+                try:
+                    if selector(student, course_id):
+                        local["selected"] += 1
+                    else:
+                        local["full"] += 1
+                except (OperationalError, IntegrityError):
+                    local["errors"] += 1
+        finally:
+            connection.close()
+        with lock:
+            for key, value in local.items():
+                stats[key] += value
+
+    chunks = [users[i::workers] for i in range(workers)]
+    with Timer() as timer:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(worker, chunks))
+    stats["elapsed_s"] = round(timer.elapsed, 4)
+    stats["attempts_per_s"] = round(len(users) / timer.elapsed, 1)
+    return stats
+
+
+def check_consistency(course_id, capacity):
+    """检查名额是否守恒"""
+    from apps.courses.models import Course, StudentCourse
+
+    counter = Course.objects.get(pk=course_id).selected_count
+    records = StudentCourse.objects.filter(course_id=course_id).count()
+    return {
+        "capacity": capacity,
+        "selected_count": counter,
+        "records": records,
+        "oversold": max(0, records - capacity),
+        "consistent": counter == records and records <= capacity,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8, help="并发线程数")
+    parser.add_argument("--students", type=int, default=1000, help="抢课学生数")
+    parser.add_argument("--capacity", type=int, default=200, help="课程容量")
+    parser.add_argument(
+        "--strategy",
+        choices=STRATEGIES,
+        action="append",
+        help="只运行指定方式（可多次指定）",
+    )
+    parser.add_argument(
+        "--postgres", action="store_true", help="使用环境变量配置的 PostgreSQL 数据库"
+    )
+    args = parser.parse_args()
+
+    if args.postgres:
+        if "postgresql" not in os.environ.get("DB_ENGINE", ""):
+            sys.exit("未设置 DB_ENGINE 等环境变量")
+        from config import settings as project_settings
+
+        setup_django(DATABASES=project_settings.DATABASES)
+    else:
+        setup_django()
+    from django.db import connection
+
+    report = {
+        "vendor": connection.vendor,
+        "row_locks": connection.features.has_select_for_update,
+    }
+    if not report["row_locks"]:
+        report["note"] = (
+            "数据库不支持行锁，写事务串行执行，row_lock 与 atomic 的吞吐量不可比"
+        )
+    report["results"] = []
+    for strategy in args.strategy or STRATEGIES:
+        users, course_id = seed(args.students, args.capacity)
+        result = {"strategy": strategy, "workers": args.workers}
+        result.update(run_strategy(strategy, users, course_id, args.workers))
+        result.update(check_consistency(course_id, args.capacity))
+        report["results"].append(result)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+选课记录列表基准测试
+比较学生反复刷新已选课程时的 SQL 查询数和耗时：
+- n_plus_one：原查询集，序列化时逐条通过外键读取课程（关闭缓存）
+- joined：一次联表查询，只取需要的列（关闭缓存）
+- cached：按学生缓存的列表
+- since：带 ?since= 的增量获取（命中缓存）
+
+示例：python -m benchmarks.bench_selections --courses 20 --requests 500
+"""
+import argparse
+import json
+from contextlib import ExitStack
+from unittest import mock
+
+from benchmarks.common import Timer, setup_django, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=20, help="学生已选课程数")
+    parser.add_argument("--requests", type=int, default=500, help="每种方式的请求数")
+    args = parser.parse_args()
+
+    setup_django(ALLOWED_HOSTS=["testserver"])
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    from apps.courses.models import Course, StudentCourse
+    from apps.courses.views import StudentCourseViewSet
+
+    query_count = [0]
+
+    def count_queries(execute, sql, params, many, context):
+        query_count[0] += 1
+        return execute(sql, params, many, context)
+
+    user = get_user_model().objects.create_user("bench", password="x", student_id="1")
+    for index in range(args.courses):
+        course = Course.objects.create(
+            name=f"课程{index}",
+            course_code=f"S{index}",
+            teacher="教师",
+            classroom="J1-101",
+            capacity=100,
+            time_slot=f"周{'一二三四五'[index % 5]}第{1 + index // 5}-{1 + index // 5}节",
+        )
+        StudentCourse.objects.create(student=user, course=course)
+
+    client = APIClient()
+    client.force_authenticate(user)
+    latest = client.get("/api/courses/selections/?since=0").json()["timestamp"]
+
+    def original_queryset(view):
+        return StudentCourse.objects.filter(student=view.request.user)
+
+    no_cache = override_settings(
+        CACHES={
+            **settings.CACHES,
+            "course_catalog": {
+                "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+            },
+        }
+    )
+    full = "/api/courses/selections/"
+    modes = (
+        (
+            "n_plus_one",
+            full,
+            [
+                no_cache,
+                mock.patch.object(
+                    StudentCourseViewSet, "get_queryset", original_queryset
+                ),
+            ],
+        ),
+        ("joined", full, [no_cache]),
+        ("cached", full, []),
+        ("since", f"{full}?since={latest}", []),
+    )
+    report = {"courses": args.courses, "requests": args.requests, "modes": {}}
+    for name, path, patches in modes:
+        with ExitStack() as stack:
+            for patch in patches:
+                stack.enter_context(patch)
+            samples, queries = [], []
+            for _ in range(args.requests):
+                query_count[0] = 0
+                with connection.execute_wrapper(count_queries), Timer() as timer:
+                    response = client.get(path)
+                assert response.status_code == 200, response.content
+                samples.append(timer.elapsed)
+                queries.append(query_count[0])
+        result = summarize(samples)
+        result["queries_per_request"] = max(queries)
+        report["modes"][name] = result
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+无状态 JWT 认证基准测试
+使用真实的访问令牌，比较普通认证（每个请求查询用户表）与无状态认证
+在课程列表、选课记录和选课/退课接口上每个请求的 SQL 查询数和延迟
+
+示例：python -m benchmarks.bench_stateless_auth --requests 1000
+"""
+import argparse
+import json
+
+from benchmarks.common import Timer, setup_django, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=2000, help="课程数")
+    parser.add_argument("--requests", type=int, default=1000, help="每个接口的请求数")
+    args = parser.parse_args()
+
+    setup_django(ALLOWED_HOSTS=["testserver"])
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    from apps.courses.models import Course
+    from benchmarks.bench_catalog_search import seed
+
+    seed(args.courses)
+    get_user_model().objects.create_user("bench", password="x", student_id="1")
+    course = Course.objects.filter(capacity__gt=0).order_by("pk").first()
+
+    client = APIClient()
+    response = client.post(
+        "/api/users/token/", {"username": "bench", "password": "x"}, format="json"
+    )
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    query_count = [0]
+
+    def count_queries(execute, sql, params, many, context):
+        query_count[0] += 1
+        return execute(sql, params, many, context)
+
+    def toggle(index):
+        action = "select_course" if index % 2 == 0 else "drop_course"
+        return client.post(f"/api/courses/courses/{course.pk}/{action}/")
+
+    endpoints = {
+        "catalog": lambda index: client.get("/api/courses/courses/?has_seats=true"),
+        "selections": lambda index: client.get("/api/courses/selections/"),
+        "select_drop": toggle,
+    }
+    # 关闭响应缓存，测量完整的请求处理
+    no_cache = {
+        "course_catalog": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    }
+
+    report = {"requests": args.requests, "endpoints": {}}
+    for endpoint, send in endpoints.items():
+        modes = {}
+        for mode, stateless in (("full", False), ("stateless", True)):
+            with override_settings(
+                CACHES={**settings.CACHES, **no_cache}, JWT_STATELESS_AUTH=stateless
+            ):
+                samples, queries = [], 0
+                for index in range(args.requests):
+                    query_count[0] = 0
+                    with connection.execute_wrapper(count_queries), Timer() as timer:
+                        response = send(index)
+                    assert response.status_code < 300, response.content
+                    samples.append(timer.elapsed)
+                    queries += query_count[0]
+                result = summarize(samples)
+                result["queries_per_request"] = round(queries / args.requests, 2)
+                modes[mode] = result
+        modes["queries_saved_per_request"] = round(
+            modes["full"]["queries_per_request"]
+            - modes["stateless"]["queries_per_request"],
+            2,
+        )
+        report["endpoints"][endpoint] = modes
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
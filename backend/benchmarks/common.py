@@ -0,0 +1,79 @@
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+REPO_DIR = BACKEND_DIR.parent
+# 仓库自带的全校总课表
+TIMETABLE_CSV = REPO_DIR / "附件3：2024-2025学年第二学期全校总课表（部分）.csv"
+
+
+def setup_django(db_path: Optional[str] = None, **overrides) -> str:
+    """
+    使用项目配置初始化 Django，并把数据库替换为临时 SQLite 文件
+    返回值: 数据库文件路径
+    """
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+    from config import settings as project_settings
+
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="course-bench-"), "bench.sqlite3")
+
+    options = {
+        name: getattr(project_settings, name)
+        for name in dir(project_settings)
+        if name.isupper()
+    }
+    options["DEBUG"] = False
+    options["DATABASES"] = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": db_path,
+            # 与项目配置相同：事务开始时获取写锁，并发写入时等待锁而不是立即报错
+            "OPTIONS": {"timeout": 30, "transaction_mode": "IMMEDIATE"},
+        }
+    }
+    options.update(overrides)
+    settings.configure(**options)
+    django.setup()
+    call_command("migrate", verbosity=0)
+    return db_path
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """计算百分位数（最近秩法）"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """汇总耗时样本（单位：毫秒）"""
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+class Timer:
+    """计时上下文管理器"""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        return False
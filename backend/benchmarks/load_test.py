@@ -0,0 +1,355 @@
+"""
+选课高峰压力测试
+用全校总课表生成课程和学生，模拟开放选课时的请求：JWT 登录、浏览课程列表、
+集中抢选/退选热门课程、查看已选课程；统计各接口的 p50/p95/p99 延迟、吞吐量，
+结束后检查是否超卖以及已选人数与选课记录是否一致，结果以 JSON 输出
+
+默认在进程内启动 HTTP 服务并使用临时 SQLite 数据库：
+    python -m benchmarks.load_test --students 200 --concurrency 16 --output load.json
+对已运行的服务压测（先把数据写入该服务使用的数据库）：
+    python -m benchmarks.load_test --db db.sqlite3 --seed-only
+    python -m benchmarks.load_test --db db.sqlite3 --url http://127.0.0.1:8000
+"""
+
+import argparse
+import json
+import os
+import platform
+import queue
+import random
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from benchmarks.common import TIMETABLE_CSV, Timer, setup_django, summarize
+
+USERNAME_PREFIX = "load"
+
+
+def seed(students, courses, hot, hot_capacity, password):
+    """写入课程（取课表前 courses 个教学班）和学生；前 hot 个教学班为热门课程，容量设为 hot_capacity"""
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+
+    from apps.courses.importers import CourseImporter
+    from apps.courses.models import Course
+    from apps.courses.utils import CSVParser
+
+    rows = {}
+    for row in CSVParser().parse(str(TIMETABLE_CSV)):
+        rows.setdefault(row["section_code"], row)
+        if len(rows) >= courses:
+            break
+    CourseImporter().run(rows.values())
+    # 课表中的已选人数没有对应的选课记录，清零后才能逐门核对已选人数
+    Course.objects.update(selected_count=0)
+    hot_ids = list(Course.objects.order_by("pk").values_list("pk", flat=True)[:hot])
+    Course.objects.filter(pk__in=hot_ids).update(capacity=hot_capacity)
+
+    # 所有学生使用同一个密码，只计算一次哈希
+    User = get_user_model()
+    encoded = make_password(password)
+    User.objects.bulk_create(
+        [
+            User(
+                username=f"{USERNAME_PREFIX}{index}",
+                student_id=f"L{index:07d}",
+                password=encoded,
+            )
+            for index in range(students)
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    return hot_ids
+
+
+def start_server():
+    """在后台线程中启动多线程 WSGI 服务，返回 (服务地址, 服务对象)"""
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    server = ThreadedWSGIServer(
+        ("127.0.0.1", 0), QuietHandler, allow_reuse_address=False
+    )
+    server.set_app(get_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return f"http://{host}:{port}", server
+
+
+class Recorder:
+    """线程安全地记录每个接口的耗时和状态码"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.statuses = {}
+        self.errors = []
+
+    def add(self, name, elapsed, status):
+        with self.lock:
+            self.samples.setdefault(name, []).append(elapsed)
+            counts = self.statuses.setdefault(name, {})
+            counts[status] = counts.get(status, 0) + 1
+
+    def error(self, name, message):
+        with self.lock:
+            self.errors.append({"operation": name, "error": message})
+
+    def report(self):
+        operations = {}
+        for name, samples in self.samples.items():
+            result = summarize(samples)
+            result["statuses"] = self.statuses[name]
+            operations[name] = result
+        return operations
+
+
+class Client:
+    """最简 HTTP 客户端（标准库实现，不依赖第三方包）"""
+
+    def __init__(self, base_url, recorder, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.timeout = timeout
+        self.token = None
+
+    def request(self, name, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if data is not None:
+            request.add_header("Content-Type", "application/json")
+        if self.token:
+            request.add_header("Authorization", f"Bearer {self.token}")
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                status, content = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, content = e.code, e.read()
+        except Exception as e:  # 连接失败、超时等
+            self.recorder.error(name, repr(e))
+            return None, None
+        self.recorder.add(name, time.perf_counter() - start, status)
+        if status >= 500:
+            self.recorder.error(name, f"HTTP {status}")
+        try:
+            return status, json.loads(content) if content else None
+        except ValueError:
+            return status, None
+
+
+def student_session(client, index, password, hot_ids, rounds, rng):
+    """一名学生的操作序列"""
+    status, data = client.request(
+        "login",
+        "POST",
+        "/api/users/token/",
+        {"username": f"{USERNAME_PREFIX}{index}", "password": password},
+    )
+    if status != 200:
+        return
+    client.token = data["access"]
+
+    # 浏览课程列表（首页和下一页）
+    status, data = client.request("catalog", "GET", "/api/courses/courses/")
+    if status == 200 and data.get("next"):
+        next_url = urllib.parse.urlsplit(data["next"])
+        client.request("catalog", "GET", f"{next_url.path}?{next_url.query}")
+
+    # 抢选热门课程，随机退掉一门再重新选，制造选课/退课并发
+    selected = []
+    for _ in range(rounds):
+        for course_id in rng.sample(hot_ids, len(hot_ids)):
+            status, _ = client.request(
+                "select_course",
+                "POST",
+                f"/api/courses/courses/{course_id}/select_course/",
+            )
+            if status == 200:
+                selected.append(course_id)
+        if selected:
+            course_id = selected.pop(rng.randrange(len(selected)))
+            client.request(
+                "drop_course", "POST", f"/api/courses/courses/{course_id}/drop_course/"
+            )
+
+    client.request("selections", "GET", "/api/courses/selections/")
+
+
+def run_load(
+    base_url, students, concurrency, password, hot_ids, rounds, timeout, seed_value
+):
+    """concurrency 个线程从队列中领取学生，依次执行操作序列"""
+    recorder = Recorder()
+    pending = queue.Queue()
+    for index in range(students):
+        pending.put(index)
+
+    def worker(worker_id):
+        rng = random.Random(seed_value + worker_id)
+        while True:
+            try:
+                index = pending.get_nowait()
+            except queue.Empty:
+                return
+            client = Client(base_url, recorder, timeout)
+            student_session(client, index, password, hot_ids, rounds, rng)
+
+    threads = [
+        threading.Thread(target=worker, args=(worker_id,))
+        for worker_id in range(concurrency)
+    ]
+    with Timer() as timer:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return recorder, timer.elapsed
+
+
+def check_consistency(db_path):
+    """直接读取 SQLite 数据库，检查超卖和已选人数是否与选课记录一致"""
+    connection = sqlite3.connect(db_path)
+    try:
+        oversold = connection.execute(
+            "SELECT id, selected_count, capacity FROM courses_course"
+            " WHERE selected_count > capacity"
+        ).fetchall()
+        mismatched = connection.execute(
+            "SELECT c.id, c.selected_count, COUNT(sc.id) FROM courses_course c"
+            " LEFT JOIN courses_studentcourse sc ON sc.course_id = c.id"
+            " GROUP BY c.id HAVING c.selected_count != COUNT(sc.id)"
+        ).fetchall()
+        negative = connection.execute(
+            "SELECT id, selected_count FROM courses_course WHERE selected_count < 0"
+        ).fetchall()
+    finally:
+        connection.close()
+    return {
+        "ok": not (oversold or mismatched or negative),
+        "oversold": [
+            {"course": pk, "selected_count": count, "capacity": capacity}
+            for pk, count, capacity in oversold
+        ],
+        "count_mismatch": [
+            {"course": pk, "selected_count": count, "selections": actual}
+            for pk, count, actual in mismatched
+        ],
+        "negative": [{"course": pk, "selected_count": count} for pk, count in negative],
+    }
+
+
+def environment():
+    import django
+
+    return {
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "cpu_count": os.cpu_count(),
+        "platform": platform.platform(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=200, help="学生数")
+    parser.add_argument(
+        "--courses", type=int, default=741, help="课程数（取课表前若干门）"
+    )
+    parser.add_argument("--hot", type=int, default=5, help="热门课程数")
+    parser.add_argument("--hot-capacity", type=int, default=50, help="热门课程容量")
+    parser.add_argument("--rounds", type=int, default=2, help="每名学生抢选/退选的轮数")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发线程数")
+    parser.add_argument("--password", default="LoadTest#2025", help="学生密码")
+    parser.add_argument("--timeout", type=float, default=60, help="单个请求超时（秒）")
+    parser.add_argument("--seed", type=int, default=7, help="随机种子")
+    parser.add_argument("--db", help="SQLite 数据库路径（默认使用临时文件）")
+    parser.add_argument("--url", help="压测已运行的服务（不在进程内启动服务）")
+    parser.add_argument("--seed-only", action="store_true", help="只写入测试数据后退出")
+    parser.add_argument("--output", help="结果 JSON 文件路径（默认输出到标准输出）")
+    args = parser.parse_args()
+
+    db_path = setup_django(
+        args.db, ALLOWED_HOSTS=["127.0.0.1", "localhost", "testserver"]
+    )
+    from apps.courses.models import Course
+
+    hot_ids = None
+    if args.url is None or args.seed_only:
+        with Timer() as seed_timer:
+            hot_ids = seed(
+                args.students, args.courses, args.hot, args.hot_capacity, args.password
+            )
+        if args.seed_only:
+            print(
+                json.dumps(
+                    {
+                        "db": db_path,
+                        "hot_courses": hot_ids,
+                        "seed_s": round(seed_timer.elapsed, 2),
+                    }
+                )
+            )
+            return
+    if hot_ids is None:
+        hot_ids = list(
+            Course.objects.order_by("pk").values_list("pk", flat=True)[: args.hot]
+        )
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        base_url, server = start_server()
+    try:
+        recorder, elapsed = run_load(
+            base_url,
+            args.students,
+            args.concurrency,
+            args.password,
+            hot_ids,
+            args.rounds,
+            args.timeout,
+            args.seed,
+        )
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    operations = recorder.report()
+    total = sum(result["count"] for result in operations.values())
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            name: value
+            for name, value in vars(args).items()
+            if name not in ("password", "output", "seed_only")
+        },
+        "environment": environment(),
+        "target": base_url,
+        "elapsed_s": round(elapsed, 3),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0,
+        "operations": operations,
+        "errors": {"count": len(recorder.errors), "samples": recorder.errors[:20]},
+        "consistency": check_consistency(db_path),
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -28,9 +28,12 @@ INSTALLED_APPS = [
     "corsheaders",
     "apps.users",
     "apps.courses",
+    "apps.monitoring",
 ]
 
 MIDDLEWARE = [
+    # 性能埋点放在最前面，统计完整的请求耗时
+    "apps.monitoring.middleware.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -61,13 +64,73 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
-# 数据库配置：使用 SQLite
+# 数据库配置：默认使用 SQLite（开发环境）；生产环境通过环境变量切换到 PostgreSQL，例如
+#   DB_ENGINE=django.db.backends.postgresql DB_NAME=course DB_USER=... DB_PASSWORD=... DB_HOST=...
+# PostgreSQL 连接池需要安装 psycopg[pool]（DB_POOL_MAX_SIZE=0 时不使用连接池）
+DB_ENGINE = os.environ.get("DB_ENGINE", "django.db.backends.sqlite3")
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "ENGINE": DB_ENGINE,
+        "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+        "USER": os.environ.get("DB_USER", ""),
+        "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+        "HOST": os.environ.get("DB_HOST", ""),
+        "PORT": os.environ.get("DB_PORT", ""),
+        # 持久连接：连接在请求之间复用，复用前检查连接是否可用
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
     }
 }
+if DB_ENGINE == "django.db.backends.sqlite3":
+    # 事务开始时即获取写锁：先读后写的事务并发时按 busy_timeout 等待，而不是直接报 database is locked
+    DATABASES["default"]["OPTIONS"]["transaction_mode"] = "IMMEDIATE"
+    # 测试数据库使用临时文件：共享缓存的内存库不支持 busy_timeout，并发写入测试会直接报 table is locked
+    DATABASES["default"]["TEST"] = {"NAME": BASE_DIR / "test_db.sqlite3"}
+elif DB_ENGINE == "django.db.backends.postgresql":
+    DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 20))
+    if DB_POOL_MAX_SIZE:
+        # 内置连接池与持久连接互斥
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": 10,  # 等待空闲连接的秒数
+        }
+
+# SQLite 连接建立时执行的 PRAGMA（见 apps.courses.db）
+# WAL 模式下读写互不阻塞，synchronous=NORMAL 在 WAL 模式下只在检查点时同步磁盘
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 20000,  # 等待写锁的毫秒数
+}
+
+# 用户名密码认证：在哈希线程池中校验密码
+AUTHENTICATION_BACKENDS = ["apps.users.backends.ModelBackend"]
+
+# 密码哈希：新密码使用第一个算法，其余算法用于校验已有的哈希；
+# 算法变化或迭代次数调高后，旧哈希在用户下次登录成功时自动重新计算（不会降低已有哈希的迭代次数）
+PASSWORD_HASHERS = [
+    "apps.users.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+# PBKDF2 迭代次数，None 表示使用 Django 默认值（1000000）；选课高峰集中登录时，单次校验的 CPU 开销与其成正比，
+# 需要时可通过环境变量调低（安全性随之降低，只影响新密码和迭代次数更低的旧哈希）
+PASSWORD_PBKDF2_ITERATIONS = (
+    int(os.environ["PASSWORD_PBKDF2_ITERATIONS"])
+    if os.environ.get("PASSWORD_PBKDF2_ITERATIONS")
+    else None
+)
+
+# 登录准入控制（按进程）
+LOGIN_HASH_WORKERS = None  # 同时计算密码哈希的线程数，None 表示 CPU 核心数
+LOGIN_RATE = 50  # 每秒接受的登录请求数，None 表示不限制
+LOGIN_BURST = 200  # 允许突发的登录请求数
+LOGIN_MAX_PENDING = 100  # 等待密码校验的登录请求上限，超过时返回 429
 
 # 密码校验
 AUTH_PASSWORD_VALIDATORS = [
@@ -99,16 +162,78 @@ USE_TZ = True
 # 静态文件
 STATIC_URL = "/static/"
 
+# 上传文件（课程导入文件保存在此目录）
+MEDIA_ROOT = BASE_DIR / "media"
+MEDIA_URL = "/media/"
+
 # Django REST framework 设置
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.JWTAuthentication",
     ],
 }
 
+# 课程导入设置
+COURSE_IMPORT_BATCH_SIZE = 500  # 每批写入的课程数
+COURSE_IMPORT_CHUNK_SIZE = 5000  # 流式解析时每块读取的行数
+COURSE_PDF_WORKERS = None  # PDF 并行解析的进程数，None 表示使用全部 CPU 核心
+COURSE_PDF_PAGES_PER_TASK = 20  # 每个解析任务处理的页数
+# 导入任务执行方式："thread" 在 Web 进程内的线程池执行，
+# "command" 由 python manage.py run_import_jobs 单独处理
+COURSE_IMPORT_RUNNER = "thread"
+COURSE_IMPORT_WORKERS = 1  # 进程内导入线程数
+
+# 缓存设置
+# course_catalog 缓存课程列表和详情的响应，默认为按字节数淘汰的进程内 LRU 缓存；
+# 多进程部署时各进程的目录版本互不可见，应改用共享的后端，例如：
+#   文件缓存："django.core.cache.backends.filebased.FileBasedCache"，LOCATION 为缓存目录
+#   数据库缓存："django.core.cache.backends.db.DatabaseCache"，LOCATION 为表名（需先执行 createcachetable）
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "course_catalog": {
+        "BACKEND": "apps.courses.cache.SizeLimitedLocMemCache",
+        "LOCATION": "course-catalog",
+        "TIMEOUT": 300,
+        "OPTIONS": {
+            "MAX_ENTRIES": 10000,
+            "MAX_SIZE": 64 * 1024 * 1024,  # 缓存总字节数上限
+        },
+    },
+}
+COURSE_CACHE_ALIAS = "course_catalog"
+# 学生选课记录列表的缓存秒数（选课、退课、审核时立即失效，此为兜底）
+COURSE_SELECTIONS_CACHE_TIMEOUT = 60
+
+# 课程余量订阅设置
+# 保留的名额变化记录数，落后更多的客户端收到全量；旧记录由 python manage.py prune_seat_changes 定时清理
+COURSE_SEAT_FEED_RETENTION = 10000
+COURSE_SEAT_STREAM_INTERVAL = 1.0  # 推送连接检查变化的间隔（秒）
+# 单个推送连接的最长时间（秒），之后由客户端凭 Last-Event-ID 重连；
+# WSGI 部署时每个推送连接在此期间占用一个工作线程，连接数多时应保持较短或改用 ASGI 部署
+COURSE_SEAT_STREAM_TIMEOUT = 20
+COURSE_SEAT_STREAM_HEARTBEAT = 15  # 无变化时发送心跳的间隔（秒）
+
+# 选课排队设置（见 apps.courses.admission，按进程排队；多进程部署时查询排队结果需要会话保持）
+COURSE_ADMISSION_QUEUE = True  # 同一门课程的选课请求排队逐个处理
+COURSE_ADMISSION_WORKERS = 4  # 同时处理不同课程选课请求的线程数
+COURSE_ADMISSION_WAIT = 5  # 选课请求等待处理结果的秒数，超时返回 202 和排队凭证
+COURSE_ADMISSION_MAX_QUEUE = 1000  # 单门课程的排队上限，超过时返回 429
+COURSE_ADMISSION_FULL_TTL = 1.0  # 课程已满后直接拒绝新请求的秒数，之后重新查询名额
+COURSE_ADMISSION_TICKET_TTL = 60  # 处理完成的排队凭证保留秒数
+
+# 排课方案设置
+COURSE_PLANNER_BUDGET = 0.05  # 单次搜索的时间预算（秒），超过时返回已找到的方案
+
+# 性能监控设置
+METRICS_SAMPLE_RATE = 0.1  # 记录 SQL 和埋点明细的请求比例，其余请求只记录总耗时
+METRICS_SERVER_TIMING = True  # 在响应头 Server-Timing 中返回耗时明细
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]  # 允许访问 /metrics 的地址，"*" 表示不限制
+
 # CORS 设置
 CORS_ALLOW_ALL_ORIGINS = True  # 开发环境下允许所有来源
 CORS_ALLOW_CREDENTIALS = True  # 允许携带认证信息
@@ -119,4 +244,12 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),  # 刷新令牌有效期
     "ROTATE_REFRESH_TOKENS": True,  # 刷新令牌时自动更新
     "AUTH_HEADER_TYPES": ("Bearer",),  # 认证头类型
+    # 登录时在令牌中写入用户名、学号、角色等声明
+    "TOKEN_OBTAIN_SERIALIZER": "apps.users.serializers.TokenObtainPairSerializer",
+    # 刷新时按数据库中的用户重新写入声明
+    "TOKEN_REFRESH_SERIALIZER": "apps.users.serializers.TokenRefreshSerializer",
 }
+# 课程接口信任令牌中的用户声明，不查询用户表；False 时按普通方式认证
+JWT_STATELESS_AUTH = True
+# 已停用、被吊销用户列表的刷新间隔（秒），即停用在其他进程中生效的最长延迟
+JWT_REVOCATION_TTL = 30
@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include
+from apps.monitoring.views import metrics
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/users/", include("apps.users.urls")),
     path("api/courses/", include("apps.courses.urls")),
+    path("metrics", metrics, name="metrics"),
 ]